@@ -0,0 +1,153 @@
+# Işık Bahçesi — performans ölçümü
+# -----------------------------------------------------------------------------
+# Simülasyon adımı (retarget, move_orbit, yoğunluk, temas, natural_dynamics) ve
+# ayrı olarak çizim yolu (Source glow, ajanlar, panel) ekransız dummy SDL sürücüsü
+# ile ölçülür. Her durum (tür × mod × ajan sayısı × preset kombinasyonu) sabit
+# tohumla, temiz bellek ölçümü için ayrı bir süreçte koşar. Sonuç: tik/sn,
+# p50/p99 kare süresi ve tepe bellek (RSS) içeren JSON; --baseline ile eski bir
+# sonuç dosyasına göre oran yazdırılır.
+# -----------------------------------------------------------------------------
+# Örnek:
+#   python bench.py --out bench.json
+#   python bench.py --agents 200 10000 100000 --modes vectorized --combos none --out yeni.json --baseline bench.json
+# -----------------------------------------------------------------------------
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+
+import sweep
+
+DEFAULT_AGENTS = [200, 1000, 10000, 100000]
+KINDS = ('step', 'render')
+MODES = ('object', 'vectorized')
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return kb / (1024*1024) if sys.platform == 'darwin' else kb / 1024
+
+
+def case_key(c: Dict[str, object]) -> str:
+    return f"{c['kind']}/{c['mode']}/{c['agents']}/{c['presets']}"
+
+
+def run_case(case: Dict[str, object]) -> Dict[str, object]:
+    if case['kind'] == 'render':
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    import fakelights as fl
+    sim = fl.Simulation(int(case['agents']), seed=int(case['seed']), vectorized=case['mode'] == 'vectorized')
+    sim.set_presets(sweep.parse_combo(str(case['presets'])))
+    viewer = fl.Viewer(sim) if case['kind'] == 'render' else None
+    dt = 1.0 / fl.FPS
+    for _ in range(int(case['warmup'])):
+        sim.step(dt)
+        if viewer: viewer.draw()
+
+    times = []
+    clock = time.perf_counter
+    for _ in range(int(case['ticks'])):
+        if viewer:
+            sim.step(dt)
+            t0 = clock(); viewer.draw(); times.append(clock() - t0)
+        else:
+            t0 = clock(); sim.step(dt); times.append(clock() - t0)
+    ms = np.array(times) * 1000.0
+    res = dict(case)
+    res.update({
+        'ticks_per_sec': len(times) / max(1e-12, float(np.sum(times))),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'mean_ms': float(ms.mean()),
+        'peak_rss_mb': peak_rss_mb(),
+    })
+    return res
+
+
+def build_cases(kinds, modes, agents, combos, ticks, warmup, seed, object_max) -> List[Dict[str, object]]:
+    cases = []
+    for kind in kinds:
+        for mode in modes:
+            for n in agents:
+                if mode == 'object' and n > object_max:
+                    continue
+                for combo in combos:
+                    cases.append({'kind': kind, 'mode': mode, 'agents': n, 'presets': combo,
+                                  'ticks': ticks, 'warmup': warmup, 'seed': seed})
+    return cases
+
+
+def compare(results: List[Dict[str, object]], baseline_path: str):
+    with open(baseline_path) as fh:
+        base = {case_key(r): r for r in json.load(fh)['results']}
+    print(f"\n{'durum':<55} {'önce':>10} {'sonra':>10} {'oran':>7}")
+    for r in results:
+        b = base.get(case_key(r))
+        if not b:
+            continue
+        ratio = r['ticks_per_sec'] / max(1e-12, b['ticks_per_sec'])
+        print(f"{case_key(r):<55} {b['ticks_per_sec']:>10.1f} {r['ticks_per_sec']:>10.1f} {ratio:>6.2f}x")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Işık Bahçesi benchmark")
+    ap.add_argument('--kinds', nargs='+', choices=KINDS, default=list(KINDS))
+    ap.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    ap.add_argument('--agents', type=int, nargs='+', default=DEFAULT_AGENTS)
+    ap.add_argument('--combos', nargs='+', default=['all'],
+                    help="'all' (32 kombinasyon) ya da sweep.py biçiminde kombinasyonlar")
+    ap.add_argument('--ticks', type=int, default=120)
+    ap.add_argument('--warmup', type=int, default=20)
+    ap.add_argument('--seed', type=int, default=12345)
+    ap.add_argument('--object-max', type=int, default=10000,
+                    help="nesne modunda bundan büyük popülasyonları atla")
+    ap.add_argument('--out', default='bench.json')
+    ap.add_argument('--baseline', default=None, help="karşılaştırılacak eski sonuç JSON'u")
+    args = ap.parse_args(argv)
+
+    combos = sweep.all_combos() if args.combos == ['all'] else [sweep.combo_name(sweep.parse_combo(c)) for c in args.combos]
+    cases = build_cases(args.kinds, args.modes, args.agents, combos, args.ticks, args.warmup,
+                        args.seed, args.object_max)
+    results = []
+    # Her durum temiz bir süreçte, sırayla (ölçümler birbirini etkilemesin)
+    ctx = multiprocessing.get_context('spawn')
+    for i, case in enumerate(cases, 1):
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as ex:
+            r = ex.submit(run_case, case).result()
+        results.append(r)
+        print(f"[{i}/{len(cases)}] {case_key(r):<55} {r['ticks_per_sec']:>9.1f}/sn "
+              f"p50={r['p50_ms']:.2f}ms p99={r['p99_ms']:.2f}ms rss={r['peak_rss_mb'] or 0:.0f}MB", flush=True)
+
+    out = {
+        'meta': {
+            'python': platform.python_version(), 'numpy': np.__version__,
+            'platform': platform.platform(), 'cpus': os.cpu_count(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    with open(args.out, 'w') as fh:
+        json.dump(out, fh, indent=1)
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
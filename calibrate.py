@@ -0,0 +1,253 @@
+# Işık Bahçesi — kural katsayısı kalibrasyonu (ardışık yarılama, çok çekirdek)
+# -----------------------------------------------------------------------------
+# RuleEngine katsayılarını (spike/crash, sönüm hızları, afinite Gauss parametreleri,
+# preset çarpanları ...) hedef metrik eğrilerine uyacak şekilde arar.
+#   - Adaylar varsayılan değerin çevresinde log-düzgün örneklenir (aday 0 = varsayılan).
+#   - Ardışık yarılama: tüm adaylar --min-ticks kadar koşar, kayıp sırasına göre en
+#     iyi 1/eta'sı sürer; her basamakta tik bütçesi eta katına çıkar (--ticks'e dek).
+#   - Adaylar ProcessPoolExecutor ile başsız dünyalarda paralel koşar; elenmeyen aday
+#     bir sonraki basamağa baştan değil, kontrol noktasından (checkpoint_state) devam eder.
+#   - Tüm adaylar aynı tohumlarla koşar; --seeds birden çoksa aday bir Ensemble'dır
+#     ve metrikler dünyalar üzerinden ortalanır.
+# Kayıp: hedef başına RMSE / metrik ölçeği (avg_inner 100, diğerleri 1), ortalaması.
+# Çıktı: --out dizininde history.csv (basamak × aday) ve best.json; best.json
+# doğrudan `python fakelights.py --coefficients best.json` ile kullanılır.
+# -----------------------------------------------------------------------------
+# Örnek:
+#   python calibrate.py --target loneliness=0.30 --target real_intensity=0:0,60:0.6 --out kalib/
+#   python calibrate.py --recording kayit/ --metrics avg_inner loneliness --candidates 81 --eta 3
+#   python calibrate.py --params 'SOSYAL.*' fade_rate --scale 3 --seeds 0 1 2 --target avg_inner=40
+# -----------------------------------------------------------------------------
+
+import argparse
+import csv
+import fnmatch
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+
+import fakelights as fl
+
+METRICS = ('avg_inner', 'loneliness', 'avg_health', 'avg_ties', 'avg_des', 'avg_hed', 'real_intensity')
+METRIC_SCALE = {'avg_inner': 100.0}           # diğerleri 0..1
+# Varsayılan arama uzayı (RuleEngine.coefficients() anahtarları; sıfır olanlar atlanır)
+DEFAULT_PARAMS = ('fade_rate', 'drop_rate', '*.spike', '*.crash', '*.base_loss', '*.restore_gain',
+                  '*.restore_inner', '*.affinity_mean', '*.preset.*')
+
+Target = Callable[[np.ndarray], np.ndarray]
+
+
+# --- Hedefler -----------------------------------------------------------------
+def parse_target(text: str) -> Tuple[str, Target]:
+    # 'loneliness=0.3' (sabit) ya da 'real_intensity=0:0,60:0.5,120:0.8' (sn:değer, doğrusal)
+    name, _, spec = text.partition('=')
+    if name not in METRICS or not spec:
+        raise ValueError(f"hedef METRİK=DEĞER ya da METRİK=t:v,t:v biçiminde olmalı: {text!r}")
+    if ':' not in spec:
+        value = float(spec)
+        return name, lambda t: np.full(len(t), value)
+    pts = sorted(tuple(map(float, p.split(':'))) for p in spec.split(','))
+    ts, vs = np.array([p[0] for p in pts]), np.array([p[1] for p in pts])
+    return name, lambda t: np.interp(t, ts, vs)
+
+
+def recording_targets(out_dir: str, metrics: List[str]) -> Dict[str, Target]:
+    # recorder.py kaydı: sütunlar zaman ekseninde doğrusal aradeğerlenir
+    import recorder
+    data = recorder.load_recording(out_dir)
+    return {m: (lambda t, v=data[m]: np.interp(t, data['time'], v)) for m in metrics}
+
+
+def trajectory_loss(times: np.ndarray, values: np.ndarray, metrics: List[str],
+                    targets: Dict[str, Target]) -> float:
+    errs = [math.sqrt(float(np.mean((values[:, j] - targets[m](times)) ** 2))) / METRIC_SCALE.get(m, 1.0)
+            for j, m in enumerate(metrics)]
+    return float(np.mean(errs))
+
+
+# --- Arama uzayı --------------------------------------------------------------
+def select_params(patterns: List[str]) -> Dict[str, float]:
+    # Desenle eşleşen sıfırdan farklı katsayılar → varsayılan değer
+    base = fl.RuleEngine().coefficients()
+    out = {}
+    for pat in patterns:
+        keys = [k for k in base if fnmatch.fnmatchcase(k, pat)]
+        if not keys:
+            raise ValueError(f"katsayı deseni eşleşmedi: {pat}")
+        out.update((k, base[k]) for k in keys if base[k] != 0.0)
+    return out
+
+
+def sample_candidates(defaults: Dict[str, float], n: int, scale: float,
+                      rng: np.random.Generator) -> List[Dict[str, float]]:
+    # [d/scale, d*scale] aralığında log-düzgün; aday 0 varsayılan tablo
+    keys = list(defaults)
+    d = np.array([defaults[k] for k in keys])
+    f = np.exp(rng.uniform(-math.log(scale), math.log(scale), size=(n - 1, len(keys))))
+    return [dict(defaults)] + [dict(zip(keys, (d * row).tolist())) for row in f]
+
+
+# --- Değerlendirme (işçi süreç) -----------------------------------------------
+def make_sim(cfg: Dict, coefficients: Dict[str, float]) -> fl.Simulation:
+    if len(cfg['seeds']) > 1:
+        return fl.Ensemble(len(cfg['seeds']), cfg['agents'], seeds=cfg['seeds'], coefficients=coefficients)
+    return fl.Simulation(cfg['agents'], seed=cfg['seeds'][0], vectorized=cfg['vectorized'],
+                         coefficients=coefficients)
+
+
+def sample_metrics(sim: fl.Simulation, metrics: List[str]) -> List[float]:
+    m = sim.metrics()
+    if isinstance(m, list):                   # Ensemble: dünya ortalaması
+        return [float(np.mean([w[k] for w in m])) for k in metrics]
+    return [m[k] for k in metrics]
+
+
+def evaluate(cid: int, coefficients: Dict[str, float], cfg: Dict, ticks: int, state=None):
+    # Aday cid'yi ticks'e dek koştur (state verilirse oradan devam); (cid, zamanlar, değerler, durum)
+    sim = make_sim(cfg, coefficients)
+    if state is not None:
+        sim.restore_state(*state)
+    else:
+        sim.set_presets(cfg['presets'])
+    dt, every = 1.0 / fl.FPS, cfg['every']
+    times, rows = [], []
+    while sim.ticks < ticks:
+        sim.step(dt)
+        if sim.ticks % every == 0:
+            times.append(sim.time)
+            rows.append(sample_metrics(sim, cfg['metrics']))
+    values = np.array(rows, dtype=np.float64).reshape(-1, len(cfg['metrics']))
+    return cid, np.array(times), values, sim.checkpoint_state()
+
+
+# --- Ardışık yarılama -----------------------------------------------------------
+def rungs(min_ticks: int, max_ticks: int, eta: int) -> List[int]:
+    out, t = [], min_ticks
+    while t < max_ticks:
+        out.append(t)
+        t *= eta
+    return out + [max_ticks]
+
+
+def calibrate(candidates: List[Dict[str, float]], cfg: Dict, targets: Dict[str, Target],
+              min_ticks: int, max_ticks: int, eta: int = 3, workers: Optional[int] = None,
+              on_rung=None) -> List[Dict]:
+    # Geçmiş: basamak başına her aday için bir satır (rung, ticks, candidate, loss, kept)
+    alive = list(range(len(candidates)))
+    times = {c: np.zeros(0) for c in alive}
+    values = {c: np.zeros((0, len(cfg['metrics']))) for c in alive}
+    states = {c: None for c in alive}
+    history = []
+    schedule = rungs(min_ticks, max_ticks, eta)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        for r, ticks in enumerate(schedule):
+            futs = [ex.submit(evaluate, c, candidates[c], cfg, ticks, states[c]) for c in alive]
+            loss = {}
+            for fut in as_completed(futs):
+                c, t, v, states[c] = fut.result()
+                times[c] = np.concatenate([times[c], t])
+                values[c] = np.vstack([values[c], v])
+                loss[c] = trajectory_loss(times[c], values[c], cfg['metrics'], targets)
+            ranked = sorted(alive, key=lambda c: loss[c])
+            keep = ranked if r == len(schedule) - 1 else ranked[:max(1, len(ranked) // eta)]
+            rows = [dict(rung=r, ticks=ticks, candidate=c, loss=loss[c], kept=c in keep,
+                         final={m: float(values[c][-1, j]) for j, m in enumerate(cfg['metrics'])}
+                         if len(values[c]) else {})
+                    for c in ranked]
+            history += rows
+            if on_rung is not None:
+                on_rung(rows)
+            for c in set(alive) - set(keep):
+                states.pop(c)                 # elenen adayın kontrol noktası bırakılır
+            alive = keep
+    return history
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="RuleEngine katsayı kalibrasyonu (ardışık yarılama)")
+    ap.add_argument('--target', action='append', default=[], metavar='METRİK=DEĞER|t:v,...',
+                    help="hedef eğri (tekrarlanabilir)")
+    ap.add_argument('--recording', default=None, help="hedef olarak recorder.py kaydı")
+    ap.add_argument('--metrics', nargs='+', default=['loneliness', 'real_intensity'],
+                    help="--recording ile eşlenecek metrikler")
+    ap.add_argument('--params', nargs='+', default=list(DEFAULT_PARAMS),
+                    help="aranacak katsayı desenleri (fnmatch, ör. 'SOSYAL.*' fade_rate)")
+    ap.add_argument('--scale', type=float, default=2.0, help="arama aralığı: varsayılan/scale .. varsayılan*scale")
+    ap.add_argument('--candidates', type=int, default=27)
+    ap.add_argument('--eta', type=int, default=3, help="basamak başına eleme oranı")
+    ap.add_argument('--min-ticks', type=int, default=300, help="ilk basamak (erken eleme)")
+    ap.add_argument('--ticks', type=int, default=60*fl.FPS, help="tam değerlendirme uzunluğu")
+    ap.add_argument('--every', type=int, default=30, help="metrik örnekleme aralığı (tik)")
+    ap.add_argument('--agents', type=int, default=fl.AGENT_COUNT)
+    ap.add_argument('--seeds', type=int, nargs='+', default=[0], help="birden çoksa Ensemble")
+    ap.add_argument('--vectorized', action='store_true', help="tek tohumda NumPy popülasyonu")
+    ap.add_argument('--presets', default='', help="'+' ile birleşik preset bayrakları")
+    ap.add_argument('--search-seed', type=int, default=0)
+    ap.add_argument('--workers', type=int, default=None)
+    ap.add_argument('--out', default='kalibrasyon')
+    args = ap.parse_args(argv)
+
+    try:
+        targets = dict(parse_target(t) for t in args.target)
+        if args.recording:
+            targets.update(recording_targets(args.recording, [m for m in args.metrics if m not in targets]))
+        if not targets:
+            raise ValueError("en az bir --target ya da --recording gerekli")
+        defaults = select_params(args.params)
+        presets = [f for f in args.presets.split('+') if f]
+        if set(presets) - set(fl.PRESET_SHORT):
+            raise ValueError(f"bilinmeyen preset: {args.presets}")
+    except (ValueError, KeyError) as e:
+        ap.error(str(e))
+    if args.min_ticks < args.every or args.ticks < args.min_ticks:
+        ap.error("--every <= --min-ticks <= --ticks olmalı")
+    metrics = [m for m in METRICS if m in targets]
+    cfg = dict(agents=args.agents, seeds=args.seeds, vectorized=args.vectorized, presets=presets,
+               metrics=metrics, every=args.every)
+    candidates = sample_candidates(defaults, args.candidates, args.scale,
+                                   np.random.default_rng(args.search_seed))
+
+    os.makedirs(args.out, exist_ok=True)
+    keys = list(defaults)
+    fh = open(os.path.join(args.out, 'history.csv'), 'w', newline='', encoding='utf-8')
+    writer = csv.writer(fh)
+    writer.writerow(['rung', 'ticks', 'candidate', 'loss', 'kept'] + [f"final_{m}" for m in metrics] + keys)
+    t0 = time.perf_counter()
+
+    def on_rung(rows):
+        for row in rows:
+            c = candidates[row['candidate']]
+            writer.writerow([row['rung'], row['ticks'], row['candidate'], f"{row['loss']:.6g}", int(row['kept'])]
+                            + [f"{row['final'].get(m, float('nan')):.6g}" for m in metrics]
+                            + [f"{c[k]:.6g}" for k in keys])
+        fh.flush()
+        best = rows[0]
+        print(f"basamak {best['rung']}: {len(rows)} aday × {best['ticks']} tik, en iyi #{best['candidate']} "
+              f"kayıp {best['loss']:.4f} ({time.perf_counter() - t0:.1f} sn)", file=sys.stderr)
+
+    try:
+        history = calibrate(candidates, cfg, targets, args.min_ticks, args.ticks, args.eta,
+                            args.workers, on_rung)
+    finally:
+        fh.close()
+    best = min((h for h in history if h['ticks'] == args.ticks), key=lambda h: h['loss'])
+    base = [h for h in history if h['candidate'] == 0][-1]   # varsayılan tablonun ulaştığı son basamak
+    out = {'loss': best['loss'], 'candidate': best['candidate'], 'ticks': args.ticks,
+           'targets': args.target, 'recording': args.recording, 'metrics': metrics,
+           'final': best['final'], 'coefficients': candidates[best['candidate']]}
+    with open(os.path.join(args.out, 'best.json'), 'w', encoding='utf-8') as f:
+        json.dump(out, f, ensure_ascii=False, indent=1)
+    print(json.dumps({k: out[k] for k in ('loss', 'candidate', 'final')}, ensure_ascii=False, indent=1))
+    print(f"varsayılan tablo: {base['ticks']} tikte kayıp {base['loss']:.4f} → {args.out}/best.json", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# Işık Bahçesi — ekransız kare dışa aktarma (sabit kare hızı, arka plan kodlama)
+# -----------------------------------------------------------------------------
+# Viewer pencere açmadan ekran dışı bir pygame.Surface'e çizer; simülasyon kare
+# başına sabit sayıda tik ilerler (FPS / kare hızı), duvar saatinden bağımsız.
+# Kare pikselleri paylaşımlı bellekteki yuvalardan birine kopyalanır ve yuva
+# numarası ProcessPoolExecutor işçilerine verilir:
+#   png : işçiler (varsayılan tüm çekirdekler) frame_000000.png ... yazar
+#   pipe: tek işçi kareleri sırayla yerel kodlayıcının stdin'ine ham RGB akıtır
+# Boş yuva kuyruğu sınırı bellek sınırıdır: çizim yalnızca tüm yuvalar doluyken
+# (işçiler geride kaldığında) bekler; kodlama hiçbir zaman çizim döngüsünde olmaz.
+# -----------------------------------------------------------------------------
+# Örnek:
+#   python export.py --agents 2000 --vectorized --seconds 20 --fps 30 --out kareler/
+#   python export.py --seconds 60 --format pipe --out klip.mp4
+#   python export.py --replay tekrar/ --start-tick 36000 --seconds 30 --out kareler/
+#   (--encoder "ffmpeg -y -f rawvideo -pix_fmt rgb24 -s {w}x{h} -r {fps} -i - {out}")
+# -----------------------------------------------------------------------------
+
+import argparse
+import multiprocessing
+import os
+import queue
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional, Tuple
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+
+import fakelights as fl
+import replay
+
+ENCODER = ("ffmpeg -y -loglevel error -f rawvideo -pix_fmt rgb24 -s {w}x{h} -r {fps} -i - "
+           "-pix_fmt yuv420p {out}")
+
+
+# --- İşçi süreç ---------------------------------------------------------------
+# Her işçi paylaşımlı belleğe bir kez bağlanır; pipe modunda kodlayıcıyı da açar.
+_worker = {}
+
+
+def _init_worker(shm_name: str, shape: Tuple[int, ...], encoder: Optional[str]):
+    shm = SharedMemory(name=shm_name)   # spawn: ana sürecin resource_tracker'ını paylaşır
+    _worker['shm'] = shm
+    _worker['frames'] = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+    if encoder:
+        _worker['proc'] = subprocess.Popen(shlex.split(encoder), stdin=subprocess.PIPE)
+
+
+def _write_png(slot: int, path: str):
+    frame = _worker['frames'][slot]
+    h, w = frame.shape[:2]
+    pygame.image.save(pygame.image.frombuffer(frame, (w, h), 'RGB'), path)
+
+
+def _write_pipe(slot: int):
+    _worker['proc'].stdin.write(_worker['frames'][slot].data)
+
+
+def _close_encoder() -> int:
+    proc = _worker.pop('proc')
+    proc.stdin.close()
+    return proc.wait()
+
+
+# --- Ana süreç tarafı -----------------------------------------------------------
+class FrameExporter:
+    def __init__(self, out: str, size: Tuple[int, int], fps: int, mode: str = 'png',
+                 workers: Optional[int] = None, slots: Optional[int] = None, encoder: str = ENCODER):
+        if mode not in ('png', 'pipe'):
+            raise ValueError(f"bilinmeyen biçim: {mode}")
+        self.out = out
+        self.mode = mode
+        self.w, self.h = size
+        self.count = 0
+        # pipe: kare sırası korunmalı → tek işçi (kodlayıcı kendi çekirdeklerini kullanır)
+        workers = 1 if mode == 'pipe' else (workers or os.cpu_count() or 1)
+        slots = slots or 2*workers + 2
+        shape = (slots, self.h, self.w, 3)
+        self._shm = SharedMemory(create=True, size=int(np.prod(shape)))
+        self._frames = np.ndarray(shape, dtype=np.uint8, buffer=self._shm.buf)
+        self._free: "queue.Queue[int]" = queue.Queue()
+        for i in range(slots):
+            self._free.put(i)
+        self._error: Optional[BaseException] = None
+        cmd = None
+        if mode == 'png':
+            os.makedirs(out, exist_ok=True)
+        else:
+            cmd = encoder.format(w=self.w, h=self.h, fps=fps, out=shlex.quote(out))
+        ctx = multiprocessing.get_context('spawn')
+        self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                                         initargs=(self._shm.name, shape, cmd))
+        self.wait_s = 0.0             # boş yuva beklenen toplam süre (işçiler geride)
+
+    def submit(self, surface: pygame.Surface):
+        if self._error is not None:
+            raise RuntimeError("kare yazıcı hata verdi") from self._error
+        t0 = time.perf_counter()
+        slot = self._free.get()
+        self.wait_s += time.perf_counter() - t0
+        px = pygame.surfarray.pixels3d(surface)   # (w, h, 3) görünüm; yüzey kilitli
+        np.copyto(self._frames[slot], px.transpose(1, 0, 2))
+        del px
+        if self.mode == 'png':
+            path = os.path.join(self.out, f"frame_{self.count:06d}.png")
+            fut = self._pool.submit(_write_png, slot, path)
+        else:
+            fut = self._pool.submit(_write_pipe, slot)
+        fut.add_done_callback(lambda f, s=slot: self._done(f, s))
+        self.count += 1
+
+    def _done(self, fut, slot: int):
+        # havuzun yönetim iş parçacığında: yuva geri verilir
+        if fut.exception() is not None:
+            self._error = fut.exception()
+        self._free.put(slot)
+
+    def close(self):
+        try:
+            if self.mode == 'pipe':
+                code = self._pool.submit(_close_encoder).result()
+                if code:
+                    raise RuntimeError(f"kodlayıcı {code} koduyla çıktı")
+            self._pool.shutdown(wait=True)
+        finally:
+            self._frames = None
+            self._shm.close()
+            self._shm.unlink()
+        if self._error is not None:
+            raise RuntimeError("kare yazıcı hata verdi") from self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def export(sim: fl.Simulation, exporter: FrameExporter, frames: int, fps: int, step=None) -> float:
+    # Kare k = k/fps saniyedeki durum; step verilmezse sim.step (Replay.step kayıtlı çağrıları uygular)
+    surface = pygame.Surface((fl.WIDTH, fl.HEIGHT))
+    viewer = fl.Viewer(sim, surface=surface)
+    dt = 1.0 / fl.FPS
+    step = step or (lambda: sim.step(dt))
+    per_frame = fl.FPS / fps
+    acc = 0.0
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        viewer.draw()
+        exporter.submit(surface)
+        acc += per_frame
+        n = int(acc)
+        acc -= n
+        for _ in range(n):
+            step()
+    return time.perf_counter() - t0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Ekransız kare dışa aktarma (PNG dizisi ya da kodlayıcı)")
+    ap.add_argument('--agents', type=int, default=fl.AGENT_COUNT)
+    ap.add_argument('--seed', type=int, default=None)
+    ap.add_argument('--vectorized', action='store_true')
+    ap.add_argument('--presets', default='', help="'+' ile birleşik preset bayrakları")
+    ap.add_argument('--replay', default=None, help="replay.py kayıt dizini (simülasyon yerine)")
+    ap.add_argument('--start-tick', type=int, default=0, help="--replay ile başlangıç tiki")
+    ap.add_argument('--seconds', type=float, default=10.0, help="simülasyon süresi")
+    ap.add_argument('--fps', type=int, default=30, help="çıktı kare hızı")
+    ap.add_argument('--format', choices=('png', 'pipe'), default='png')
+    ap.add_argument('--workers', type=int, default=None, help="png işçi sayısı (varsayılan: çekirdek)")
+    ap.add_argument('--slots', type=int, default=None, help="bekleyen kare sınırı")
+    ap.add_argument('--encoder', default=ENCODER, help="{w} {h} {fps} {out} yer tutuculu komut")
+    ap.add_argument('--out', required=True)
+    args = ap.parse_args(argv)
+
+    step = None
+    if args.replay:
+        rp = replay.Replay(args.replay)
+        rp.seek(args.start_tick)
+        sim, step = rp.sim, rp.step
+    else:
+        sim = fl.Simulation(args.agents, seed=args.seed, vectorized=args.vectorized)
+        sim.set_presets([f for f in args.presets.split('+') if f])
+    frames = int(round(args.seconds * args.fps))
+    with FrameExporter(args.out, (fl.WIDTH, fl.HEIGHT), args.fps, args.format, args.workers,
+                       args.slots, args.encoder) as ex:
+        elapsed = export(sim, ex, frames, args.fps, step)
+        print(f"{frames} kare çizildi: {elapsed:.1f} sn ({frames / max(elapsed, 1e-9):.1f} kare/sn), "
+              f"işçi bekleme {ex.wait_s:.1f} sn", file=sys.stderr)
+    print(f"{ex.count} kare → {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
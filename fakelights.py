@@ -9,18 +9,44 @@
 #  - Bildirim güncellemesi güvenli (IndexError fix).
 # -----------------------------------------------------------------------------
 # Çalıştırma:
-#   pip install pygame
-#   python isik_bahcesi_simulasyon.py
+#   pip install pygame numpy
+#   python fakelights.py
+#   python fakelights.py --agents 2000 --vectorized --presets ramazan+destek_grubu --seed 1
+#   python fakelights.py --headless --seconds 120 --seed 1     # pencere yok, metrikler JSON
+# Başsız (pencere yok) kullanım:
+#   from fakelights import Simulation
+#   sim = Simulation(agent_count=2000, seed=1); sim.run(10_000)
+#   sim = Simulation(agent_count=100_000, seed=1, vectorized=True)  # NumPy dizileri
+#   ens = Ensemble(64, agent_count=200, seed=0); ens.run(3600); ens.summary()  # 64 dünya
+# Büyük dünya (kamera: oklar/sağ sürükle kaydırır, teker yakınlaştırır, Home tümü):
+#   Viewer(Simulation(50_000, vectorized=True, world_size=(8000, 8000), sources_per_type=12)).run()
+# Kayıt / geri sarma: python replay.py record --view --out tekrar/ ; python replay.py view tekrar/
+# Video kareleri (ekransız, sabit kare hızı): python export.py --seconds 30 --fps 30 --out kareler/
+# Canlı metrikler (tarayıcı / Prometheus kazıyıcı): python live.py --port 8765 ; http://127.0.0.1:8765/
+# Katsayı kalibrasyonu: python calibrate.py --target loneliness=0.3 --out kalib/ ; python fakelights.py --coefficients kalib/best.json
 # -----------------------------------------------------------------------------
 
+import argparse
+import copy
+import json
 import math
+import os
+import queue
 import random
+import statistics
 import sys
-from dataclasses import dataclass, field
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import nullcontext
+from dataclasses import dataclass, field, fields, replace
 from typing import Dict, Tuple, List, Optional
 
+# pygame'in karşılama satırı stdout'a düşmesin (--headless JSON çıktısı)
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
 import pygame
-from bisect import bisect_left
 
 # --- Pencere ayarları --------------------------------------------------------
 WIDTH, HEIGHT = 800, 1000
@@ -52,21 +78,81 @@ SOURCE_RADIUS = 24            # çekirdek daire
 ORBIT_BAND = 28               # çekirdekten şu kadar ötede ring hedefi
 ORBIT_BW = 12                 # ring kalınlığı (etkileşim bandı)
 
-SOCIAL = "SOSYAL"
-SUBSTANCE = "MADDE"
-PORN = "PORNO"
-CONSUME = "TUKETIM"
-REAL = "GERCEK"
-ALL_TYPES = [SOCIAL, SUBSTANCE, PORN, CONSUME, REAL]
-
-# Preset anahtarları (toggle)
-PRESET_KEYS = {
-    pygame.K_b: "Bildirim Fırtınası",
-    pygame.K_o: "Dijital Oruç",
-    pygame.K_r: "Ramazan Etkisi",
-    pygame.K_g: "Destek Grubu",
-    pygame.K_f: "Filtre Açık",
-}
+# --- Kaynak tipleri: kural tablosu -------------------------------------------
+# Her kaynak tipi tek satır; tip kodu = tablodaki sıra (cravings ve afinite
+# sütunları da bu sırada). RuleEngine tabloyu bir kez tip koduyla indekslenen
+# dizilere derler; temas, skor ve renk string karşılaştırması yerine indeksle.
+# Yeni tip: tabloya satır yeterli (varsayılan dünyada merkez çevresindeki halkaya,
+# büyük dünyada ızgaraya yerleşir; lejant da tablodan) — sıcak koda dokunmadan.
+@dataclass(frozen=True)
+class SourceRule:
+    name: str
+    tint: Tuple[int, int, int]                # son uyarı rengi
+    orbit_extra: int                          # ring: SOURCE_RADIUS + ORBIT_BAND + orbit_extra
+    affinity: Tuple[float, float, float]      # afinite dağılımı (ortalama, sapma, üst sınır)
+    craving0: float                           # başlangıç isteği
+    # Temas etkisi (0.6 sn'de bir); doygunluk = 0.45 + 0.55*(1 - base_light/100)
+    spike: float = 0.0                        # inner_light += spike*(1 - spike_hedonic*hedonic)
+    spike_hedonic: float = 0.0
+    crash: float = 0.0                        # pending_crash += crash
+    crash_relief: float = 0.0                 # pending_crash -= crash_relief (>= 0)
+    base_loss: float = 0.0                    # base_light -= base_loss*dens_pen
+    restore_gain: float = 0.0                 # base_light += restore_gain*doygunluk*dens_pen
+    restore_inner: float = 0.0                # inner_light += restore_inner*doygunluk
+    d_health: float = 0.0
+    d_willpower: float = 0.0
+    d_ties: float = 0.0
+    d_desens: float = 0.0
+    d_hedonic: float = 0.0
+    cravings: Tuple[Tuple[str, float], ...] = ()  # (tip adı, istek değişimi)
+    restorative: bool = False                 # Gerçek Işık: kararma sayacı sıfırlanır, hedefken sönüm yok
+    # Hedef seçimi skor çarpanları
+    vice: float = 0.0                         # *= (1 - vice*irade)
+    boost_will: float = 0.0                   # *= (1 + boost_will*irade + boost_ties*bağ)
+    boost_ties: float = 0.0
+    desens_pen: float = 0.0                   # *= (1 - desens_pen*desens)
+    hedonic_pen: float = 0.0                  # *= (1 - hedonic_pen*hedonic)
+    presets: Tuple[Tuple[str, float], ...] = ()   # (preset bayrağı, çarpan), sırayla çarpılır
+    label: str = ""                           # lejant / kaynak etiketi (boşsa name)
+
+SOURCE_RULES = (
+    SourceRule("SOSYAL", NEON_BLUE, 4, (0.25, 0.12, 1.0), 0.25,
+               spike=2.2, crash=2.2, base_loss=0.18, cravings=(("SOSYAL", 0.03),),
+               presets=(('digital_oruc', 0.35), ('bildirim_firtinasi', 1.35)),
+               label="Sosyal Medya"),
+    SourceRule("MADDE", NEON_RED, 8, (0.06, 0.06, 0.5), 0.08,
+               spike=9.5, crash=9.5, base_loss=0.65, d_health=-0.12, d_willpower=-0.05,
+               cravings=(("MADDE", 0.07),), vice=0.6,
+               label="Alkol/Uyuşturucu"),
+    SourceRule("PORNO", NEON_PINK, 6, (0.14, 0.08, 0.7), 0.15,
+               spike=5.0, crash=4.8, base_loss=0.34, d_desens=0.05, d_ties=-0.04,
+               cravings=(("PORNO", 0.05),), vice=0.6, desens_pen=0.5,
+               presets=(('filtre_acik', 0.4),),
+               label="Pornografi"),
+    SourceRule("TUKETIM", NEON_PURPLE, 10, (0.18, 0.10, 0.8), 0.20,
+               spike=5.6, spike_hedonic=0.5, crash=5.2, base_loss=0.28, d_hedonic=0.05,
+               cravings=(("TUKETIM", 0.05),), vice=0.6, hedonic_pen=0.5,
+               label="Tüketim/Şöhret"),
+    SourceRule("GERCEK", AMBER, 18, (0.20, 0.12, 1.0), 0.10,
+               restore_gain=0.8, restore_inner=0.6, crash_relief=0.9,
+               d_health=0.02, d_willpower=0.03, d_ties=0.025,
+               cravings=(("SOSYAL", -0.011), ("PORNO", -0.017), ("TUKETIM", -0.017), ("MADDE", -0.02)),
+               restorative=True, boost_will=0.6, boost_ties=0.25, presets=(('ramazan', 1.3),),
+               label="Gerçek Işık"),
+)
+# Tablonun sayısal sütunları (RuleEngine'de tip başına dizi olur)
+RULE_COLUMNS = ('spike', 'spike_hedonic', 'crash', 'crash_relief', 'base_loss', 'restore_gain',
+                'restore_inner', 'd_health', 'd_willpower', 'd_ties', 'd_desens', 'd_hedonic',
+                'vice', 'boost_will', 'boost_ties', 'desens_pen', 'hedonic_pen')
+AFFINITY_KEYS = ('affinity_mean', 'affinity_sd', 'affinity_max')
+
+ALL_TYPES = list(range(len(SOURCE_RULES)))
+TYPE_NAMES = [r.name for r in SOURCE_RULES]
+# Kodda adıyla anılan tipler: indeks tablodan (satır eklemek/sıralamak bunları bozmaz)
+SOCIAL, SUBSTANCE, PORN, CONSUME, REAL = (TYPE_NAMES.index(n) for n in
+                                          ("SOSYAL", "MADDE", "PORNO", "TUKETIM", "GERCEK"))
+NO_STIMULUS = -1
+DEFAULT_CRAVINGS = [r.craving0 for r in SOURCE_RULES]
 
 # --- Yardımcı ---------------------------------------------------------------
 def clamp(v, a, b):
@@ -78,67 +164,278 @@ def mix(c1, c2, t):
             int(c1[1] + (c2[1]-c1[1])*t),
             int(c1[2] + (c2[2]-c1[2])*t))
 
-# --- Basit sıralı indeks -----------------------------------------------------
-class BTreeIndex:
-    def __init__(self):
-        self.keys: List[float] = []
-        self.ids: List[int] = []
-    def insert(self, key: float, id_: int):
-        i = bisect_left(self.keys, key)
-        self.keys.insert(i, key); self.ids.insert(i, id_)
+def mix_arr(c1, c2, t):
+    # mix() ile aynı (int kırpma dahil), renkler (N,3) ya da (3,), t (N,)
+    t = np.clip(t, 0, 1)[:, None]
+    c1 = np.asarray(c1, dtype=np.float64); c2 = np.asarray(c2, dtype=np.float64)
+    return (c1 + (c2-c1)*t).astype(np.int64)
+
+# --- Glow sprite önbelleği --------------------------------------------------
+# Her kare yeni SRCALPHA yüzey açmak yerine (renk, yarıçap, alfa) anahtarlı,
+# renk kuantize edilmiş hazır sprite'lar. LRU ile bayt bütçesi aşılınca en eski atılır.
+GLOW_LAYERS_AGENT = ((AGENT_RADIUS+7, 30), (AGENT_RADIUS+3, 60))
+GLOW_LAYERS_SOURCE = ((20, 30), (10, 50), (0, 80))  # (pr'ye eklenen yarıçap, alfa)
+
+class GlowCache:
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, quant: int = 8):
+        self.max_bytes = max_bytes
+        self.quant = quant
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lru: "OrderedDict[tuple, pygame.Surface]" = OrderedDict()
+
+    def quantize(self, c) -> Tuple[int, int, int]:
+        q = self.quant
+        return tuple(min(255, (int(v) // q) * q + q // 2) for v in c[:3])
+
+    def quantize_arr(self, colors: np.ndarray) -> np.ndarray:
+        q = self.quant
+        return np.minimum(255, (colors[:, :3].astype(np.int64) // q) * q + q // 2)
+
+    def _get(self, key, build):
+        surf = self._lru.get(key)
+        if surf is not None:
+            self._lru.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = build()
+        self._lru[key] = surf
+        self.bytes += surf.get_width() * surf.get_height() * 4
+        while self.bytes > self.max_bytes and len(self._lru) > 1:
+            _, old = self._lru.popitem(last=False)
+            self.bytes -= old.get_width() * old.get_height() * 4
+        return surf
+
+    def glow(self, color, r: int, alpha: int) -> pygame.Surface:
+        c = self.quantize(color)
+        def build():
+            s = pygame.Surface((r*2, r*2), pygame.SRCALPHA)
+            pygame.draw.circle(s, (*c, alpha), (r, r), r)
+            return s
+        return self._get(('glow', c, r, alpha), build)
+
+    def agent_sprite(self, color) -> pygame.Surface:
+        # İki glow katmanı + dolu çekirdek tek sprite'ta
+        c = self.quantize(color)
+        def build():
+            R = GLOW_LAYERS_AGENT[0][0]
+            s = pygame.Surface((R*2, R*2), pygame.SRCALPHA)
+            for r, a in GLOW_LAYERS_AGENT:
+                s.blit(self.glow(c, r, a), (R-r, R-r))
+            pygame.draw.circle(s, c, (R, R), AGENT_RADIUS)
+            return s
+        return self._get(('agent', c), build)
+
+GLOW_CACHE = GlowCache()
+
+# --- Uniform grid uzamsal indeks ---------------------------------------------
+# Ajan konumları hücre kimliğine göre sıralanır (her tik yeniden kurulum O(N));
+# hücre başlangıç ofsetleri ile yarıçap sorgusu yalnızca çevre hücrelere bakar.
+# layer verilirse (Ensemble) her dünya ayrı bir hücre katmanı: komşuluklar karışmaz.
+GRID_CELL = 24.0
+PEER_RATE = 0.35              # Destek Grubu: komşu ortalamasına yaklaşma hızı (1/sn)
+
+class SpatialGrid:
+    def __init__(self, width: float = WIDTH-300, height: float = HEIGHT, cell: float = GRID_CELL):
+        self.cell = cell
+        self.nx = max(1, int(math.ceil(width / cell)))
+        self.ny = max(1, int(math.ceil(height / cell)))
+        self.pos = np.zeros((0, 2))
+        self.cell_id = np.zeros(0, dtype=np.int64)
+        self.order = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(self.nx*self.ny, dtype=np.int64)
+        self.start = np.zeros(self.nx*self.ny + 1, dtype=np.int64)
+
+    def rebuild(self, pos: np.ndarray, layer: Optional[np.ndarray] = None, layers: int = 1):
+        self.pos = pos
+        cx = np.clip((pos[:, 0] // self.cell).astype(np.int64), 0, self.nx-1)
+        cy = np.clip((pos[:, 1] // self.cell).astype(np.int64), 0, self.ny-1)
+        ncell = self.nx*self.ny
+        self.cell_id = cy*self.nx + cx
+        if layer is not None:
+            self.cell_id += layer*ncell
+        self.order = np.argsort(self.cell_id)
+        self.counts = np.bincount(self.cell_id, minlength=layers*ncell)
+        if len(self.start) != len(self.counts) + 1:
+            self.start = np.zeros(len(self.counts) + 1, dtype=np.int64)
+        self.start[1:] = np.cumsum(self.counts)
+
+    def query_radius(self, x: float, y: float, r: float) -> np.ndarray:
+        c = self.cell
+        x0, x1 = max(0, int((x-r)//c)), min(self.nx-1, int((x+r)//c))
+        y0, y1 = max(0, int((y-r)//c)), min(self.ny-1, int((y+r)//c))
+        if x0 > x1 or y0 > y1:
+            return np.zeros(0, dtype=np.int64)
+        # aynı satırdaki hücreler sıralı dizide ardışık
+        parts = [self.order[self.start[cy*self.nx + x0]:self.start[cy*self.nx + x1 + 1]]
+                 for cy in range(y0, y1+1)]
+        idx = np.concatenate(parts)
+        d = np.hypot(self.pos[idx, 0]-x, self.pos[idx, 1]-y)
+        return idx[d <= r]
+
+    def nearest(self, x: float, y: float, max_dist: float) -> Optional[int]:
+        idx = self.query_radius(x, y, max_dist)
+        if not len(idx):
+            return None
+        d = np.hypot(self.pos[idx, 0]-x, self.pos[idx, 1]-y)
+        k = int(np.argmin(d))
+        return int(idx[k]) if d[k] < max_dist else None
+
+    def neighbor_counts(self) -> np.ndarray:
+        # Her ajanın 3×3 hücre komşuluğundaki diğer ajan sayısı (kendisi hariç)
+        g = np.pad(self.counts.reshape(-1, self.ny, self.nx), ((0, 0), (1, 1), (1, 1)))
+        box = sum(g[:, 1+dy:1+dy+self.ny, 1+dx:1+dx+self.nx] for dy in (-1, 0, 1) for dx in (-1, 0, 1))
+        return box.ravel()[self.cell_id] - 1
+
+    def neighbor_sums(self, values: np.ndarray) -> np.ndarray:
+        # (N, k) değerlerin 3×3 hücre komşuluğundaki toplamı (kendisi hariç)
+        ncell = len(self.counts)
+        out = np.empty_like(values, dtype=np.float64)
+        for j in range(values.shape[1]):
+            cs = np.bincount(self.cell_id, weights=values[:, j], minlength=ncell).reshape(-1, self.ny, self.nx)
+            g = np.pad(cs, ((0, 0), (1, 1), (1, 1)))
+            box = sum(g[:, 1+dy:1+dy+self.ny, 1+dx:1+dx+self.nx] for dy in (-1, 0, 1) for dx in (-1, 0, 1))
+            out[:, j] = box.ravel()[self.cell_id] - values[:, j]
+        return out
 
 # --- Rule/Relational ---------------------------------------------------------
 @dataclass
 class RuleEngine:
-    affinity: Dict[Tuple[int, str], float] = field(default_factory=dict)
-    orbit_base: Dict[str, float] = field(default_factory=dict)
+    types: Tuple[SourceRule, ...] = SOURCE_RULES
+    # (N, tip) afinite matrisi; skaler (Agent) yol için aynı değerler satır listesi olarak
+    affinity: Optional[np.ndarray] = None
+    affinity_rows: List[List[float]] = field(default_factory=list)
+    # Tip dışı sönüm hızları (/sn)
+    fade_rate: float = 0.18       # Gerçek Işık'tan uzak kalınca base_light kararması
+    drop_rate: float = 5.0        # hedef Gerçek Işık değilken inner_light düşüşü
+
+    def __post_init__(self):
+        self.compile()
+
+    # --- Katsayılar (kalibrasyon) ----------------------------------------------
+    # Ayarlanabilir tüm sayılar düz sözlük: 'fade_rate', 'SOSYAL.spike',
+    # 'MADDE.affinity_mean', 'GERCEK.craving.SOSYAL', 'SOSYAL.preset.digital_oruc' ...
+    def coefficients(self) -> Dict[str, float]:
+        out = {'fade_rate': self.fade_rate, 'drop_rate': self.drop_rate}
+        for r in self.types:
+            for col in RULE_COLUMNS:
+                out[f"{r.name}.{col}"] = float(getattr(r, col))
+            for k, v in zip(AFFINITY_KEYS, r.affinity):
+                out[f"{r.name}.{k}"] = float(v)
+            out[f"{r.name}.craving0"] = float(r.craving0)
+            for n, d in r.cravings:
+                out[f"{r.name}.craving.{n}"] = float(d)
+            for f, m in r.presets:
+                out[f"{r.name}.preset.{f}"] = float(m)
+        return out
+
+    def with_coefficients(self, coeffs: Dict[str, float]) -> 'RuleEngine':
+        # Verilen anahtarları değişmiş yeni motor (tablo dondurulmuş; self değişmez)
+        unknown = set(coeffs) - set(self.coefficients())
+        if unknown:
+            raise ValueError(f"bilinmeyen katsayı: {', '.join(sorted(unknown))}")
+        types = []
+        for r in self.types:
+            def get(key, v, name=r.name):
+                return float(coeffs.get(f"{name}.{key}", v))
+            types.append(replace(
+                r, affinity=tuple(get(k, v) for k, v in zip(AFFINITY_KEYS, r.affinity)),
+                craving0=get('craving0', r.craving0),
+                cravings=tuple((n, get(f"craving.{n}", d)) for n, d in r.cravings),
+                presets=tuple((f, get(f"preset.{f}", m)) for f, m in r.presets),
+                **{col: get(col, getattr(r, col)) for col in RULE_COLUMNS}))
+        return RuleEngine(tuple(types), fade_rate=float(coeffs.get('fade_rate', self.fade_rate)),
+                          drop_rate=float(coeffs.get('drop_rate', self.drop_rate)))
+
+    def compile(self):
+        # Tablo → tip koduyla indekslenen diziler (bir kez)
+        types = self.types
+        index = {r.name: i for i, r in enumerate(types)}
+        self.orbit_base = [SOURCE_RADIUS + ORBIT_BAND + r.orbit_extra for r in types]
+        self.orbit_r = np.array(self.orbit_base, dtype=np.float64)
+        for name in RULE_COLUMNS:
+            setattr(self, name, np.array([getattr(r, name) for r in types], dtype=np.float64))
+        self.restorative = np.array([r.restorative for r in types], dtype=bool)
+        self.tint = np.array([r.tint for r in types], dtype=np.float64)
+        # istek değişimleri: skaler yol için (sütun, değişim) çiftleri, dizi yolu için (tip, tip) matris
+        self.craving_pairs = [[(index[n], d) for n, d in r.cravings] for r in types]
+        self.craving_delta = np.zeros((len(types), len(types)))
+        for i, pairs in enumerate(self.craving_pairs):
+            for j, d in pairs:
+                self.craving_delta[i, j] += d
+        self.preset_flags = sorted({f for r in types for f, _ in r.presets})
+        self._preset_cache: Dict[tuple, Tuple[np.ndarray, List[float]]] = {}
+
+    def preset_mult(self, globals, as_list: bool = False):
+        # Tip başına preset skor çarpanı; bayrak kombinasyonu başına bir kez hesaplanır
+        key = tuple(globals[f] for f in self.preset_flags)
+        pm = self._preset_cache.get(key)
+        if pm is None:
+            vals = []
+            for r in self.types:
+                m = 1.0
+                for f, k in r.presets:
+                    if globals[f]: m *= k
+                vals.append(m)
+            pm = self._preset_cache[key] = (np.array(vals), vals)
+        return pm[1] if as_list else pm[0]
+
     def build(self, n: int):
-        self.orbit_base = {
-            SOCIAL: SOURCE_RADIUS + ORBIT_BAND + 4,
-            SUBSTANCE: SOURCE_RADIUS + ORBIT_BAND + 8,
-            PORN: SOURCE_RADIUS + ORBIT_BAND + 6,
-            CONSUME: SOURCE_RADIUS + ORBIT_BAND + 10,
-            REAL: SOURCE_RADIUS + ORBIT_BAND + 18,
-        }
-        for i in range(n):
-            self.affinity[(i, SOCIAL)] = clamp(random.gauss(0.25, 0.12), 0.0, 1.0)
-            self.affinity[(i, SUBSTANCE)] = clamp(random.gauss(0.06, 0.06), 0.0, 0.5)
-            self.affinity[(i, PORN)] = clamp(random.gauss(0.14, 0.08), 0.0, 0.7)
-            self.affinity[(i, CONSUME)] = clamp(random.gauss(0.18, 0.10), 0.0, 0.8)
-            self.affinity[(i, REAL)] = clamp(random.gauss(0.20, 0.12), 0.0, 1.0)
+        self.affinity_rows = [[clamp(random.gauss(r.affinity[0], r.affinity[1]), 0.0, r.affinity[2])
+                               for r in self.types] for _ in range(n)]
+        self.affinity = np.array(self.affinity_rows, dtype=np.float64).reshape(n, len(self.types))
 
-RULES = RuleEngine()
+    def build_matrix(self, n: int, rng: np.random.Generator):
+        cols = [np.clip(rng.normal(r.affinity[0], r.affinity[1], size=n), 0.0, r.affinity[2])
+                for r in self.types]
+        self.affinity = np.stack(cols, axis=1)
 
 # --- Veri sınıfları ----------------------------------------------------------
 @dataclass
 class Source:
-    type: str
+    type: int
     pos: pygame.Vector2
     color: Tuple[int, int, int]
     label: str
     pulse: float = 0.0
 
-    def draw(self, surf: pygame.Surface, font_small, real_intensity: float = 0.0):
-        # Glow katmanları
-        self.pulse = (self.pulse + 0.03) % (2*math.pi)
-        pr = SOURCE_RADIUS + 3*math.sin(self.pulse*2)
-        base_col = self.color
+    def draw(self, surf: pygame.Surface, font_small, rules: RuleEngine, real_intensity: float = 0.0):
+        self.draw_glow(surf, real_intensity)
+        self.draw_static(surf, font_small, rules, real_intensity)
+
+    def base_color(self, real_intensity: float = 0.0):
         if self.type == REAL:
             # Gerçek ışık gitgide parlaklaşsın
             t = clamp(0.3 + 0.7*real_intensity, 0.3, 1.0)
-            base_col = mix(self.color, WHITE, 0.4*t)
-        for r, a in ((int(pr)+20, 30), (int(pr)+10, 50), (int(pr), 80)):
-            s = pygame.Surface((r*2, r*2), pygame.SRCALPHA)
-            pygame.draw.circle(s, (*base_col, a), (r, r), r)
-            surf.blit(s, (self.pos.x-r, self.pos.y-r))
-        pygame.draw.circle(surf, base_col, self.pos, SOURCE_RADIUS)
+            return mix(self.color, WHITE, 0.4*t)
+        return self.color
+
+    # at/scale: kamera dönüşümü (ekran konumu, piksel/dünya birimi); verilmezse dünya = ekran
+    def draw_glow(self, surf: pygame.Surface, real_intensity: float = 0.0, at=None, scale: float = 1.0):
+        # Glow katmanları (her kare: nabız animasyonu)
+        self.pulse = (self.pulse + 0.03) % (2*math.pi)
+        x, y = self.pos if at is None else at
+        pr = (SOURCE_RADIUS + 3*math.sin(self.pulse*2)) * scale
+        base_col = self.base_color(real_intensity)
+        for dr, a in GLOW_LAYERS_SOURCE:
+            r = max(1, int(pr + dr*scale))
+            surf.blit(GLOW_CACHE.glow(base_col, r, a), (x-r, y-r))
+        pygame.draw.circle(surf, base_col, (x, y), max(1, int(SOURCE_RADIUS*scale)))
+
+    def draw_static(self, surf: pygame.Surface, font_small, rules: RuleEngine, real_intensity: float = 0.0,
+                    at=None, scale: float = 1.0):
+        base_col = self.base_color(real_intensity)
+        x, y = self.pos if at is None else at
         # Orbit halkası
-        orbit_r = RULES.orbit_base[self.type]
-        pygame.draw.circle(surf, mix(base_col, WHITE, 0.3), self.pos, int(orbit_r), 1)
-        pygame.draw.circle(surf, mix(base_col, WHITE, 0.12), self.pos, int(orbit_r+ORBIT_BW), 1)
-        # Etiket
-        label_surf = font_small.render(self.label, True, WHITE)
-        surf.blit(label_surf, (self.pos.x - label_surf.get_width()/2, self.pos.y - SOURCE_RADIUS - 18))
+        orbit_r = rules.orbit_base[self.type] * scale
+        pygame.draw.circle(surf, mix(base_col, WHITE, 0.3), (x, y), int(orbit_r), 1)
+        pygame.draw.circle(surf, mix(base_col, WHITE, 0.12), (x, y), int(orbit_r+ORBIT_BW*scale), 1)
+        # Etiket (uzaktan okunmaz: küçük ölçekte çizilmez)
+        if scale >= LABEL_MIN_SCALE:
+            label_surf = font_small.render(self.label, True, WHITE)
+            surf.blit(label_surf, (x - label_surf.get_width()/2, y - SOURCE_RADIUS*scale - 18))
 
 @dataclass
 class Agent:
@@ -150,18 +447,16 @@ class Agent:
     willpower: float = 0.35
     health: float = 1.0
     social_ties: float = 0.5
-    cravings: Dict[str, float] = field(default_factory=lambda: {
-        SOCIAL: 0.25, SUBSTANCE: 0.08, PORN: 0.15, CONSUME: 0.20, REAL: 0.10,
-    })
+    cravings: List[float] = field(default_factory=lambda: list(DEFAULT_CRAVINGS))  # tip kodu sırasında
     desens: float = 0.0
     hedonic: float = 0.0
     pending_crash: float = 0.0
-    last_stimulus: Optional[str] = None
+    last_stimulus: int = NO_STIMULUS
     last_contact_timer: float = 0.0
-    selected: bool = False
 
-    # Orbit ve keşif parametreleri
-    target_type: str = REAL
+    # Orbit ve keşif parametreleri; target: hedef kaynağın sources indeksi
+    target: int = 0
+    target_type: int = REAL
     theta: float = field(default_factory=lambda: random.uniform(0, 2*math.pi))
     omega: float = field(default_factory=lambda: random.uniform(0.6, 1.6))  # rad/sn
     orbit_jitter: float = field(default_factory=lambda: random.uniform(-6.0, 6.0))
@@ -171,7 +466,8 @@ class Agent:
     epsilon: float = field(default_factory=lambda: random.uniform(0.08, 0.22))  # keşif olasılığı
     time_since_real: float = 10.0  # gerçek ışıktan uzak kalma süresi (sn)
 
-    def retarget(self, sources: List['Source'], globals):
+    def retarget(self, sources: List['Source'], globals, rules: RuleEngine,
+                 index: Optional['SourceIndex'] = None):
         if self.next_retarget > 0:
             return
         self.next_retarget = random.uniform(0.6, 1.8)  # daha dinamik
@@ -180,36 +476,35 @@ class Agent:
 
         # Keşif (epsilon-greedy + merak)
         if random.random() < self.epsilon*(0.6 + 0.8*self.curiosity):
-            choice = random.choice(sources)
-            self._apply_target(choice)
+            i = random.randrange(len(sources))
+            self._apply_target(sources[i], i)
             return
 
-        # Skor bazlı seçim
+        # Skor bazlı seçim (adaylar: tip başına en yakınlar + keşif örneği);
+        # çarpanlar tip satırından (etkisiz katsayı 0 → çarpan 1)
+        pm = rules.preset_mult(globals, as_list=True)
+        aff = rules.affinity_rows[self.id]
+        cands = range(len(sources)) if index is None else index.candidates_at(self.pos.x, self.pos.y)
         best = None; best_score = -1e9
-        for s in sources:
+        for i in cands:
+            s = sources[i]
+            t = s.type; r = rules.types[t]
             dist = (self.pos - s.pos).length() + 1e-3
             near = 1.0/(0.02*dist + 1.0)
-            aff = RULES.affinity[(self.id, s.type)]
-            crave = self.cravings.get(s.type, 0.0)
-            mult = 1.0
-            if s.type == SOCIAL:
-                if globals['digital_oruc']: mult *= 0.35
-                if globals['bildirim_firtinasi']: mult *= 1.35
-            if s.type == PORN and globals['filtre_acik']: mult *= 0.4
-            if s.type in (SUBSTANCE, PORN, CONSUME): mult *= (1.0 - 0.6*self.willpower)
-            if s.type == REAL:
-                mult *= (1.0 + 0.6*self.willpower + 0.25*self.social_ties)
-                if globals['ramazan']: mult *= 1.3
-            if s.type == PORN: mult *= (1.0 - 0.5*self.desens)
-            if s.type == CONSUME: mult *= (1.0 - 0.5*self.hedonic)
+            mult = pm[t]
+            mult *= (1.0 - r.vice*self.willpower)
+            mult *= (1.0 + r.boost_will*self.willpower + r.boost_ties*self.social_ties)
+            mult *= (1.0 - r.desens_pen*self.desens)
+            mult *= (1.0 - r.hedonic_pen*self.hedonic)
             # aynı hedefte uzun kalmanın verdiği sıkılma
-            mono = 0.85 if self.last_stimulus == s.type else 1.0
-            score = (0.9*near + 1.2*aff + 1.2*crave) * mult * mono
-            if score > best_score: best_score, best = score, s
-        if best:
-            self._apply_target(best)
-
-    def _apply_target(self, s: 'Source'):
+            mono = 0.85 if self.last_stimulus == t else 1.0
+            score = (0.9*near + 1.2*aff[t] + 1.2*self.cravings[t]) * mult * mono
+            if score > best_score: best_score, best = score, i
+        if best is not None:
+            self._apply_target(sources[best], best)
+
+    def _apply_target(self, s: 'Source', i: int):
+        self.target = i
         self.target_type = s.type
         # yeni hedefe geçerken açı ve hız uyarlaması
         self.theta = math.atan2(self.pos.y - s.pos.y, self.pos.x - s.pos.x)
@@ -218,8 +513,9 @@ class Agent:
         self.curiosity *= 0.4
         self.stay_time = 0.0
 
-    def move_orbit(self, src: 'Source', dt: float):
-        r0 = RULES.orbit_base[src.type] + self.orbit_jitter
+    def move_orbit(self, src: 'Source', dt: float, rules: RuleEngine,
+                   bounds: Tuple[float, float] = (WIDTH-300, HEIGHT)):
+        r0 = rules.orbit_base[src.type] + self.orbit_jitter
         self.theta += self.omega * dt
         # küçük kaotik dalga: daha organik halka hareketi
         wob = 4.0 * math.sin(self.theta*0.6 + 0.7*self.id)
@@ -229,10 +525,10 @@ class Agent:
         )
         k = 0.16 if (self.pos - pos_des).length() < 80 else 0.24
         self.pos += (pos_des - self.pos) * k
-        self.pos.x = clamp(self.pos.x, 40, WIDTH-300-40)
-        self.pos.y = clamp(self.pos.y, 40, HEIGHT-40)
+        self.pos.x = clamp(self.pos.x, 40, bounds[0]-40)
+        self.pos.y = clamp(self.pos.y, 40, bounds[1]-40)
 
-    def natural_dynamics(self, dt: float):
+    def natural_dynamics(self, dt: float, rules: RuleEngine):
         # İç ışık bazına doğru sönme
         self.inner_light += (self.base_light - self.inner_light) * (0.8*dt)
         if self.pending_crash > 0:
@@ -241,30 +537,30 @@ class Agent:
             self.inner_light -= pay
         # Gerçek ışıktan uzak kalma → ambient sönüm
         self.time_since_real += dt
-        if self.target_type != REAL and self.time_since_real > 0.6:
-            self.base_light -= 0.18 * dt  # kararma hızı
+        away = not rules.types[self.target_type].restorative
+        if away and self.time_since_real > 0.6:
+            self.base_light -= rules.fade_rate * dt
         self.inner_light = clamp(self.inner_light, 0, 100)
         self.base_light = clamp(self.base_light, 5, 100)
         self.health = clamp(self.health, 0, 1)
         self.social_ties = clamp(self.social_ties, 0, 1)
-        for k in self.cravings:
-            self.cravings[k] = clamp(self.cravings[k], 0, 1.2)
+        self.cravings = [clamp(c, 0, 1.2) for c in self.cravings]
 
         # >>> EKLENDİ: Gerçek Işık hedefi değilse iç ışık zamanla sönsün
-        if self.target_type != REAL:
-            self.inner_light -= 5.0 * dt  # sn başına ~5 puan düşüş
+        if away:
+            self.inner_light -= rules.drop_rate * dt  # sn başına ~5 puan düşüş
         # <<<
 
         self.desens = clamp(self.desens, 0, 1)
         self.hedonic = clamp(self.hedonic, 0, 1)
         self.willpower = clamp(self.willpower, 0, 1)
         if self.last_contact_timer > 0: self.last_contact_timer -= dt
-        else: self.last_stimulus = None
+        else: self.last_stimulus = NO_STIMULUS
         if self.next_retarget > 0: self.next_retarget -= dt
 
-    def contact_if_on_ring(self, src: 'Source', local_density: float, globals):
+    def contact_if_on_ring(self, src: 'Source', local_density: float, globals, rules: RuleEngine):
         dist = (self.pos - src.pos).length()
-        r = RULES.orbit_base[src.type]
+        r = rules.orbit_base[src.type]
         if abs(dist - r) <= ORBIT_BW:
             # >>> EKLENDİ: Etkiyi 0.6 sn’de bir uygula
             if self.last_contact_timer > 0:
@@ -273,168 +569,1260 @@ class Agent:
             self.last_contact_timer = 0.6
             # <<<
             self.last_stimulus = src.type
+            # Etki tip satırından: sıçrama/çöküş, baz ışık kaybı ya da onarımı, istek değişimleri
+            r = rules.types[src.type]
             dens_pen = 1.0 / (1.0 + 1.2*local_density)
-            if src.type == SOCIAL:
-                spike = 2.2; crash = 2.2
-                self.inner_light += spike; self.pending_crash += crash
-                self.cravings[SOCIAL] += 0.03; self.base_light -= 0.18 * dens_pen
-            elif src.type == SUBSTANCE:
-                spike = 9.5; crash = 9.5
-                self.inner_light += spike; self.pending_crash += crash
-                self.health -= 0.12; self.cravings[SUBSTANCE] += 0.07
-                self.willpower -= 0.05; self.base_light -= 0.65 * dens_pen
-            elif src.type == PORN:
-                spike = 5.0; crash = 4.8
-                self.inner_light += spike; self.pending_crash += crash
-                self.desens += 0.05; self.cravings[PORN] += 0.05
-                self.social_ties -= 0.04; self.base_light -= 0.34 * dens_pen
-            elif src.type == CONSUME:
-                spike = 5.6*(1.0-0.5*self.hedonic); crash = 5.2
-                self.inner_light += spike; self.pending_crash += crash
-                self.hedonic += 0.05; self.cravings[CONSUME] += 0.05
-                self.base_light -= 0.28 * dens_pen
-            elif src.type == REAL:
-                saturation = 0.45 + 0.55*(1.0 - self.base_light/100.0)
-                gain = 0.8 * saturation * dens_pen
-                self.base_light += gain; self.inner_light += 0.6 * saturation
-                self.pending_crash = max(0.0, self.pending_crash - 0.9)
-                self.willpower += 0.03; self.social_ties += 0.025; self.health += 0.02
-                self.cravings[SOCIAL] -= 0.011; self.cravings[PORN] -= 0.017
-                self.cravings[CONSUME] -= 0.017; self.cravings[SUBSTANCE] -= 0.02
+            saturation = 0.45 + 0.55*(1.0 - self.base_light/100.0)
+            self.inner_light += r.spike*(1.0 - r.spike_hedonic*self.hedonic) + r.restore_inner*saturation
+            self.pending_crash = max(0.0, self.pending_crash + r.crash - r.crash_relief)
+            self.base_light += (r.restore_gain*saturation - r.base_loss) * dens_pen
+            self.health += r.d_health; self.willpower += r.d_willpower; self.social_ties += r.d_ties
+            self.desens += r.d_desens; self.hedonic += r.d_hedonic
+            for k, d in rules.craving_pairs[src.type]:
+                self.cravings[k] += d
+            if r.restorative:
                 self.time_since_real = 0.0  # aydınlanma → kararma sayacı sıfır
 
     def color(self):
         t = self.inner_light / 100.0
         base = mix(SOFT_GRAY, WHITE, t)
-        if self.last_stimulus == REAL: tint = AMBER
-        elif self.last_stimulus == SOCIAL: tint = NEON_BLUE
-        elif self.last_stimulus == PORN: tint = NEON_PINK
-        elif self.last_stimulus == CONSUME: tint = NEON_PURPLE
-        elif self.last_stimulus == SUBSTANCE: tint = NEON_RED
+        if self.last_stimulus != NO_STIMULUS: tint = SOURCE_RULES[self.last_stimulus].tint
         else: tint = mix(base, HEALTH_GREEN, 0.15*(1.0 - self.health))
         return mix(base, tint, 0.55)
 
-    def draw(self, surf: pygame.Surface):
-        c = self.color()
-        for r, a in ((AGENT_RADIUS+7, 30), (AGENT_RADIUS+3, 60)):
-            glow = (*c[:3], a)
-            s = pygame.Surface((r*2, r*2), pygame.SRCALPHA)
-            pygame.draw.circle(s, glow, (r, r), r)
-            surf.blit(s, (self.pos.x-r, self.pos.y-r))
-        pygame.draw.circle(surf, c, (int(self.pos.x), int(self.pos.y)), AGENT_RADIUS)
-        if self.selected:
-            pygame.draw.circle(surf, GOLD, (int(self.pos.x), int(self.pos.y)), AGENT_RADIUS+2, 1)
-
-# --- Başlat ------------------------------------------------------------------
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption(TITLE)
-clock = pygame.time.Clock()
-
-font = pygame.font.SysFont("Verdana", 18)
-font_small = pygame.font.SysFont("Verdana", 14)
+def draw_agents(surf: pygame.Surface, pos: np.ndarray, colors: np.ndarray, cache: GlowCache = GLOW_CACHE):
+    # Tüm ajanlar: renk anahtarı başına bir sprite, mümkünse tek Surface.blits çağrısı
+    if not len(pos):
+        return
+    q = cache.quantize_arr(np.asarray(colors))
+    keys, inv = np.unique((q[:, 0] << 16) | (q[:, 1] << 8) | q[:, 2], return_inverse=True)
+    sprites = [cache.agent_sprite(((k >> 16) & 255, (k >> 8) & 255, k & 255)) for k in keys.tolist()]
+    R = GLOW_LAYERS_AGENT[0][0]
+    xy = (np.asarray(pos) - R).astype(np.int64).tolist()
+    seq = [(sprites[i], p) for i, p in zip(inv.ravel().tolist(), xy)]
+    if hasattr(surf, 'blits'):
+        surf.blits(seq, doreturn=False)
+    else:
+        for spr, p in seq: surf.blit(spr, p)
 
 # --- Kaynaklar ---------------------------------------------------------------
-margin = 90
-cx = (WIDTH-300)//2
-cy = HEIGHT//2
-sources: List[Source] = [
-    Source(SOCIAL, pygame.Vector2(margin, margin), NEON_BLUE, "Sosyal Medya"),
-    Source(SUBSTANCE, pygame.Vector2(WIDTH-300-margin, margin), NEON_RED, "Alkol/Uyuşturucu"),
-    Source(PORN, pygame.Vector2(margin, HEIGHT-margin), NEON_PINK, "Pornografi"),
-    Source(CONSUME, pygame.Vector2(WIDTH-300-margin, HEIGHT-margin), NEON_PURPLE, "Tüketim/Şöhret"),
-    Source(REAL, pygame.Vector2(cx, cy), AMBER, "Gerçek Işık"),
-]
-
-# --- Ajan/İlişki önhazırlığı -------------------------------------------------
-RULES.build(AGENT_COUNT)
-
-agents: List[Agent] = []
-for i in range(AGENT_COUNT):
-    x = random.uniform(60, WIDTH-300-60)
-    y = random.uniform(60, HEIGHT-60)
-    a = Agent(i, pygame.Vector2(x, y), pygame.Vector2(0, 0))
-    a.willpower = clamp(random.gauss(0.4, 0.18), 0, 1)
-    a.social_ties = clamp(random.gauss(0.55, 0.2), 0, 1)
-    a.base_light = clamp(random.gauss(52, 10), 0, 100)
-    a.inner_light = clamp(a.base_light + random.uniform(-5, 5), 0, 100)
-    a.target_type = random.choice(ALL_TYPES)  # başta tüm alana yayılma
-    agents.append(a)
+def rule_source(t: int, x: float, y: float) -> Source:
+    r = SOURCE_RULES[t]
+    return Source(t, pygame.Vector2(x, y), r.tint, r.label or r.name)
+
+def build_sources() -> List[Source]:
+    margin = 90
+    cx = (WIDTH-300)//2
+    cy = HEIGHT//2
+    out = [
+        rule_source(SOCIAL, margin, margin),
+        rule_source(SUBSTANCE, WIDTH-300-margin, margin),
+        rule_source(PORN, margin, HEIGHT-margin),
+        rule_source(CONSUME, WIDTH-300-margin, HEIGHT-margin),
+        rule_source(REAL, cx, cy),
+    ]
+    # Tabloya sonradan eklenen tipler: merkez çevresinde bir halkaya eşit aralıkla
+    extra = [t for t in ALL_TYPES if t not in (SOCIAL, SUBSTANCE, PORN, CONSUME, REAL)]
+    rad = min(cx, cy) * 0.6
+    for k, t in enumerate(extra):
+        a = math.tau * (k + 0.5) / len(extra)
+        out.append(rule_source(t, cx + rad*math.cos(a), cy + rad*math.sin(a)))
+    return out
+
+def build_world_sources(width: float, height: float, per_type: int, seed: int = 0) -> List[Source]:
+    # Büyük dünya: her tipten per_type kaynak, titreşimli ızgara hücrelerine
+    # karışık dağıtılır (kaynaklar birbirine hücre boyunun ~%40'ından yakın olmaz).
+    # Renk ve etiket kural tablosundan; global random akışına dokunmaz.
+    rnd = random.Random(seed)
+    types = [t for t in ALL_TYPES for _ in range(per_type)]
+    cols = max(1, math.ceil(math.sqrt(len(types) * width / height)))
+    rows = math.ceil(len(types) / cols)
+    cells = [(i, j) for j in range(rows) for i in range(cols)]
+    rnd.shuffle(cells)
+    cw, ch = width / cols, height / rows
+    out = []
+    for t, (i, j) in zip(types, cells):
+        x = clamp((i + 0.5 + rnd.uniform(-0.3, 0.3)) * cw, 90, width-90)
+        y = clamp((j + 0.5 + rnd.uniform(-0.3, 0.3)) * ch, 90, height-90)
+        out.append(rule_source(t, x, y))
+    return out
+
+def world_sources(world_size: Optional[Tuple[float, float]], sources_per_type: int,
+                  map_seed: int = 0) -> Tuple[Tuple[float, float], List[Source]]:
+    # Varsayılan: oyun alanı boyutunda dünya ve beş standart kaynak.
+    # Harita ajan tohumundan bağımsız (map_seed): aynı harita, farklı tohumlar
+    if world_size is None and sources_per_type == 1:
+        return (WIDTH-300, HEIGHT), build_sources()
+    size = world_size or (WIDTH-300, HEIGHT)
+    return size, build_world_sources(size[0], size[1], sources_per_type, map_seed)
+
+# --- Tipe bölünmüş kaynak indeksi --------------------------------------------
+# Hedef seçimi tüm kaynakları değil, her tipten en yakın k adayı (+ birkaç
+# rastgele keşif adayı) puanlar. Her tipin kendi uniform grid'i var (hücre
+# başına ~k/4 kaynak); kaynaklar sabit olduğundan her hücrenin merkezine en
+# yakın 3k kaynak kurulumda bir kez hesaplanır. Sorgu: ajanın hücresindeki
+# listeden gerçek mesafeye göre en yakın k (yaklaşık k-en-yakın, sabit maliyet).
+# En çok k kaynağı olan tip gridsiz: tüm kaynakları her zaman aday. Az kaynaklı
+# dünyalarda (varsayılan beş kaynak dahil) aday kümesi = tüm kaynaklar.
+SOURCE_K = 4                  # tip başına en yakın aday sayısı
+SOURCE_SAMPLE = 2             # ek rastgele aday (uzaktaki kaynaklar da görülsün)
+
+class SourceIndex:
+    def __init__(self, sources: List['Source'], world_size: Tuple[float, float], k: int = SOURCE_K):
+        self.k = k
+        self.n = len(sources)
+        self.pos = np.array([[s.pos.x, s.pos.y] for s in sources], dtype=np.float64).reshape(-1, 2)
+        self.type = np.array([s.type for s in sources], dtype=np.int64)
+        W, H = world_size
+        # tip başına (hücre, nx, ny, hücre × aday tablosu; -1 boş) ya da (None, 0, 0, üyeler)
+        self.parts = []
+        for t in ALL_TYPES:
+            members = np.flatnonzero(self.type == t)
+            if not len(members):
+                continue
+            if len(members) <= 3*k:
+                self.parts.append((None, 0, 0, members))
+                continue
+            cell = math.sqrt(W*H*k / (4*len(members)))
+            nx, ny = max(1, int(math.ceil(W / cell))), max(1, int(math.ceil(H / cell)))
+            cy, cx = np.divmod(np.arange(nx*ny), nx)
+            centers = np.column_stack([(cx + 0.5)*cell, (cy + 0.5)*cell])
+            table = np.empty((nx*ny, 3*k), dtype=np.int64)
+            for lo in range(0, nx*ny, 4096):  # (hücre × üye) mesafe matrisi parça parça
+                d = centers[lo:lo+4096, None, :] - self.pos[members][None, :, :]
+                near = np.argpartition(d[..., 0]**2 + d[..., 1]**2, 3*k-1, axis=1)[:, :3*k]
+                table[lo:lo+4096] = members[near]
+            self.parts.append((cell, nx, ny, table))
+        # gridli tipler sorguda 3k sütun tarar; kaynak sayısını aşıyorsa hepsini puanlamak ucuz
+        width = sum(len(p[3]) if p[0] is None else 3*k for p in self.parts)
+        self.full = all(p[0] is None for p in self.parts) or width >= self.n
+        self.all = np.arange(self.n)
+
+    def candidates(self, pts: np.ndarray, sample: Optional[np.ndarray] = None) -> np.ndarray:
+        # (m, C) aday kaynak indeksleri; full: tüm kaynaklar, sources sırasında.
+        # sample: (m, SOURCE_SAMPLE) rastgele kaynak indeksleri (full değilse eklenir)
+        m = len(pts)
+        if self.full:
+            return np.broadcast_to(self.all, (m, self.n))
+        out = [] if sample is None else [sample]
+        for cell, nx, ny, table in self.parts:
+            if cell is None:
+                out.append(np.broadcast_to(table, (m, len(table))))
+                continue
+            cx = np.clip((pts[:, 0] // cell).astype(np.int64), 0, nx-1)
+            cy = np.clip((pts[:, 1] // cell).astype(np.int64), 0, ny-1)
+            cand = table[cy*nx + cx]
+            dx = self.pos[cand, 0] - pts[:, 0, None]
+            dy = self.pos[cand, 1] - pts[:, 1, None]
+            keep = np.argpartition(dx*dx + dy*dy, self.k-1, axis=1)[:, :self.k]
+            out.append(np.take_along_axis(cand, keep, axis=1))
+        return np.concatenate(out, axis=1)
+
+    def candidates_at(self, x: float, y: float) -> List[int]:
+        # Tek ajan (nesne modu) için adaylar; keşif örneği global random'dan
+        if self.full:
+            return self.all.tolist()
+        sample = np.array([[random.randrange(self.n) for _ in range(SOURCE_SAMPLE)]])
+        return self.candidates(np.array([[x, y]]), sample)[0].tolist()
 
 # --- Global durum / presetler ------------------------------------------------
-globals_state = {
-    'bildirim_firtinasi': False,
-    'digital_oruc': False,
-    'ramazan': False,
-    'destek_grubu': False,
-    'filtre_acik': False,
-    'paused': False,
+# Tuş → globals_state bayrağı ve bildirimdeki kısa ad
+PRESET_FLAGS = {
+    pygame.K_b: 'bildirim_firtinasi',
+    pygame.K_o: 'digital_oruc',
+    pygame.K_r: 'ramazan',
+    pygame.K_g: 'destek_grubu',
+    pygame.K_f: 'filtre_acik',
+}
+PRESET_SHORT = {
+    'bildirim_firtinasi': 'Bildirim',
+    'digital_oruc': 'Oruç',
+    'ramazan': 'Ramazan',
+    'destek_grubu': 'Destek',
+    'filtre_acik': 'Filtre',
 }
 
-notifications: List[Tuple[str, float]] = []
-real_intensity = 0.0  # Gerçek Işık küresel parlaklık katsayısı (0..1)
-
-# --- UI yardımcıları ---------------------------------------------------------
-def push_note(msg: str, sec: float = 2.5):
-    notifications.append((msg, sec))
+def default_globals() -> Dict[str, bool]:
+    return {
+        'bildirim_firtinasi': False,
+        'digital_oruc': False,
+        'ramazan': False,
+        'destek_grubu': False,
+        'filtre_acik': False,
+        'paused': False,
+    }
+
+# --- Faz profilleyici --------------------------------------------------------
+# Ana döngünün her fazı (retarget, yoğunluk, temas, glow, panel ...) monotonik
+# sayaçla ölçülür; kapalıyken phase() paylaşılan bir nullcontext döndürür.
+# Açıkken son `window` örnek fazlara göre tutulur ve olaylar Chrome/Perfetto
+# trace biçiminde (traceEvents) dışa aktarılabilir.
+TRACE_THREADS = {0: "Simülasyon", 1: "Çizim"}
+_NO_PHASE = nullcontext()
+
+class _Phase:
+    __slots__ = ('prof', 'name', 'tid', 't0')
+    def __init__(self, prof: 'PhaseProfiler', name: str, tid: int):
+        self.prof, self.name, self.tid = prof, name, tid
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+    def __exit__(self, *exc):
+        self.prof.add(self.name, self.t0, time.perf_counter(), self.tid)
+
+class PhaseProfiler:
+    def __init__(self, window: int = 120, max_events: int = 200_000):
+        self.enabled = False
+        self.pinned = False           # başka tüketici (ör. live.py) ölçüm istiyor: P tuşu kapatmaz
+        self.window = window
+        self.phases: Dict[str, deque] = {}
+        self.frames: deque = deque(maxlen=window)
+        self.events: deque = deque(maxlen=max_events)
+        self.origin = time.perf_counter()
+
+    def phase(self, name: str, tid: int = 0):
+        if not self.enabled:
+            return _NO_PHASE
+        return _Phase(self, name, tid)
+
+    def add(self, name: str, t0: float, t1: float, tid: int = 0):
+        q = self.phases.get(name)
+        if q is None:
+            q = self.phases[name] = deque(maxlen=self.window)
+        q.append(t1 - t0)
+        self.events.append((name, tid, t0, t1))
+
+    def frame(self, t0: float, t1: float):
+        if self.enabled:
+            self.frames.append(t1 - t0)
+            self.events.append(("kare", 1, t0, t1))
+
+    def averages_ms(self) -> Dict[str, float]:
+        # list(): sim iş parçacığı aynı anda yeni faz ekleyebilir
+        return {k: 1000.0 * sum(q) / len(q) for k, q in list(self.phases.items()) if q}
+
+    def reset(self):
+        self.phases.clear(); self.frames.clear(); self.events.clear()
+
+    def export_trace(self, path: str):
+        # chrome://tracing ve Perfetto'nun açtığı Trace Event biçimi (mikrosaniye)
+        ev = [{"name": "thread_name", "ph": "M", "pid": 0, "tid": tid, "args": {"name": name}}
+              for tid, name in TRACE_THREADS.items()]
+        for name, tid, t0, t1 in list(self.events):
+            ev.append({"name": name, "ph": "X", "pid": 0, "tid": tid,
+                       "ts": (t0 - self.origin) * 1e6, "dur": (t1 - t0) * 1e6})
+        with open(path, 'w') as fh:
+            json.dump({"traceEvents": ev, "displayTimeUnit": "ms"}, fh)
+
+# --- Zamanlayıcı (takvim kuyruğu) --------------------------------------------
+# Mutlak sim zamanına göre kovalar: her kova o dilime düşen ajan indeks dizileri.
+# pop(now) yalnızca vadesi gelmiş kovalara bakar; tik başına iş vadesi gelenlerle orantılı.
+class TimerWheel:
+    def __init__(self, slot: float = 1.0/FPS):
+        self.slot = slot
+        self.buckets: Dict[int, List[np.ndarray]] = {}
+        self.next_slot = 0
+
+    def schedule(self, idx: np.ndarray, at: np.ndarray):
+        if not len(idx):
+            return
+        slots = np.maximum((at // self.slot).astype(np.int64), self.next_slot)
+        if len(idx) == 1 or slots.min() == slots.max():
+            self.buckets.setdefault(int(slots[0]), []).append(idx)
+            return
+        order = np.argsort(slots)
+        slots, idx = slots[order], idx[order]
+        cuts = np.flatnonzero(np.diff(slots)) + 1
+        for k, part in zip(slots[np.r_[0, cuts]].tolist(), np.split(idx, cuts)):
+            self.buckets.setdefault(k, []).append(part)
+
+    def pop(self, now: float, at: np.ndarray) -> np.ndarray:
+        # at: ajan başına güncel vade dizisi; eskimiş kayıtlar (vade değişmiş) atılır
+        cur = int(now // self.slot)
+        parts = []
+        for k in range(self.next_slot, cur+1):
+            parts.extend(self.buckets.pop(k, ()))
+        self.next_slot = cur
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+        idx = np.unique(np.concatenate(parts))
+        t = at[idx]
+        due = t <= now
+        # bu dilimde ama henüz vadesi gelmemiş olanlar kovaya geri
+        later = idx[~due & ((t // self.slot).astype(np.int64) == cur)]
+        self.schedule(later, at[later])
+        return idx[due]
+
+    def clear(self):
+        self.buckets.clear()
+        self.next_slot = 0
+
+# --- Dizi tabanlı popülasyon (NumPy, structure-of-arrays) ---------------------
+# Agent'ın tüm alanları tek tek diziler halinde; her tik çekirdeği tüm
+# popülasyona tek seferde uygulanır. Davranış Agent metodlarıyla birebir aynı.
+# Geri sayım sayaçları yerine mutlak vadeler (retarget_at, contact_until) ve
+# TimerWheel: yalnızca vadesi gelen ajanlar uyandırılır.
+class Population:
+    # Ajan başına durum dizileri (ilk eksen ajan)
+    STATE = ('pos', 'willpower', 'social_ties', 'base_light', 'inner_light', 'health', 'cravings',
+             'desens', 'hedonic', 'pending_crash', 'last_stimulus', 'contact_until', 'target',
+             'theta', 'omega', 'orbit_jitter', 'retarget_at', 'stay_time', 'curiosity', 'epsilon',
+             'time_since_real', 'ids', 'affinity')
+
+    def __init__(self, n: int, sources: List[Source], rules: RuleEngine, rng: np.random.Generator,
+                 bounds: Tuple[float, float] = (WIDTH-300, HEIGHT), index: Optional[SourceIndex] = None):
+        self.n = n
+        self.bounds = bounds
+        self.rng = rng
+        self.sources = sources
+        self.rules = rules
+        self.index = index or SourceIndex(sources, bounds)
+        self.src_pos = np.array([[s.pos.x, s.pos.y] for s in sources], dtype=np.float64)
+        self.src_type = np.array([s.type for s in sources], dtype=np.int64)
+        self.orbit_r = rules.orbit_r
+        self.affinity = rules.affinity
+
+        self.ids = np.arange(n, dtype=np.float64)
+        self.pos = np.column_stack([rng.uniform(60, bounds[0]-60, n), rng.uniform(60, bounds[1]-60, n)])
+        self.willpower = np.clip(rng.normal(0.4, 0.18, n), 0, 1)
+        self.social_ties = np.clip(rng.normal(0.55, 0.2, n), 0, 1)
+        self.base_light = np.clip(rng.normal(52, 10, n), 0, 100)
+        self.inner_light = np.clip(self.base_light + rng.uniform(-5, 5, n), 0, 100)
+        self.health = np.ones(n)
+        self.cravings = np.tile(np.array([r.craving0 for r in rules.types]), (n, 1))
+        self.desens = np.zeros(n)
+        self.hedonic = np.zeros(n)
+        self.pending_crash = np.zeros(n)
+        self.last_stimulus = np.full(n, NO_STIMULUS, dtype=np.int64)
+        self.contact_until = np.zeros(n)
+
+        # Orbit ve keşif; hedef doğrudan kaynak indeksi (başta tüm alana yayılma)
+        self.target = rng.integers(0, len(sources), n)
+        self.theta = rng.uniform(0, 2*math.pi, n)
+        self.omega = rng.uniform(0.6, 1.6, n)
+        self.orbit_jitter = rng.uniform(-6.0, 6.0, n)
+        self.retarget_at = np.zeros(n)
+        self.stay_time = np.zeros(n)
+        self.curiosity = np.zeros(n)
+        self.epsilon = rng.uniform(0.08, 0.22, n)
+        self.time_since_real = np.full(n, 10.0)
+
+        self.retarget_q = TimerWheel()
+        self.contact_q = TimerWheel()
+        self.rebuild_schedule(0.0)
+
+    def rebuild_schedule(self, now: float):
+        # Kuyrukları vade dizilerinden yeniden kur (başlangıç / geri yükleme)
+        self.retarget_q.clear(); self.contact_q.clear()
+        self.retarget_q.next_slot = self.contact_q.next_slot = int(now // self.retarget_q.slot)
+        ids = np.arange(self.n)
+        self.retarget_q.schedule(ids, np.maximum(self.retarget_at, now))
+        # etiketi henüz silinmemiş her temas bekliyor (vadesi now'a denk gelse de)
+        pending = ids[self.last_stimulus != NO_STIMULUS]
+        self.contact_q.schedule(pending, np.maximum(self.contact_until[pending], now))
+
+    @property
+    def target_type(self) -> np.ndarray:
+        return self.src_type[self.target]
+
+    # --- Çekirdekler ---------------------------------------------------------
+    def retarget(self, globals, now: float):
+        # Süresi dolan tüm ajanlar tek geçişte: ajan × kaynak skor matrisi + argmax
+        due = self.retarget_q.pop(now, self.retarget_at)
+        m = len(due)
+        if not m:
+            return
+        nr = self._uniform(due, 0.6, 1.8)
+        self.retarget_at[due] = now + nr
+        self.retarget_q.schedule(due, self.retarget_at[due])
+        self.stay_time[due] += nr
+        cur = np.clip(self.curiosity[due] + 0.12*nr, 0, 1)
+        self.curiosity[due] = cur
+
+        # Keşif (epsilon-greedy + merak) maskesi; kalanlar skorla seçer
+        explore = self._random(due) < self.epsilon[due]*(0.6 + 0.8*cur)
+        choice = np.empty(m, dtype=np.int64)
+        choice[explore] = self._integers(due[explore], len(self.sources))
+        greedy = ~explore
+        if greedy.any():
+            g = due[greedy]
+            sample = None
+            if not self.index.full:
+                sample = np.column_stack([self._integers(g, len(self.sources)) for _ in range(SOURCE_SAMPLE)])
+            cand = self.index.candidates(self.pos[g], sample)
+            best = self.score_matrix(g, globals, cand).argmax(axis=1)
+            choice[greedy] = cand[np.arange(len(g)), best]
+
+        self.target[due] = choice
+        d = self.pos[due] - self.src_pos[choice]
+        self.theta[due] = np.arctan2(d[:, 1], d[:, 0])
+        self.omega[due] = self._uniform(due, 0.7, 1.4) * np.where(self._random(due) < 0.5, 1.0, -1.0)
+        self.curiosity[due] *= 0.4
+        self.stay_time[due] = 0.0
+
+    def score_matrix(self, idx: np.ndarray, globals, cand: np.ndarray) -> np.ndarray:
+        # (len(idx), aday) skorları: yakınlık + afinite + istek, preset/irade çarpanları, monotonluk.
+        # cand: ajan başına aday kaynak indeksleri (SourceIndex.candidates)
+        st = self.src_type[cand]
+        d = self.pos[idx, None, :] - self.src_pos[cand]
+        dist = np.hypot(d[..., 0], d[..., 1]) + 1e-3
+        near = 1.0/(0.02*dist + 1.0)
+        aff = np.take_along_axis(self.affinity[idx], st, axis=1)
+        crave = np.take_along_axis(self.cravings[idx], st, axis=1)
+
+        # Çarpanlar: tip katsayıları kaynak sütunlarına toplanır (etkisiz katsayı 0 → çarpan 1)
+        R = self.rules
+        w = self.willpower[idx][:, None]
+        mult = self._preset_mult(idx, globals, st) * (1.0 - R.vice[st]*w)
+        mult *= 1.0 + R.boost_will[st]*w + R.boost_ties[st]*self.social_ties[idx][:, None]
+        mult *= 1.0 - R.desens_pen[st]*self.desens[idx][:, None]
+        mult *= 1.0 - R.hedonic_pen[st]*self.hedonic[idx][:, None]
+        # aynı hedefte uzun kalmanın verdiği sıkılma
+        mono = np.where(self.last_stimulus[idx][:, None] == st, 0.85, 1.0)
+        return (0.9*near + 1.2*aff + 1.2*crave) * mult * mono
+
+    # Rastgele çekimler ve preset çarpanı: Ensemble bunları dünya başına böler
+    def _uniform(self, idx: np.ndarray, lo: float, hi: float) -> np.ndarray:
+        return self.rng.uniform(lo, hi, len(idx))
+
+    def _random(self, idx: np.ndarray) -> np.ndarray:
+        return self.rng.random(len(idx))
+
+    def _integers(self, idx: np.ndarray, hi: int) -> np.ndarray:
+        return self.rng.integers(0, hi, len(idx))
+
+    def _preset_mult(self, idx: np.ndarray, globals, st: np.ndarray) -> np.ndarray:
+        return self.rules.preset_mult(globals)[st]
+
+    def move_orbit(self, dt: float):
+        src = self.src_pos[self.target]
+        r0 = self.orbit_r[self.target_type] + self.orbit_jitter
+        self.theta += self.omega * dt
+        wob = 4.0 * np.sin(self.theta*0.6 + 0.7*self.ids)
+        rr = r0 + wob
+        pos_des = src + np.column_stack([np.cos(self.theta)*rr, np.sin(self.theta)*rr])
+        delta = pos_des - self.pos
+        k = np.where(np.hypot(delta[:, 0], delta[:, 1]) < 80, 0.16, 0.24)
+        self.pos += delta * k[:, None]
+        np.clip(self.pos[:, 0], 40, self.bounds[0]-40, out=self.pos[:, 0])
+        np.clip(self.pos[:, 1], 40, self.bounds[1]-40, out=self.pos[:, 1])
+
+    def on_ring(self) -> np.ndarray:
+        d = self.pos - self.src_pos[self.target]
+        return np.abs(np.hypot(d[:, 0], d[:, 1]) - self.orbit_r[self.target_type]) <= ORBIT_BW
+
+    def contact(self, ring: np.ndarray, local_density: np.ndarray, now: float):
+        ttype = self.target_type
+        # Etkiyi 0.6 sn'de bir uygula; bekleyenlerde sadece etiket güncel kalsın
+        self.last_stimulus[ring] = ttype[ring]
+        hit = ring & (self.contact_until <= now)
+        hit_idx = np.flatnonzero(hit)
+        self.contact_until[hit_idx] = now + 0.6
+        self.contact_q.schedule(hit_idx, self.contact_until[hit_idx])
+        # Temas eden ajanlar tek gather ile: katsayılar hedef tipinin satırından
+        R, tt = self.rules, ttype[hit_idx]
+        dens_pen = 1.0 / (1.0 + 1.2*local_density[hit_idx])
+        saturation = 0.45 + 0.55*(1.0 - self.base_light[hit_idx]/100.0)
+        self.inner_light[hit_idx] += (R.spike[tt]*(1.0 - R.spike_hedonic[tt]*self.hedonic[hit_idx])
+                                      + R.restore_inner[tt]*saturation)
+        self.pending_crash[hit_idx] = np.maximum(0.0, self.pending_crash[hit_idx] + R.crash[tt] - R.crash_relief[tt])
+        self.base_light[hit_idx] += (R.restore_gain[tt]*saturation - R.base_loss[tt]) * dens_pen
+        self.health[hit_idx] += R.d_health[tt]
+        self.willpower[hit_idx] += R.d_willpower[tt]
+        self.social_ties[hit_idx] += R.d_ties[tt]
+        self.desens[hit_idx] += R.d_desens[tt]
+        self.hedonic[hit_idx] += R.d_hedonic[tt]
+        self.cravings[hit_idx] += R.craving_delta[tt]
+        self.time_since_real[hit_idx[R.restorative[tt]]] = 0.0
+
+    def natural_dynamics(self, dt: float, now: float):
+        # İç ışık bazına doğru sönme + bekleyen çöküşün ödenmesi
+        self.inner_light += (self.base_light - self.inner_light) * (0.8*dt)
+        pay = np.minimum(self.pending_crash, 0.25)
+        self.pending_crash -= pay
+        self.inner_light -= pay
+        # Gerçek ışıktan uzak kalma → ambient sönüm
+        self.time_since_real += dt
+        away = ~self.rules.restorative[self.target_type]
+        self.base_light[away & (self.time_since_real > 0.6)] -= self.rules.fade_rate * dt
+        np.clip(self.inner_light, 0, 100, out=self.inner_light)
+        np.clip(self.base_light, 5, 100, out=self.base_light)
+        np.clip(self.health, 0, 1, out=self.health)
+        np.clip(self.social_ties, 0, 1, out=self.social_ties)
+        np.clip(self.cravings, 0, 1.2, out=self.cravings)
+        self.inner_light[away] -= self.rules.drop_rate * dt
+        np.clip(self.desens, 0, 1, out=self.desens)
+        np.clip(self.hedonic, 0, 1, out=self.hedonic)
+        np.clip(self.willpower, 0, 1, out=self.willpower)
+        # temas bekleme süresi dolanlar: son uyarı etiketi silinir
+        self.last_stimulus[self.contact_q.pop(now, self.contact_until)] = NO_STIMULUS
+
+    # --- Çizim / inceleme ----------------------------------------------------
+    def colors(self) -> np.ndarray:
+        base = mix_arr(SOFT_GRAY, WHITE, self.inner_light / 100.0)
+        tint = mix_arr(base, HEALTH_GREEN, 0.15*(1.0 - self.health))
+        stim = self.last_stimulus >= 0
+        tint[stim] = self.rules.tint[self.last_stimulus[stim]]
+        return mix_arr(base, tint, np.full(self.n, 0.55))
+
+    def agent_view(self, i: int) -> Agent:
+        # Bilgi kutusu için i. ajanın Agent kopyası
+        a = Agent(i, pygame.Vector2(*self.pos[i]), pygame.Vector2(0, 0))
+        for name in ('inner_light', 'base_light', 'willpower', 'health', 'social_ties',
+                     'desens', 'hedonic', 'epsilon'):
+            setattr(a, name, float(getattr(self, name)[i]))
+        a.target = int(self.target[i])
+        a.target_type = int(self.target_type[i])
+        a.last_stimulus = int(self.last_stimulus[i])
+        return a
+
+# --- Ensemble popülasyonu -----------------------------------------------------
+# K bağımsız dünyanın Population dizileri ilk eksende art arda (dünya k:
+# [k*n, (k+1)*n)). Çekirdekler aynı; yalnızca rastgele çekimler dünya başına
+# kendi akışından ve preset çarpanları dünyanın bayraklarından gelir.
+# Vadesi gelen indeksler sıralı olduğundan dünya blokları ardışıktır.
+class EnsemblePopulation(Population):
+    def __init__(self, worlds: List[Population]):
+        base = worlds[0]
+        self.k = len(worlds)
+        self.n_world = base.n
+        self.n = self.k * base.n
+        self.sources, self.rules, self.bounds, self.index = base.sources, base.rules, base.bounds, base.index
+        self.src_pos, self.src_type, self.orbit_r = base.src_pos, base.src_type, base.orbit_r
+        for name in Population.STATE:
+            setattr(self, name, np.concatenate([getattr(w, name) for w in worlds]))
+        self.rngs = [w.rng for w in worlds]
+        self.rng = self.rngs[0]
+        self.world = np.repeat(np.arange(self.k), base.n)
+        self.retarget_q = TimerWheel()
+        self.contact_q = TimerWheel()
+        self.rebuild_schedule(0.0)
+
+    def _per_world(self, idx: np.ndarray, draw) -> np.ndarray:
+        counts = np.bincount(self.world[idx], minlength=self.k).tolist()
+        parts = [draw(rng, c) for rng, c in zip(self.rngs, counts) if c]
+        return np.concatenate(parts) if parts else np.zeros(0)
+
+    def _uniform(self, idx: np.ndarray, lo: float, hi: float) -> np.ndarray:
+        return self._per_world(idx, lambda rng, c: rng.uniform(lo, hi, c))
+
+    def _random(self, idx: np.ndarray) -> np.ndarray:
+        return self._per_world(idx, lambda rng, c: rng.random(c))
+
+    def _integers(self, idx: np.ndarray, hi: int) -> np.ndarray:
+        return self._per_world(idx, lambda rng, c: rng.integers(0, hi, c)).astype(np.int64)
+
+    def _preset_mult(self, idx: np.ndarray, globals, st: np.ndarray) -> np.ndarray:
+        # globals: dünya başına bayrak sözlükleri
+        pm = np.stack([self.rules.preset_mult(g) for g in globals])
+        return pm[self.world[idx][:, None], st]
+
+# --- Simülasyon çekirdeği (ekran gerektirmez) ---------------------------------
+# Pencereden bağımsız durum: ajanlar, kaynaklar, kurallar, presetler.
+# step(dt) bir tik ilerletir, run(n) saat beklemeden n tik koşturur;
+# pygame penceresi (Viewer) bunun üzerine isteğe bağlı bir görüntüleyicidir.
+# vectorized=True: ajanlar Agent listesi yerine Population dizilerinde tutulur.
+# Büyük dünya: world_size=(genişlik, yükseklik) ve tip başına sources_per_type
+# kaynak; hedef seçimi SourceIndex adaylarıyla, ajanlar kaynak indeksini tutar.
+class Simulation:
+    # agent_columns() sütunları: Agent alan adı = Population dizi adı
+    COLUMNS = ('inner_light', 'base_light', 'health', 'social_ties', 'desens', 'hedonic')
+
+    def __init__(self, agent_count: int = AGENT_COUNT, seed: Optional[int] = None,
+                 vectorized: bool = False, neighborhood_density: bool = False,
+                 profiler: Optional[PhaseProfiler] = None,
+                 world_size: Optional[Tuple[float, float]] = None, sources_per_type: int = 1,
+                 coefficients: Optional[Dict[str, float]] = None, map_seed: int = 0):
+        if seed is not None:
+            random.seed(seed)
+        # Kurucu argümanları: kontrol noktasından aynı dünyayı yeniden kurmak için
+        self.config = dict(agent_count=agent_count, seed=seed, vectorized=vectorized,
+                           neighborhood_density=neighborhood_density, world_size=world_size,
+                           sources_per_type=sources_per_type, map_seed=map_seed,
+                           coefficients=dict(coefficients) if coefficients else None)
+        self.vectorized = vectorized
+        self._init_core(agent_count, neighborhood_density, profiler, world_size, sources_per_type,
+                        coefficients, map_seed)
+        if vectorized:
+            self.pop = self._world_population(seed)
+        else:
+            self.rules.build(agent_count)
+        W, H = self.world_size
+        craving0 = [r.craving0 for r in self.rules.types]
+        for i in range(0 if vectorized else agent_count):
+            x = random.uniform(60, W-60)
+            y = random.uniform(60, H-60)
+            a = Agent(i, pygame.Vector2(x, y), pygame.Vector2(0, 0), cravings=list(craving0))
+            a.willpower = clamp(random.gauss(0.4, 0.18), 0, 1)
+            a.social_ties = clamp(random.gauss(0.55, 0.2), 0, 1)
+            a.base_light = clamp(random.gauss(52, 10), 0, 100)
+            a.inner_light = clamp(a.base_light + random.uniform(-5, 5), 0, 100)
+            a.target = random.randrange(len(self.sources))  # başta tüm alana yayılma
+            a.target_type = self.sources[a.target].type
+            self.agents.append(a)
+        self.globals_state = default_globals()
+        self.real_intensity = 0.0  # Gerçek Işık küresel parlaklık katsayısı (0..1)
+        # Son tikte kaynak başına ring üzerindeki ajan sayısı (sources sırasında)
+        self.ring_occupancy = np.zeros(len(self.sources), dtype=np.int64)
+
+    def _init_core(self, agent_count: int, neighborhood_density: bool, profiler: Optional[PhaseProfiler],
+                   world_size: Optional[Tuple[float, float]], sources_per_type: int,
+                   coefficients: Optional[Dict[str, float]], map_seed: int):
+        # Simulation ve Ensemble ortak kurulumu: dünya, kaynaklar, kurallar, sayaçlar
+        self.agent_count = agent_count
+        # True: kalabalık cezası kaynak tipi sayımı yerine gerçek komşuluktan
+        self.neighborhood_density = neighborhood_density
+        self.world_size, self.sources = world_sources(world_size, sources_per_type, map_seed)
+        self.source_index = SourceIndex(self.sources, self.world_size)
+        self.grid = SpatialGrid(*self.world_size)
+        self._grid_tick = -1
+        self.profiler = profiler or PhaseProfiler()
+        # coefficients: RuleEngine.coefficients() anahtarlarından bir kısmı (ör. calibrate.py çıktısı)
+        self.rules = RuleEngine().with_coefficients(coefficients) if coefficients else RuleEngine()
+        self.agents: List[Agent] = []
+        self.pop: Optional[Population] = None
+        self.notifications: List[Tuple[str, float]] = []
+        # Liste verilirse (ReplayWriter) preset/duraklatma çağrıları (tik, ad, argümanlar) olarak eklenir
+        self.call_log: Optional[List[Tuple[int, str, tuple]]] = None
+        self.ticks = 0
+        self.time = 0.0
+        self._stats: Optional[Dict[str, float]] = None
+        self._stats_tick = -1
+        self._columns: Optional[Dict[str, np.ndarray]] = None
+        self._columns_tick = -1
+
+    def _world_population(self, seed: Optional[int]) -> Population:
+        # Tek dünyanın dizileri; çekim sırası: afinite matrisi, sonra popülasyon
+        rng = np.random.default_rng(seed)
+        self.rules.build_matrix(self.agent_count, rng)
+        return Population(self.agent_count, self.sources, self.rules, rng, self.world_size,
+                          self.source_index)
+
+    # --- Bildirim / preset -------------------------------------------------
+    def push_note(self, msg: str, sec: float = 2.5):
+        self.notifications.append((msg, sec))
+
+    def update_notifications(self, dt: float):
+        self.notifications = [(m, t-dt) for (m, t) in self.notifications if t-dt > 0]
+
+    def _log_call(self, name: str, *args):
+        if self.call_log is not None:
+            self.call_log.append((self.ticks, name, args))
+
+    def toggle_preset(self, flag: str):
+        # Ensemble'da tüm dünyalar; dünyalar ayrışmışsa bayrağın açık olduğu dünya sayısı
+        self._log_call('toggle_preset', flag)
+        worlds = getattr(self, 'globals_states', [self.globals_state])
+        for gs in worlds:
+            gs[flag] = not gs[flag]
+        state = []
+        for f, short in PRESET_SHORT.items():
+            on = sum(gs[f] for gs in worlds)
+            if on:
+                state.append(short if on == len(worlds) else f"{short} {on}/{len(worlds)}")
+        self.push_note(f"Aktif: {', '.join(state) if state else 'Yok'}")
+
+    def set_presets(self, flags):
+        # Verilen presetler açık, diğerleri kapalı (bildirim yok; toplu koşular için)
+        flags = set(flags)
+        unknown = flags - set(PRESET_SHORT)
+        if unknown:
+            raise ValueError(f"bilinmeyen preset: {', '.join(sorted(unknown))}")
+        self._log_call('set_presets', sorted(flags))
+        for f in PRESET_SHORT:
+            self.globals_state[f] = f in flags
+
+    def toggle_pause(self):
+        self._log_call('toggle_pause')
+        self.globals_state['paused'] = not self.globals_state['paused']
+        self.push_note("Duraklatıldı" if self.globals_state['paused'] else "Devam")
+
+    # --- Adım ---------------------------------------------------------------
+    def step(self, dt: float):
+        rules, sources, gs = self.rules, self.sources, self.globals_state
+        self.update_notifications(dt)
+        if self.pop is not None:
+            real_count = self._step_arrays(dt)
+            self._finish_step(dt, real_count)
+            return
 
+        # Ajanlar birbirinden bağımsız: her faz tüm ajanlar üzerinde ayrı döngü
+        agents, phase = self.agents, self.profiler.phase
+        with phase("retarget"):
+            index = self.source_index
+            for a in agents: a.retarget(sources, gs, rules, index)
+        tgts = [sources[a.target] for a in agents]
+        with phase("move_orbit"):
+            for a, tgt in zip(agents, tgts): a.move_orbit(tgt, dt, rules, self.world_size)
+
+        # Yoğunluk ölçümü: kaynak başına ring sayısı / eşit dağılımdaki pay
+        with phase("yoğunluk"):
+            occupancy = [0] * len(sources)
+            for a, tgt in zip(agents, tgts):
+                r = rules.orbit_base[tgt.type]
+                if abs((a.pos - tgt.pos).length() - r) <= ORBIT_BW: occupancy[a.target] += 1
+            self.ring_occupancy = np.array(occupancy, dtype=np.int64)
+            density = [d / max(1, self.agent_count/len(sources)) for d in occupancy]
+            local = self._local_density() if self.neighborhood_density else None
+        if gs['destek_grubu']:
+            with phase("destek"):
+                self._peer_influence(dt)
 
-def update_notifications(dt: float):
-    global notifications
-    notifications = [(m, t-dt) for (m, t) in notifications if t-dt > 0]
+        # Etkileşim & dinamikler
+        with phase("temas"):
+            for i, (a, tgt) in enumerate(zip(agents, tgts)):
+                a.contact_if_on_ring(tgt, density[a.target] if local is None else local[i], gs, rules)
+        real_count = 0
+        with phase("natural_dynamics"):
+            for a, tgt in zip(agents, tgts):
+                a.natural_dynamics(dt, rules)
+                if (rules.types[tgt.type].restorative
+                        and abs((a.pos - tgt.pos).length() - rules.orbit_base[tgt.type]) <= ORBIT_BW):
+                    real_count += 1
+        self._finish_step(dt, real_count)
+
+    def _step_arrays(self, dt: float) -> int:
+        pop, phase = self.pop, self.profiler.phase
+        now = self.time
+        with phase("retarget"):
+            pop.retarget(self.globals_state, now)
+        with phase("move_orbit"):
+            pop.move_orbit(dt)
+        # Yoğunluk ölçümü: kaynak başına ring sayısı
+        with phase("yoğunluk"):
+            ttype = pop.target_type
+            ring = pop.on_ring()
+            self.ring_occupancy = np.bincount(pop.target[ring], minlength=len(self.sources))
+            if self.neighborhood_density:
+                local = self._local_density()
+            else:
+                # kaynak başına ring sayısı / eşit dağılımdaki pay (tek kaynak/tip: tip sayımı)
+                density = self.ring_occupancy / max(1, self.agent_count/len(self.sources))
+                local = density[pop.target]
+        if self.globals_state['destek_grubu']:
+            with phase("destek"):
+                self._peer_influence(dt)
+        with phase("temas"):
+            pop.contact(ring, local, now)
+        with phase("natural_dynamics"):
+            pop.natural_dynamics(dt, now)
+        return int(np.count_nonzero(ring & self.rules.restorative[ttype]))
+
+    def _local_density(self) -> np.ndarray:
+        # Komşu sayısı, eşit dağılımda bir ringin 3 hücrelik yayına düşen ajan
+        # sayısına bölünür: tip bazlı ölçümle aynı ölçek (~1 = ortalama kalabalık)
+        grid = self.spatial_index(self.ticks + 1)
+        ring_len = 2*math.pi*float(np.mean(self.rules.orbit_r))
+        expected = (self.agent_count/len(self.sources)) * (3*grid.cell) / ring_len
+        return grid.neighbor_counts() / max(1.0, expected)
+
+    def _peer_influence(self, dt: float, active: Optional[np.ndarray] = None):
+        # Destek Grubu: irade, sosyal bağ ve baz ışık komşu ortalamasına doğru
+        # akar (grid komşuluğu, O(N)); yalnız kalan ajan etkilenmez.
+        # active: ajan başına maske (Ensemble'da preset'i açık dünyalar)
+        grid = self.spatial_index(self.ticks + 1)
+        if self.pop is not None:
+            p = self.pop
+            vals = np.column_stack([p.willpower, p.social_ties, p.base_light])
+        else:
+            vals = np.array([(a.willpower, a.social_ties, a.base_light) for a in self.agents],
+                            dtype=np.float64).reshape(-1, 3)
+        cnt = grid.neighbor_counts()
+        has = cnt > 0
+        if active is not None:
+            has &= active
+        mean = grid.neighbor_sums(vals)[has] / cnt[has, None]
+        vals[has] += (mean - vals[has]) * min(1.0, PEER_RATE*dt)
+        if self.pop is not None:
+            p.willpower[:], p.social_ties[:], p.base_light[:] = vals.T
+        else:
+            for a, (w, t, b) in zip(self.agents, vals.tolist()):
+                a.willpower, a.social_ties, a.base_light = w, t, b
+
+    def spatial_index(self, stamp: Optional[int] = None) -> SpatialGrid:
+        # Konumlar tik başına bir kez değişir: aynı tikte tekrar kurma
+        stamp = self.ticks if stamp is None else stamp
+        if self._grid_tick != stamp:
+            self.grid.rebuild(self.positions())
+            self._grid_tick = stamp
+        return self.grid
+
+    def _finish_step(self, dt: float, real_count):
+        # Gerçek ışık parlaklığı (Ensemble: real_count ve real_intensity dünya başına dizi)
+        ri = (self.real_intensity + 0.0025 * real_count) * 0.997
+        self.real_intensity = np.clip(ri, 0.0, 1.0) if isinstance(ri, np.ndarray) else clamp(ri, 0.0, 1.0)
+        self.ticks += 1
+        self.time += dt
+
+    def run(self, n_ticks: int, dt: float = 1.0/FPS):
+        # Saat/FPS sınırı yok: olabildiğince hızlı
+        for _ in range(n_ticks):
+            self.step(dt)
+        return self
+
+    # --- Gözlem -------------------------------------------------------------
+    def panel_stats(self) -> Dict[str, float]:
+        # draw_panel'deki ortalamalar; tik başına bir kez hesaplanır (panel + kayıt paylaşır)
+        if self._stats_tick != self.ticks or self._stats is None:
+            self._stats = self._compute_panel_stats()
+            self._stats_tick = self.ticks
+        return dict(self._stats)
+
+    def agent_columns(self) -> Dict[str, np.ndarray]:
+        # COLUMNS dizileri; nesne modunda ajanlar tik başına tek geçişte toplanır (panel + kayıt paylaşır)
+        if self.pop is not None:
+            return {k: getattr(self.pop, k) for k in self.COLUMNS}
+        if self._columns_tick != self.ticks or self._columns is None:
+            vals = np.array([(a.inner_light, a.base_light, a.health, a.social_ties, a.desens, a.hedonic)
+                             for a in self.agents], dtype=np.float64).reshape(-1, len(self.COLUMNS))
+            self._columns = dict(zip(self.COLUMNS, vals.T))
+            self._columns_tick = self.ticks
+        return self._columns
+
+    def _compute_panel_stats(self) -> Dict[str, float]:
+        if self.pop is None and not self.agents:
+            return {'avg_inner': 0, 'loneliness': 0, 'avg_health': 0, 'avg_ties': 0,
+                    'avg_des': 0, 'avg_hed': 0}
+        c = self.agent_columns()
+        avg_inner, avg_health, avg_ties, avg_des, avg_hed = (
+            float(c[k].mean()) for k in ('inner_light', 'health', 'social_ties', 'desens', 'hedonic'))
+        return {'avg_inner': avg_inner, 'loneliness': 1.0 - avg_ties, 'avg_health': avg_health,
+                'avg_ties': avg_ties, 'avg_des': avg_des, 'avg_hed': avg_hed}
+
+    def metrics(self) -> Dict[str, float]:
+        # Panel ortalamaları + Gerçek Işık yoğunluğu (sweep / kayıt için)
+        m = self.panel_stats()
+        m['real_intensity'] = float(self.real_intensity)
+        return m
+
+    def positions(self) -> np.ndarray:
+        if self.pop is not None:
+            return self.pop.pos
+        return np.array([(a.pos.x, a.pos.y) for a in self.agents], dtype=np.float64).reshape(-1, 2)
+
+    def pick(self, x: float, y: float, max_dist: float = 18) -> Optional[int]:
+        return self.spatial_index().nearest(x, y, max_dist)
+
+    def colors(self) -> np.ndarray:
+        if self.pop is not None:
+            return self.pop.colors()
+        return np.array([a.color() for a in self.agents], dtype=np.int64).reshape(-1, 3)
+
+    def agent_info(self, i: int) -> Agent:
+        return self.pop.agent_view(i) if self.pop is not None else self.agents[i]
+
+    # --- Kontrol noktası ------------------------------------------------------
+    # Tam durum = diziler (ajanlar, ring doluluğu, real_intensity) + JSON'a
+    # yazılabilir meta (tik, zaman, presetler, bildirimler, RNG durumları).
+    # Diziler canlı durumun kendisi; yazıcı hemen diske aktarmalı.
+    # Zamanlayıcı kuyrukları vade dizilerinden yeniden kurulur.
+    def checkpoint_state(self) -> Tuple[Dict[str, np.ndarray], Dict]:
+        if self.pop is not None:
+            arrays = {name: getattr(self.pop, name) for name in Population.STATE}
+            rngs = [r.bit_generator.state for r in getattr(self.pop, 'rngs', [self.pop.rng])]
+            py_random = None
+        else:
+            # nesne modu: Agent alanları sütun sütun, afinite satırları ve global random akışı
+            arrays = {}
+            for f in fields(Agent):
+                vals = [getattr(a, f.name) for a in self.agents]
+                if f.name in ('pos', 'vel'):
+                    vals = [(v.x, v.y) for v in vals]
+                arrays[f.name] = np.array(vals)
+            arrays['affinity'] = np.array(self.rules.affinity_rows, dtype=np.float64)
+            rngs = []
+            py_random = random.getstate()
+        arrays['ring_occupancy'] = self.ring_occupancy
+        arrays['real_intensity'] = np.asarray(self.real_intensity, dtype=np.float64)
+        meta = {
+            'ticks': self.ticks,
+            'time': self.time,
+            'globals': getattr(self, 'globals_states', [self.globals_state]),
+            'notifications': self.notifications,
+            'rng': rngs,
+            'random': py_random,
+        }
+        return arrays, meta
+
+    def restore_state(self, arrays: Dict[str, np.ndarray], meta: Dict):
+        # Aynı config ile kurulmuş simülasyona; diziler yerinde kopyalanır (salt okunur mmap olabilir)
+        if self.pop is not None:
+            pop = self.pop
+            for name in Population.STATE:
+                dst = getattr(pop, name)
+                if dst.shape != arrays[name].shape:
+                    raise ValueError(f"kontrol noktası uyumsuz: {name} {arrays[name].shape} ≠ {dst.shape}")
+                np.copyto(dst, arrays[name])
+            for rng, st in zip(getattr(pop, 'rngs', [pop.rng]), meta['rng']):
+                rng.bit_generator.state = st
+        else:
+            if len(arrays['id']) != len(self.agents):
+                raise ValueError(f"kontrol noktası uyumsuz: {len(arrays['id'])} ajan ≠ {len(self.agents)}")
+            for f in fields(Agent):
+                vals = arrays[f.name].tolist()
+                if f.name in ('pos', 'vel'):
+                    vals = [pygame.Vector2(x, y) for x, y in vals]
+                for a, v in zip(self.agents, vals):
+                    setattr(a, f.name, v)
+            self.rules.affinity_rows = arrays['affinity'].tolist()
+            self.rules.affinity = np.array(arrays['affinity'])
+            version, state, gauss = meta['random']
+            random.setstate((version, tuple(state), gauss))
+        np.copyto(self.ring_occupancy, arrays['ring_occupancy'])
+        ri = arrays['real_intensity']
+        self.real_intensity = float(ri) if ri.ndim == 0 else np.array(ri)
+        self.ticks, self.time = meta['ticks'], meta['time']
+        for gs, saved in zip(getattr(self, 'globals_states', [self.globals_state]), meta['globals']):
+            gs.update(saved)
+        self.notifications = [(m, t) for m, t in meta['notifications']]
+        self._stats_tick = self._grid_tick = self._columns_tick = -1
+        if self.pop is not None:
+            self.pop.rebuild_schedule(self.time)
+
+# --- Ensemble (K dünya, tek dizi kümesi) --------------------------------------
+# Aynı senaryonun K kopyası kilit adımda: dünya başına tohum, preset bayrakları
+# ve real_intensity; kaynak haritası tüm dünyalarda ortak (map_seed). Dünya k,
+# Simulation(agent_count, seed=seeds[k], vectorized=True, map_seed=map_seed) ile
+# (aynı world_size / sources_per_type) birebir aynı gidişatı üretir; tik başına
+# yorumlayıcı yükü K dünyaya bölünür.
+#   ens = Ensemble(64, agent_count=200, seed=0); ens.run(3600); ens.summary()
+def t_quantile(p: float, df: int) -> float:
+    # Student-t ters dağılımı: df 1–2 kapalı form, üstü Cornish–Fisher açılımı
+    # (Abramowitz–Stegun 26.7.5; df>=3 için ~1e-3 hassasiyet)
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2*p - 1) / math.sqrt(2*p*(1 - p))
+    z = statistics.NormalDist().inv_cdf(p)
+    g1 = (z**3 + z) / 4
+    g2 = (5*z**5 + 16*z**3 + 3*z) / 96
+    g3 = (3*z**7 + 19*z**5 + 17*z**3 - 15*z) / 384
+    g4 = (79*z**9 + 776*z**7 + 1482*z**5 - 1920*z**3 - 945*z) / 92160
+    return z + g1/df + g2/df**2 + g3/df**3 + g4/df**4
+
+class Ensemble(Simulation):
+    def __init__(self, worlds: int, agent_count: int = AGENT_COUNT, seeds: Optional[List[int]] = None,
+                 seed: int = 0, neighborhood_density: bool = False,
+                 profiler: Optional[PhaseProfiler] = None,
+                 world_size: Optional[Tuple[float, float]] = None, sources_per_type: int = 1,
+                 coefficients: Optional[Dict[str, float]] = None, map_seed: int = 0):
+        # seeds verilmezse seed, seed+1, ... seed+K-1
+        seeds = list(range(seed, seed + worlds)) if seeds is None else list(seeds)
+        if len(seeds) != worlds:
+            raise ValueError(f"{worlds} dünya için {len(seeds)} tohum verildi")
+        self.config = dict(worlds=worlds, agent_count=agent_count, seeds=seeds, seed=seed,
+                           neighborhood_density=neighborhood_density, world_size=world_size,
+                           sources_per_type=sources_per_type, map_seed=map_seed,
+                           coefficients=dict(coefficients) if coefficients else None)
+        self.worlds = worlds
+        self.seeds = seeds
+        self.vectorized = True
+        self._init_core(agent_count, neighborhood_density, profiler, world_size, sources_per_type,
+                        coefficients, map_seed)
+        # dünya k, Simulation(seed=seeds[k], vectorized=True) ile aynı dizilerle başlar
+        self.pop: EnsemblePopulation = EnsemblePopulation([self._world_population(s) for s in seeds])
+        self.rules.affinity = self.pop.affinity
+        self.globals_states = [default_globals() for _ in range(worlds)]
+        self.globals_state = self.globals_states[0]
+        self.real_intensity = np.zeros(worlds)
+        self.ring_occupancy = np.zeros((worlds, len(self.sources)), dtype=np.int64)
+
+    # --- Preset ---------------------------------------------------------------
+    def set_presets(self, flags, world: Optional[int] = None):
+        # world verilmezse tüm dünyalar
+        flags = set(flags)
+        unknown = flags - set(PRESET_SHORT)
+        if unknown:
+            raise ValueError(f"bilinmeyen preset: {', '.join(sorted(unknown))}")
+        self._log_call('set_presets', sorted(flags), world)
+        targets = self.globals_states if world is None else [self.globals_states[world]]
+        for gs in targets:
+            for f in PRESET_SHORT:
+                gs[f] = f in flags
+
+    # --- Adım -----------------------------------------------------------------
+    # step() Simulation'dan: bildirimler, dizi fazları (burada dünya başına), _finish_step
+    def _step_arrays(self, dt: float) -> np.ndarray:
+        pop, phase = self.pop, self.profiler.phase
+        now = self.time
+        K, S = self.worlds, len(self.sources)
+        with phase("retarget"):
+            pop.retarget(self.globals_states, now)
+        with phase("move_orbit"):
+            pop.move_orbit(dt)
+        # Yoğunluk: dünya × tip başına ring sayısı
+        with phase("yoğunluk"):
+            w, ttype = pop.world, pop.target_type
+            ring = pop.on_ring()
+            self.ring_occupancy = np.bincount(w[ring]*S + pop.target[ring], minlength=K*S).reshape(K, S)
+            if self.neighborhood_density:
+                local = self._local_density()
+            else:
+                density = self.ring_occupancy / max(1, self.agent_count/S)
+                local = density[w, pop.target]
+        peer = np.array([gs['destek_grubu'] for gs in self.globals_states])
+        if peer.any():
+            with phase("destek"):
+                self._peer_influence(dt, peer[w])
+        with phase("temas"):
+            pop.contact(ring, local, now)
+        with phase("natural_dynamics"):
+            pop.natural_dynamics(dt, now)
+        return np.bincount(w[ring & self.rules.restorative[ttype]], minlength=K)
+
+    def spatial_index(self, stamp: Optional[int] = None) -> SpatialGrid:
+        stamp = self.ticks if stamp is None else stamp
+        if self._grid_tick != stamp:
+            self.grid.rebuild(self.pop.pos, self.pop.world, self.worlds)
+            self._grid_tick = stamp
+        return self.grid
+
+    # --- Gözlem ---------------------------------------------------------------
+    def world_metrics(self) -> Dict[str, np.ndarray]:
+        # Dünya başına panel ortalamaları + real_intensity, her biri (K,)
+        p, K = self.pop, self.worlds
+        mean = lambda a: a.reshape(K, -1).mean(axis=1)
+        ties = mean(p.social_ties)
+        return {'avg_inner': mean(p.inner_light), 'loneliness': 1.0 - ties,
+                'avg_health': mean(p.health), 'avg_ties': ties, 'avg_des': mean(p.desens),
+                'avg_hed': mean(p.hedonic), 'real_intensity': self.real_intensity.copy()}
+
+    def _compute_panel_stats(self) -> Dict[str, float]:
+        # Panel için ensemble ortalaması
+        m = self.world_metrics()
+        return {k: float(v.mean()) for k, v in m.items() if k != 'real_intensity'}
+
+    def metrics(self) -> List[Dict[str, float]]:
+        m = self.world_metrics()
+        return [{k: float(v[i]) for k, v in m.items()} for i in range(self.worlds)]
+
+    def summary(self, confidence: float = 0.95) -> Dict[str, Dict[str, float]]:
+        # Metrik başına ensemble ortalaması, standart sapma ve ortalamanın t güven aralığı
+        out = {}
+        K = self.worlds
+        tq = t_quantile(0.5 + confidence/2, K - 1) if K > 1 else float('nan')
+        for k, v in self.world_metrics().items():
+            mean = float(v.mean())
+            sd = float(v.std(ddof=1)) if K > 1 else 0.0
+            half = tq * sd / math.sqrt(K) if K > 1 else float('nan')
+            out[k] = {'mean': mean, 'sd': sd, 'ci_lo': mean - half, 'ci_hi': mean + half}
+        return out
+
+# --- Sabit adımlı simülasyon iş parçacığı ------------------------------------
+# Simülasyon kendi iş parçacığında sabit dt ile ilerler (çizim süresi fiziği
+# değiştirmez); hız çarpanı ekran FPS'inden bağımsız (ör. 10× ileri sarma).
+# Her yayında arka tampon doldurulup ön tamponla yer değiştirir; çizim ön
+# tampondaki son iki tikin konumları arasında enterpolasyon yapar.
+# Simülasyona dokunan UI komutları kuyruğa atılır, tikler arasında uygulanır.
+SIM_SPEEDS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0)
+MAX_BACKLOG = 0.25            # sn (duvar saati): sim yetişemezse bundan eskisi atılır
 
+@dataclass
+class Snapshot:
+    tick: int
+    time: float
+    pos: np.ndarray
+    colors: np.ndarray
+    stats: Dict[str, float]
+    real_intensity: float
+    notifications: List[Tuple[str, float]]
+    agent: Optional[Agent] = None          # seçili ajanın kopyası
+    prev_pos: Optional[np.ndarray] = None  # bir önceki tikin konumları
+    published: float = 0.0                 # yayın anı (perf_counter)
+
+    @classmethod
+    def capture(cls, sim: Simulation, selected: Optional[int] = None) -> 'Snapshot':
+        pos = sim.positions().copy()
+        agent = copy.copy(sim.agent_info(selected)) if selected is not None else None
+        return cls(sim.ticks, sim.time, pos, sim.colors(), sim.panel_stats(), float(sim.real_intensity),
+                   list(sim.notifications), agent, None, time.perf_counter())
+
+class SimRunner:
+    def __init__(self, sim: Simulation, dt: float = 1.0/FPS, speed: float = 1.0):
+        # Snapshot tek dünyalık: Ensemble'da real_intensity/metrikler dünya başına dizi
+        if isinstance(sim, Ensemble):
+            raise ValueError("SimRunner/Viewer tek dünyalı Simulation ister; Ensemble için run()/metrics() kullanın")
+        self.sim = sim
+        self.dt = dt
+        self.speed = speed
+        self.selected: Optional[int] = None
+        self.tick_rate = 0.0                 # ölçülen tik/sn (duvar saati)
+        self.on_tick = None                  # her tikten sonra sim iş parçacığında (ör. ReplayWriter.record)
+        self._commands: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._front = Snapshot.capture(sim)
+        self._back = Snapshot.capture(sim)
+        self._prev = sim.positions().copy()
+        self._swap = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="sim-runner", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, fn, *args):
+        # Simülasyonu değiştiren çağrılar (preset, duraklatma, not) sim iş parçacığında
+        self._commands.put((fn, args))
+
+    def _drain(self) -> bool:
+        ran = False
+        while True:
+            try:
+                fn, args = self._commands.get_nowait()
+            except queue.Empty:
+                return ran
+            fn(*args)
+            ran = True
+
+    def _publish(self):
+        sim, back = self.sim, self._back
+        pos = sim.positions()
+        if back.prev_pos is None or back.pos.shape != pos.shape:
+            back.pos, back.prev_pos = np.empty_like(pos), np.empty_like(pos)
+        np.copyto(back.pos, pos)
+        np.copyto(back.prev_pos, self._prev if self._prev.shape == pos.shape else pos)
+        back.tick, back.time = sim.ticks, sim.time
+        back.colors = sim.colors()
+        back.stats = sim.panel_stats()
+        back.real_intensity = float(sim.real_intensity)
+        back.notifications = list(sim.notifications)
+        sel = self.selected
+        back.agent = copy.copy(sim.agent_info(sel)) if sel is not None else None
+        back.published = time.perf_counter()
+        with self._swap:
+            self._front, self._back = back, self._front
+
+    def _loop(self):
+        sim, dt = self.sim, self.dt
+        acc, last = 0.0, time.perf_counter()
+        rate_t, rate_n = last, 0
+        while not self._stop.is_set():
+            dirty = self._drain()
+            now = time.perf_counter()
+            if not sim.globals_state['paused']:
+                acc = min(acc + (now - last)*self.speed, max(dt, MAX_BACKLOG*self.speed))
+            last = now
+            while acc >= dt and not (self._stop.is_set() or sim.globals_state['paused']):
+                pos = sim.positions()
+                if self._prev.shape != pos.shape: self._prev = np.empty_like(pos)
+                np.copyto(self._prev, pos)
+                sim.step(dt)
+                if self.on_tick is not None: self.on_tick()
+                acc -= dt; rate_n += 1
+                dirty = True
+                time.sleep(0)  # GIL'i çizim iş parçacığına bırak
+                # ileri sarmada ara tikler yayınlanmaz (ekran zaten göstermez)
+                if acc >= dt and time.perf_counter() - self._front.published < 1.0/FPS:
+                    continue
+                self._publish(); dirty = False
+                if self._drain(): dirty = True
+            if dirty:
+                self._publish()
+            t = time.perf_counter()
+            if t - rate_t >= 0.5:
+                self.tick_rate, rate_t, rate_n = rate_n / (t - rate_t), t, 0
+            wait = (dt - acc) / self.speed if not sim.globals_state['paused'] else 1.0/FPS
+            time.sleep(min(max(wait, 0.0005), 1.0/FPS))
+
+    def read(self) -> Snapshot:
+        # Ön tampondan çizim kopyası: konumlar son iki tik arasında enterpole
+        with self._swap:
+            f = self._front
+            span = self.dt / self.speed
+            a = clamp((time.perf_counter() - f.published) / span, 0.0, 1.0)
+            pos = f.prev_pos + (f.pos - f.prev_pos) * a if f.prev_pos is not None else f.pos.copy()
+            return Snapshot(f.tick, f.time, pos, f.colors, f.stats, f.real_intensity,
+                            f.notifications, f.agent, None, f.published)
 
-def draw_notifications(surf: pygame.Surface):
+# --- UI yardımcıları ---------------------------------------------------------
+def draw_notifications(surf: pygame.Surface, notifications: List[Tuple[str, float]], font_small,
+                       text_cache: Optional[Dict[str, pygame.Surface]] = None) -> List[pygame.Rect]:
     y = 12
+    rects = []
     for (msg, t) in notifications:
         alpha = 255 if t > 0.5 else int(255 * (t/0.5))
-        text = font_small.render(msg, True, WHITE)
+        if text_cache is None:
+            text = font_small.render(msg, True, WHITE)
+        else:
+            text = text_cache.get(msg)
+            if text is None:
+                if len(text_cache) > 64: text_cache.clear()
+                text = text_cache[msg] = font_small.render(msg, True, WHITE)
         box = pygame.Surface((text.get_width()+12, text.get_height()+8), pygame.SRCALPHA)
         pygame.draw.rect(box, (30, 36, 48, alpha), box.get_rect(), border_radius=8)
         box.blit(text, (6, 4))
-        screen.blit(box, (12, y))
+        rects.append(surf.blit(box, (12, y)))
         y += text.get_height() + 10
+    return rects
+
 
+# Panel çubukları: (etiket, panel_stats anahtarı, ölçek, renk)
+METRIC_BARS = [
+    ("İç Işık (ort)", 'avg_inner', 100.0, AMBER),
+    ("Yalnızlık Endeksi", 'loneliness', 1.0, NEON_BLUE),
+    ("Sağlık", 'avg_health', 1.0, HEALTH_GREEN),
+    ("Desensitizasyon", 'avg_des', 1.0, NEON_PINK),
+    ("Hedonik Adaptasyon", 'avg_hed', 1.0, NEON_PURPLE),
+]
+PANEL_BAR_Y = 54
+CONTROL_LINES = [
+    ("B: Bildirim Fırtınası", 'bildirim_firtinasi'), ("O: Dijital Oruç", 'digital_oruc'),
+    ("R: Ramazan Etkisi", 'ramazan'), ("G: Destek Grubu", 'destek_grubu'),
+    ("F: Filtre Açık", 'filtre_acik'), ("Space: Duraklat", None), ("Tık: Ajan seç", None),
+    ("P: Performans  T: Trace kaydet", None), ("+/-: Simülasyon hızı", None),
+    ("Oklar/sağ sürükle: Kaydır", None), ("Teker: Yakınlaş  Home: Tümü", None),
+]
 
-def draw_panel(surf: pygame.Surface, agents: List[Agent]):
+def metric_bar_rect(i: int) -> pygame.Rect:
+    return pygame.Rect(WIDTH-280, PANEL_BAR_Y + i*44, 240, 18)
+
+def metric_bar_px(stats: Dict[str, float], i: int) -> int:
+    # Çubuk piksel genişliği: değişim eşiği budur (aynı pikselse yeniden çizme)
+    _, key, scale, _ = METRIC_BARS[i]
+    return int(240*clamp(stats[key]/scale, 0, 1))
+
+def draw_metric_bar(surf: pygame.Surface, i: int, px: int) -> pygame.Rect:
+    rect = metric_bar_rect(i)
+    pygame.draw.rect(surf, PANEL_BG, rect)
+    pygame.draw.rect(surf, SOFT_GRAY, rect, border_radius=6)
+    pygame.draw.rect(surf, METRIC_BARS[i][3], (rect.x, rect.y, px, rect.h), border_radius=6)
+    return rect
+
+def draw_panel(surf: pygame.Surface, stats: Dict[str, float], font, font_small,
+               globals_state: Optional[Dict[str, bool]] = None):
+    draw_panel_static(surf, font, font_small, globals_state)
+    for i in range(len(METRIC_BARS)):
+        draw_metric_bar(surf, i, metric_bar_px(stats, i))
+
+def draw_panel_static(surf: pygame.Surface, font, font_small, globals_state: Optional[Dict[str, bool]] = None):
+    # Panelin değişmeyen kısmı: zemin, başlıklar, çubuk etiketleri, lejant, kontroller
     panel = pygame.Rect(WIDTH-300, 0, 300, HEIGHT)
     pygame.draw.rect(surf, PANEL_BG, panel)
     pygame.draw.line(surf, PANEL_LINE, (WIDTH-300, 0), (WIDTH-300, HEIGHT), 1)
 
-    if agents:
-        avg_inner = sum(a.inner_light for a in agents) / len(agents)
-        avg_health = sum(a.health for a in agents) / len(agents)
-        avg_ties = sum(a.social_ties for a in agents) / len(agents)
-        avg_des = sum(a.desens for a in agents) / len(agents)
-        avg_hed = sum(a.hedonic for a in agents) / len(agents)
-        loneliness = 1.0 - avg_ties
-    else:
-        avg_inner = avg_health = avg_ties = avg_des = avg_hed = loneliness = 0
-
-    def bar(y, label, val, color):
-        pygame.draw.rect(surf, SOFT_GRAY, (WIDTH-280, y, 240, 18), border_radius=6)
-        pygame.draw.rect(surf, color, (WIDTH-280, y, int(240*clamp(val,0,1)), 18), border_radius=6)
-        text = font_small.render(label, True, WHITE)
-        surf.blit(text, (WIDTH-280, y-18))
-
     title = font.render("METRİKLER", True, WHITE)
     surf.blit(title, (WIDTH-300 + (300-title.get_width())//2, 12))
 
-    base_y = 54
-    bar(base_y+0*44, "İç Işık (ort)", avg_inner/100.0, AMBER)
-    bar(base_y+1*44, "Yalnızlık Endeksi", loneliness, NEON_BLUE)
-    bar(base_y+2*44, "Sağlık", avg_health, HEALTH_GREEN)
-    bar(base_y+3*44, "Desensitizasyon", avg_des, NEON_PINK)
-    bar(base_y+4*44, "Hedonik Adaptasyon", avg_hed, NEON_PURPLE)
+    base_y = PANEL_BAR_Y
+    for i, (label, _, _, _) in enumerate(METRIC_BARS):
+        surf.blit(font_small.render(label, True, WHITE), (WIDTH-280, base_y + i*44 - 18))
 
     y2 = base_y + 5*44 + 24
     surf.blit(font.render("KAYNAKLAR", True, WHITE), (WIDTH-280, y2))
     y2 += 30
-    legend = [
-        (NEON_BLUE, "Sosyal Medya"), (NEON_RED, "Alkol/Uyuşturucu"), (NEON_PINK, "Pornografi"),
-        (NEON_PURPLE, "Tüketim/Şöhret"), (AMBER, "Gerçek Işık"),
-    ]
-    for c, name in legend:
+    for c, name in ((r.tint, r.label or r.name) for r in SOURCE_RULES):
         pygame.draw.circle(surf, c, (WIDTH-280+10, y2+8), 7)
         surf.blit(font_small.render(name, True, WHITE), (WIDTH-280+24, y2))
         y2 += 24
@@ -442,15 +1830,20 @@ def draw_panel(surf: pygame.Surface, agents: List[Agent]):
     y3 = y2 + 10
     surf.blit(font.render("KONTROLLER", True, WHITE), (WIDTH-280, y3))
     y3 += 30
-    lines = [
-        "B: Bildirim Fırtınası", "O: Dijital Oruç", "R: Ramazan Etkisi", "G: Destek Grubu",
-        "F: Filtre Açık", "Space: Duraklat", "Tık: Ajan seç",
-    ]
-    for ln in lines:
-        surf.blit(font_small.render(ln, True, GRAY), (WIDTH-280, y3)); y3 += 20
+    for ln, flag in CONTROL_LINES:
+        # aktif presetler vurgulu
+        col = GOLD if (flag and globals_state and globals_state.get(flag)) else GRAY
+        surf.blit(font_small.render(ln, True, col), (WIDTH-280, y3)); y3 += 20
 
 
-def draw_agent_info(surf: pygame.Surface, agent: Agent):
+def draw_header(surf: pygame.Surface, font, font_small):
+    header = font.render("Işık Bahçesi — Sahte Işıklar vs. Hakiki Nur", True, WHITE)
+    surf.blit(header, (18, 10))
+    sub = font_small.render("B:Bildirim  O:Oruç  R:Ramazan  G:Destek  F:Filtre  Space:Duraklat  Tık:Seç", True, GRAY)
+    surf.blit(sub, (18, 36))
+
+
+def draw_agent_info(surf: pygame.Surface, agent: Agent, font_small):
     if not agent:
         return
 
@@ -475,9 +1868,10 @@ def draw_agent_info(surf: pygame.Surface, agent: Agent):
     ln(142, "Hedonik", agent.hedonic)
     ln(164, "Keşif ε", agent.epsilon)
 
-    lbl = font_small.render(f"Hedef: {agent.target_type}", True, CYAN)
+    lbl = font_small.render(f"Hedef: {TYPE_NAMES[agent.target_type]}", True, CYAN)
     box.blit(lbl, (12, 184))
-    lbl2 = font_small.render(f"Son Uyarı: {agent.last_stimulus or '-'}", True, CYAN)
+    stim = TYPE_NAMES[agent.last_stimulus] if agent.last_stimulus != NO_STIMULUS else '-'
+    lbl2 = font_small.render(f"Son Uyarı: {stim}", True, CYAN)
     box.blit(lbl2, (12, 202))
 
     # --- Alt-orta konumlandırma ---
@@ -485,85 +1879,450 @@ def draw_agent_info(surf: pygame.Surface, agent: Agent):
     play_w = WIDTH - 300
     x = int((play_w - BOX_W) / 2)
     y = HEIGHT - BOX_H - 20  # alttan 20px boşluk
-    surf.blit(box, (x, y))
-
-
-# --- Ana döngü ---------------------------------------------------------------
-selected_agent: Optional[Agent] = None
-
-while True:
-    dt = clock.tick(FPS) / 1000.0
-
-    for event in pygame.event.get():
+    return surf.blit(box, (x, y))
+
+def draw_perf_overlay(surf: pygame.Surface, prof: PhaseProfiler, font_small,
+                      sim_rate: Optional[float] = None) -> pygame.Rect:
+    # Faz başına ortalama ms + kare süresi sparkline'ı (oyun alanı sağ üst)
+    avgs = sorted(prof.averages_ms().items(), key=lambda kv: -kv[1])
+    W, H = 220, 56 + 18*len(avgs)
+    box = pygame.Surface((W, H), pygame.SRCALPHA)
+    pygame.draw.rect(box, (28, 34, 46, 220), box.get_rect(), border_radius=10)
+    frames = [1000.0*f for f in prof.frames]
+    fmean = sum(frames)/len(frames) if frames else 0.0
+    box.blit(font_small.render(f"Kare {fmean:5.1f} ms", True, GOLD), (10, 6))
+    if sim_rate is not None:
+        r = font_small.render(f"{sim_rate:.0f} tik/sn", True, CYAN)
+        box.blit(r, (W - 10 - r.get_width(), 6))
+    if len(frames) > 1:
+        top = max(max(frames), 1000.0/FPS)
+        sx = (W-20) / (prof.window-1)
+        pts = [(10 + i*sx, 50 - 22*f/top) for i, f in enumerate(frames)]
+        ref = 50 - 22*(1000.0/FPS)/top
+        pygame.draw.line(box, SOFT_GRAY, (10, ref), (W-10, ref), 1)
+        pygame.draw.lines(box, CYAN, False, pts, 1)
+    y = 56
+    for name, ms in avgs:
+        box.blit(font_small.render(name, True, WHITE), (10, y))
+        v = font_small.render(f"{ms:6.2f}", True, GOLD)
+        box.blit(v, (W - 10 - v.get_width(), y))
+        y += 18
+    return surf.blit(box, (WIDTH-300-W-10, 64))
+
+# --- Kamera ve ayrıntı düzeyi (LOD) ------------------------------------------
+# Dünya oyun alanından büyük olabilir: kamera merkezi + ayrık yakınlaştırma
+# kademeleri (glow önbelleği sınırlı sayıda yarıçap görür). Görüş alanı dışındaki
+# kaynak ve ajanlar çizilmez. Uzaklaşınca ya da görünen ajan sayısı ekran
+# bütçesini aşınca ajanlar tek tek değil, ekran karosu başına yoğunluk/ışık ısı
+# haritası olarak çizilir: blit sayısı nüfusla değil ekran boyutuyla sınırlı.
+ZOOM_STEPS = tuple(2.0 ** (k/4) for k in range(-20, 9))   # ~1/32 .. 4
+LOD_ZOOM = 0.5              # bunun altında her zaman ısı haritası
+LOD_TILE = 8                # ısı haritası karo kenarı (px)
+LOD_AGENT_PX = 25           # ajan başına en az ekran alanı (px²): bütçe = görüş alanı / bu
+LABEL_MIN_SCALE = 0.75      # kaynak etiketleri bu ölçeğin altında çizilmez
+PAN_SPEED = 600             # ok tuşlarıyla kaydırma (px/sn)
+
+class Camera:
+    def __init__(self, world_size: Tuple[float, float], view: pygame.Rect):
+        self.world_w, self.world_h = world_size
+        self.view = view
+        self.zoom_i = ZOOM_STEPS.index(1.0)
+        self.x, self.y = self.world_w/2, self.world_h/2   # görüş merkezi (dünya)
+        if self.world_w > view.w or self.world_h > view.h:
+            self.fit()
+
+    @property
+    def zoom(self) -> float:
+        return ZOOM_STEPS[self.zoom_i]
+
+    def key(self) -> tuple:
+        return (self.zoom_i, self.x, self.y)
+
+    def origin(self) -> Tuple[float, float]:
+        # görüş alanının sol üst köşesi (dünya)
+        z = self.zoom
+        return self.x - self.view.w/(2*z), self.y - self.view.h/(2*z)
+
+    def to_screen(self, pos: np.ndarray) -> np.ndarray:
+        ox, oy = self.origin()
+        z = self.zoom
+        out = np.empty_like(pos, dtype=np.float64)
+        out[:, 0] = (pos[:, 0] - ox)*z + self.view.x
+        out[:, 1] = (pos[:, 1] - oy)*z + self.view.y
+        return out
+
+    def point(self, x: float, y: float) -> Tuple[float, float]:
+        ox, oy = self.origin()
+        return (x - ox)*self.zoom + self.view.x, (y - oy)*self.zoom + self.view.y
+
+    def to_world(self, sx: float, sy: float) -> Tuple[float, float]:
+        ox, oy = self.origin()
+        return ox + (sx - self.view.x)/self.zoom, oy + (sy - self.view.y)/self.zoom
+
+    def visible(self, pos: np.ndarray, margin: float = 0.0) -> np.ndarray:
+        # margin: ekran pikseli (glow/halka taşması)
+        ox, oy = self.origin()
+        m = margin / self.zoom
+        x1, y1 = ox + self.view.w/self.zoom + m, oy + self.view.h/self.zoom + m
+        return (pos[:, 0] >= ox - m) & (pos[:, 0] <= x1) & (pos[:, 1] >= oy - m) & (pos[:, 1] <= y1)
+
+    def _clamp(self):
+        self.x = clamp(self.x, 0.0, self.world_w)
+        self.y = clamp(self.y, 0.0, self.world_h)
+
+    def pan(self, dx: float, dy: float):
+        # ekran pikseli cinsinden kaydırma
+        self.x += dx / self.zoom
+        self.y += dy / self.zoom
+        self._clamp()
+
+    def zoom_by(self, steps: int, sx: Optional[float] = None, sy: Optional[float] = None):
+        # (sx, sy) ekran noktasının altındaki dünya noktası yerinde kalır
+        sx = self.view.centerx if sx is None else sx
+        sy = self.view.centery if sy is None else sy
+        wx, wy = self.to_world(sx, sy)
+        self.zoom_i = max(0, min(len(ZOOM_STEPS)-1, self.zoom_i + steps))
+        self.x = wx - (sx - self.view.centerx)/self.zoom
+        self.y = wy - (sy - self.view.centery)/self.zoom
+        self._clamp()
+
+    def fit(self):
+        # tüm dünyayı gösteren en büyük kademe, ortada
+        fit = min(self.view.w/self.world_w, self.view.h/self.world_h)
+        self.zoom_i = max([i for i, z in enumerate(ZOOM_STEPS) if z <= fit] or [0])
+        self.x, self.y = self.world_w/2, self.world_h/2
+
+def draw_heatmap(surf: pygame.Surface, view: pygame.Rect, spos: np.ndarray, colors: np.ndarray,
+                 tile: int = LOD_TILE):
+    # Ekran karosu başına ortalama ajan rengi, yoğunluğa göre (log) parlaklık; arka plana eklenir
+    tx, ty = -(-view.w // tile), -(-view.h // tile)
+    ix = ((spos[:, 0] - view.x) // tile).astype(np.int64)
+    iy = ((spos[:, 1] - view.y) // tile).astype(np.int64)
+    inside = (ix >= 0) & (ix < tx) & (iy >= 0) & (iy < ty)
+    cell = iy[inside]*tx + ix[inside]
+    if not len(cell):
+        return
+    cnt = np.bincount(cell, minlength=tx*ty)
+    rgb = np.column_stack([np.bincount(cell, weights=colors[inside, c], minlength=tx*ty) for c in range(3)])
+    level = np.log1p(cnt) / math.log1p(cnt.max())
+    img = rgb / np.maximum(cnt, 1)[:, None] * level[:, None]
+    # surfarray (genişlik, yükseklik, 3) bekler
+    small = pygame.surfarray.make_surface(img.reshape(ty, tx, 3).transpose(1, 0, 2).astype(np.uint8))
+    surf.blit(pygame.transform.scale(small, (tx*tile, ty*tile)), view.topleft,
+              special_flags=pygame.BLEND_ADD)
+
+# --- Yazı tipleri (çözülen yol diskte önbellekli) ---------------------------
+# SysFont her süreçte sistem yazı tiplerini tarar (Linux'ta fc-list: saniyeler).
+# match_font bir kez çağrılır, bulunan yol (bulunamadıysa None → pygame varsayılanı)
+# kullanıcı önbelleğine yazılır; sonraki açılışlar doğrudan Font(yol, boy) kurar.
+FONT_NAME = "Verdana"
+FONT_CACHE = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+                          'fakelights', 'fonts.json')
+_font_paths: Dict[str, Optional[str]] = {}
+
+def font_path(name: str) -> Optional[str]:
+    key = name.lower()
+    if key in _font_paths:
+        return _font_paths[key]
+    try:
+        with open(FONT_CACHE, encoding='utf-8') as fh:
+            cache = json.load(fh)
+    except (OSError, ValueError):
+        cache = {}
+    path = cache.get(key, '')
+    if path == '' or (path is not None and not os.path.exists(path)):
+        # önbellekte yok ya da dosya taşınmış: bir kez tara, sonucu sakla
+        path = cache[key] = pygame.font.match_font(name)
+        try:
+            os.makedirs(os.path.dirname(FONT_CACHE), exist_ok=True)
+            with open(FONT_CACHE, 'w', encoding='utf-8') as fh:
+                json.dump(cache, fh, indent=1)
+        except OSError:
+            pass                           # salt okunur ev dizini: yalnızca bu süreçte önbellek
+    _font_paths[key] = path
+    return path
+
+def load_font(size: int, name: str = FONT_NAME) -> pygame.font.Font:
+    if not pygame.font.get_init():
+        pygame.font.init()
+    return pygame.font.Font(font_path(name), size)
+
+# --- Pencere (isteğe bağlı görüntüleyici) ------------------------------------
+# pygame alt sistemleri yalnızca burada ve yalnızca gerekeni açılır: başsız
+# kullanımda hiçbiri, ekran dışı yüzeyde yalnızca font, pencerede display + font.
+class Viewer:
+    def __init__(self, sim: Simulation, speed: float = 1.0, surface: Optional[pygame.Surface] = None):
+        self.sim = sim
+        # Simülasyon ayrı iş parçacığında sabit dt ile; run() başlatır
+        self.runner = SimRunner(sim, speed=speed)
+        # surface verilirse pencere açılmaz: draw() bu yüzeye çizer (ör. kare dışa aktarma)
+        self.windowed = surface is None
+        if self.windowed:
+            pygame.display.init()
+            self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+            pygame.display.set_caption(TITLE)
+        else:
+            self.screen = surface
+        self.clock = pygame.time.Clock()
+        self.font = load_font(18)
+        self.font_small = load_font(14)
+        self.selected: Optional[int] = None
+        self.snapshot: Optional[Snapshot] = None   # son çizilen kare
+        self.play = pygame.Rect(0, 0, WIDTH-300, HEIGHT)
+        self.camera = Camera(sim.world_size, self.play)
+        self._src_pos = np.array([[s.pos.x, s.pos.y] for s in sim.sources], dtype=np.float64)
+        # kaynak glow + halka taşması (dünya birimi)
+        self._src_reach = max(sim.rules.orbit_base) + ORBIT_BW + 20
+        # Katmanlı çizim: kameraya bağlı dünya katmanı (kaynaklar + başlık), yalnızca
+        # preset değişince kurulan panel katmanı, değişince yeniden çizilen çubuklar
+        self._bg: Optional[pygame.Surface] = None
+        self._bg_key = None
+        self._panel: Optional[pygame.Surface] = None
+        self._panel_key = None
+        self._header: Optional[pygame.Surface] = None
+        self._bar_px: List[Optional[int]] = [None] * len(METRIC_BARS)
+        self._text_cache: Dict[str, pygame.Surface] = {}
+        self.show_perf = False
+
+    def _submit(self, fn, *args):
+        # Çalışan iş parçacığı varsa tikler arasında, yoksa hemen
+        if self.runner.running: self.runner.submit(fn, *args)
+        else: fn(*args)
+
+    def change_speed(self, step: int):
+        speeds = SIM_SPEEDS
+        i = min(range(len(speeds)), key=lambda k: abs(speeds[k] - self.runner.speed))
+        self.runner.speed = speeds[max(0, min(len(speeds)-1, i + step))]
+        self._submit(self.sim.push_note, f"Hız: {self.runner.speed:g}×")
+
+    def handle_events(self) -> bool:
+        for event in pygame.event.get():
+            if not self.handle_event(event):
+                return False
+        return True
+
+    def handle_event(self, event) -> bool:
+        # False: pencere kapansın
+        sim = self.sim
         if event.type == pygame.QUIT:
-            pygame.quit(); sys.exit(0)
+            return False
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_SPACE:
-                globals_state['paused'] = not globals_state['paused']
-                push_note("Duraklatıldı" if globals_state['paused'] else "Devam")
-            if event.key in PRESET_KEYS:
-                name = PRESET_KEYS[event.key]
-                if event.key == pygame.K_b: globals_state['bildirim_firtinasi'] = not globals_state['bildirim_firtinasi']
-                elif event.key == pygame.K_o: globals_state['digital_oruc'] = not globals_state['digital_oruc']
-                elif event.key == pygame.K_r: globals_state['ramazan'] = not globals_state['ramazan']
-                elif event.key == pygame.K_g: globals_state['destek_grubu'] = not globals_state['destek_grubu']
-                elif event.key == pygame.K_f: globals_state['filtre_acik'] = not globals_state['filtre_acik']
-                state = []
-                if globals_state['bildirim_firtinasi']: state.append('Bildirim')
-                if globals_state['digital_oruc']: state.append('Oruç')
-                if globals_state['ramazan']: state.append('Ramazan')
-                if globals_state['destek_grubu']: state.append('Destek')
-                if globals_state['filtre_acik']: state.append('Filtre')
-                push_note(f"Aktif: {', '.join(state) if state else 'Yok'}")
+                self._submit(sim.toggle_pause)
+            if event.key in PRESET_FLAGS:
+                self._submit(sim.toggle_preset, PRESET_FLAGS[event.key])
+            if event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                self.change_speed(+1)
+            if event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                self.change_speed(-1)
+            if event.key == pygame.K_p:
+                prof = sim.profiler
+                self.show_perf = not self.show_perf
+                if self.show_perf and not prof.enabled: prof.reset()
+                prof.enabled = self.show_perf or prof.pinned
+            if event.key == pygame.K_t:
+                if sim.profiler.events:
+                    path = time.strftime("trace_%Y%m%d_%H%M%S.json")
+                    sim.profiler.export_trace(path)
+                    self._submit(sim.push_note, f"Trace: {path}")
+                else:
+                    self._submit(sim.push_note, "Trace boş (P ile ölçümü aç)")
+            if event.key == pygame.K_HOME:
+                self.camera.fit()
+        if event.type == pygame.MOUSEWHEEL:
+            mx, my = pygame.mouse.get_pos()
+            if self.play.collidepoint(mx, my):
+                self.camera.zoom_by(event.y, mx, my)
+        if event.type == pygame.MOUSEMOTION and (event.buttons[1] or event.buttons[2]):
+            # orta/sağ tuşla sürükleyerek kaydırma
+            self.camera.pan(-event.rel[0], -event.rel[1])
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             mx, my = event.pos
-            if mx < WIDTH-300:
-                best = None; best_d = 9999
-                for a in agents:
-                    d = math.hypot(a.pos.x-mx, a.pos.y-my)
-                    if d < best_d and d < 18: best = a; best_d = d
-                if best:
-                    if selected_agent: selected_agent.selected = False
-                    selected_agent = best; selected_agent.selected = True
-
-    if not globals_state['paused']:
-        update_notifications(dt)
-
-        # Yoğunluk ölçümü
-        density = {t: 0 for t in ALL_TYPES}
-        for a in agents:
-            a.retarget(sources, globals_state)
-            tgt = next(s for s in sources if s.type == a.target_type)
-            a.move_orbit(tgt, dt)
-            r = RULES.orbit_base[tgt.type]
-            if abs((a.pos - tgt.pos).length() - r) <= ORBIT_BW: density[tgt.type] += 1
-        for k in density: density[k] = density[k] / max(1, AGENT_COUNT/5)
+            if self.play.collidepoint(mx, my) and self.snapshot is not None:
+                # ekranda görünen konumlar üzerinden seçim (dünya koordinatında)
+                wx, wy = self.camera.to_world(mx, my)
+                grid = SpatialGrid(*sim.world_size)
+                grid.rebuild(self.snapshot.pos)
+                best = grid.nearest(wx, wy, 18 / self.camera.zoom)
+                if best is not None:
+                    # seçim halkasını Viewer.draw çizer; runner yalnızca bilgi kutusunu yayınlar
+                    self.selected = self.runner.selected = best
+        return True
+
+    def update_camera(self, dt: float):
+        keys = pygame.key.get_pressed()
+        dx = (keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]) * PAN_SPEED * dt
+        dy = (keys[pygame.K_DOWN] - keys[pygame.K_UP]) * PAN_SPEED * dt
+        if dx or dy:
+            self.camera.pan(dx, dy)
+
+    def _visible_sources(self) -> List[int]:
+        cam = self.camera
+        return np.flatnonzero(cam.visible(self._src_pos, self._src_reach * cam.zoom)).tolist()
+
+    def _background_key(self, real_intensity: float):
+        # Boyut, Gerçek Işık renk kademesi ya da kamera değişince dünya katmanı yeniden kurulur
+        return (self.screen.get_size(), round(real_intensity * 20), self.camera.key())
+
+    def _panel_layer_key(self):
+        # Panel kameradan bağımsız: yalnızca boyut ve presetler (kontrol satırı vurgusu)
+        gs = self.sim.globals_state
+        return (self.screen.get_size(), tuple(gs[f] for f in PRESET_SHORT))
+
+    def _build_background(self, real_intensity: float) -> pygame.Surface:
+        sim, cam = self.sim, self.camera
+        bg = pygame.Surface(self.screen.get_size(), 0, self.screen)   # ekranla aynı piksel biçimi
+        bg.set_clip(self.play)
+        bg.fill(BLACK)
+        for i in self._visible_sources():
+            s = sim.sources[i]
+            s.draw_static(bg, self.font_small, sim.rules, real_intensity if s.type == REAL else 0.0,
+                          cam.point(s.pos.x, s.pos.y), cam.zoom)
+        if self._header is None:
+            self._header = pygame.Surface(self.play.size, pygame.SRCALPHA)
+            draw_header(self._header, self.font, self.font_small)
+        bg.blit(self._header, (0, 0))
+        bg.set_clip(None)
+        return bg
+
+    def _build_panel(self) -> pygame.Surface:
+        panel = pygame.Surface(self.screen.get_size(), 0, self.screen)
+        draw_panel_static(panel, self.font, self.font_small, self.sim.globals_state)
+        return panel
+
+    def draw_overlay(self, screen: pygame.Surface, snap: Snapshot):
+        # Alt sınıflar için: oyun alanına (kırpılmış) ek çizim, ör. tekrar zaman çizelgesi
+        pass
+
+    def draw(self):
+        sim, screen, font_small, cam = self.sim, self.screen, self.font_small, self.camera
+        phase = sim.profiler.phase
+        play = self.play
+        # İş parçacığı çalışıyorsa yayınlanan kare, yoksa (ör. bench) doğrudan simülasyon
+        snap = self.runner.read() if self.runner.running else Snapshot.capture(sim, self.selected)
+        self.snapshot = snap
+        with phase("arka plan", 1):
+            key = self._background_key(snap.real_intensity)
+            if key != self._bg_key:
+                self._bg, self._bg_key = self._build_background(snap.real_intensity), key
+            screen.blit(self._bg, play, play)
+            dirty = [play]
+            key = self._panel_layer_key()
+            if key != self._panel_key:
+                self._panel, self._panel_key = self._build_panel(), key
+                side = screen.get_rect().clip(pygame.Rect(play.right, 0, WIDTH - play.right, HEIGHT))
+                screen.blit(self._panel, side, side)
+                self._bar_px = [None] * len(METRIC_BARS)
+                dirty.append(side)
+
+        screen.set_clip(play)
+        with phase("kaynak glow", 1):
+            for i in self._visible_sources():
+                s = sim.sources[i]
+                s.draw_glow(screen, snap.real_intensity if s.type == REAL else 0.0,
+                            cam.point(s.pos.x, s.pos.y), cam.zoom)
+        with phase("ajan glow", 1):
+            vis = cam.visible(snap.pos, GLOW_LAYERS_AGENT[0][0])
+            spos = cam.to_screen(snap.pos[vis])
+            # uzaktan ya da ekran bütçesinden kalabalıksa ısı haritası (LOD)
+            if cam.zoom < LOD_ZOOM or len(spos) > play.w*play.h // LOD_AGENT_PX:
+                draw_heatmap(screen, play, spos, snap.colors[vis])
+            else:
+                draw_agents(screen, spos, snap.colors[vis])
+            if self.selected is not None:
+                x, y = cam.point(*snap.pos[self.selected])
+                pygame.draw.circle(screen, GOLD, (int(x), int(y)), AGENT_RADIUS+2, 1)
+            self.draw_overlay(screen, snap)
+        screen.set_clip(None)
+
+        with phase("panel", 1):
+            for i in range(len(METRIC_BARS)):
+                px = metric_bar_px(snap.stats, i)
+                if px != self._bar_px[i]:
+                    self._bar_px[i] = px
+                    dirty.append(draw_metric_bar(screen, i, px))
+
+        with phase("metin", 1):
+            draw_notifications(screen, snap.notifications, font_small, self._text_cache)
+            if snap.agent is not None: draw_agent_info(screen, snap.agent, font_small)
+            if self.show_perf:
+                rate = self.runner.tick_rate if self.runner.running else None
+                draw_perf_overlay(screen, sim.profiler, font_small, rate)
+        with phase("ekran", 1):
+            if self.windowed: pygame.display.update(dirty)
+
+    def run(self, until: Optional[float] = None):
+        # until: simülasyon saniyesi; dolunca pencere kapanır (None: kullanıcı kapatana dek)
+        prof = self.sim.profiler
+        self.runner.start()
+        try:
+            while True:
+                frame_dt = self.clock.tick(FPS) / 1000.0
+                t0 = time.perf_counter()
+                if not self.handle_events():
+                    break
+                self.update_camera(frame_dt)
+                self.draw()
+                prof.frame(t0, time.perf_counter())
+                if until is not None and self.snapshot.time >= until:
+                    break
+        finally:
+            self.runner.stop()
+            pygame.quit()
+
+
+# --- Komut satırı ------------------------------------------------------------
+def parse_size(text: str) -> Tuple[float, float]:
+    w, _, h = text.lower().partition('x')
+    try:
+        return float(w), float(h)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"GENxYÜK bekleniyor: {text!r}") from None
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=TITLE)
+    ap.add_argument('--agents', type=int, default=AGENT_COUNT)
+    ap.add_argument('--seed', type=int, default=None)
+    ap.add_argument('--presets', default='', help="'+' ile birleşik preset bayrakları (ör. ramazan+destek_grubu)")
+    ap.add_argument('--vectorized', action='store_true', help="NumPy popülasyonu")
+    ap.add_argument('--world-size', type=parse_size, default=None, metavar='GENxYÜK',
+                    help="büyük dünya (ör. 8000x8000); varsayılan: oyun alanı")
+    ap.add_argument('--sources-per-type', type=int, default=1)
+    ap.add_argument('--map-seed', type=int, default=0, help="büyük dünya kaynak haritası tohumu")
+    ap.add_argument('--coefficients', default=None, metavar='JSON',
+                    help="kural katsayıları (calibrate.py best.json ya da düz sözlük)")
+    ap.add_argument('--headless', action='store_true',
+                    help="pencere yok: süre boyunca olabildiğince hızlı koş, metrikleri JSON yaz")
+    ap.add_argument('--seconds', type=float, default=None,
+                    help="simülasyon süresi (başsızda varsayılan 60; pencerede kapatana dek)")
+    ap.add_argument('--speed', type=float, default=1.0, help="pencerede başlangıç hızı")
+    args = ap.parse_args(argv)
+
+    coefficients = None
+    if args.coefficients:
+        with open(args.coefficients, encoding='utf-8') as fh:
+            coefficients = json.load(fh)
+        coefficients = coefficients.get('coefficients', coefficients)
+    try:
+        sim = Simulation(args.agents, seed=args.seed, vectorized=args.vectorized,
+                         world_size=args.world_size, sources_per_type=args.sources_per_type,
+                         coefficients=coefficients, map_seed=args.map_seed)
+        sim.set_presets([f for f in args.presets.split('+') if f])
+    except ValueError as e:
+        ap.error(str(e))
+    if not args.headless:
+        Viewer(sim, speed=args.speed).run(until=args.seconds)
+        return 0
+    seconds = 60.0 if args.seconds is None else args.seconds
+    t0 = time.perf_counter()
+    sim.run(int(round(seconds * FPS)))
+    elapsed = time.perf_counter() - t0
+    json.dump(dict(sim.metrics(), ticks=sim.ticks, time=sim.time), sys.stdout, indent=1)
+    print()
+    print(f"{sim.ticks} tik: {elapsed:.2f} sn ({sim.ticks / max(elapsed, 1e-9):.0f} tik/sn)", file=sys.stderr)
+    return 0
 
-        # Etkileşim & dinamikler
-        real_count = 0
-        for a in agents:
-            tgt = next(s for s in sources if s.type == a.target_type)
-            a.contact_if_on_ring(tgt, density[tgt.type], globals_state)
-            a.natural_dynamics(dt)
-            if tgt.type == REAL and abs((a.pos - tgt.pos).length() - RULES.orbit_base[REAL]) <= ORBIT_BW:
-                real_count += 1
-        # Gerçek ışık parlaklığı
-        real_intensity += 0.0025 * real_count
-        real_intensity *= 0.997
-        real_intensity = clamp(real_intensity, 0.0, 1.0)
-
-    # Çizim
-    screen.fill(BLACK)
-    for s in sources:
-        s.draw(screen, font_small, real_intensity if s.type == REAL else 0.0)
-    for a in agents: a.draw(screen)
-    draw_panel(screen, agents)
-    draw_notifications(screen)
-    if selected_agent: draw_agent_info(screen, selected_agent)
 
-    header = font.render("Işık Bahçesi — Sahte Işıklar vs. Hakiki Nur", True, WHITE)
-    screen.blit(header, (18, 10))
-    sub = font_small.render("B:Bildirim  O:Oruç  R:Ramazan  G:Destek  F:Filtre  Space:Duraklat  Tık:Seç", True, GRAY)
-    screen.blit(sub, (18, 36))
-
-    pygame.display.flip()
+# --- Ana döngü ---------------------------------------------------------------
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,392 @@
+# Işık Bahçesi — canlı metrik sunucusu (asyncio, yerel HTTP + WebSocket)
+# -----------------------------------------------------------------------------
+# Simülasyonun yanında ayrı bir iş parçacığında asyncio döngüsü koşar; yalnızca
+# standart kütüphane (WebSocket çerçeveleme RFC 6455, metin çerçeveleri).
+#   GET /         küçük izleme sayfası (WebSocket istemcisi + preset düğmeleri)
+#   GET /state    son kare, JSON
+#   GET /metrics  son kare, Prometheus metin biçimi (Grafana vb. kazıyıcılar)
+#   GET /ws       WebSocket: kareler itilir; gelen komutlar:
+#                 {"toggle": "ramazan"}  {"presets": ["ramazan", ...]}  {"pause": true}
+# Kare: draw_panel ortalamaları, kaynak başına ring doluluğu, real_intensity,
+# tik hızı ve faz süreleri. En çok --rate Hz'de bir kurulur (sim iş parçacığında).
+# Sim iş parçacığı hiçbir zaman beklemez: kare call_soon_threadsafe ile devredilir,
+# her istemcinin 1 karelik kuyruğu vardır ve yavaş istemcide eski kare atılır.
+# Komutlar sim iş parçacığında tikler arasında uygulanır (Viewer'da runner.submit).
+# -----------------------------------------------------------------------------
+# Örnek:
+#   python live.py --agents 2000 --vectorized --port 8765          # başsız, sonsuz
+#   python live.py --view --presets ramazan                         # pencere + sunucu
+#   curl -s localhost:8765/metrics
+# -----------------------------------------------------------------------------
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+from typing import Dict, Optional, Set
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import fakelights as fl
+
+WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC11B85"
+MAX_MESSAGE = 64 * 1024       # istemciden gelen en büyük WebSocket yükü
+MAX_HEADER = 16 * 1024
+
+PAGE = """<!doctype html><meta charset="utf-8"><title>%(title)s</title>
+<style>body{background:#0a0c12;color:#f0f0f0;font:14px monospace;margin:20px}
+button{margin:2px;background:#202430;color:#f0f0f0;border:1px solid #303642;padding:4px 8px}
+button.on{background:#f8dc78;color:#0a0c12}</style>
+<h3>%(title)s</h3><div id="btn"></div><pre id="out">bağlanıyor…</pre>
+<script>
+const presets = %(presets)s, btn = document.getElementById('btn');
+const ws = new WebSocket((location.protocol == 'https:' ? 'wss://' : 'ws://') + location.host + '/ws');
+for (const [flag, label] of Object.entries(presets)) {
+  const b = document.createElement('button'); b.id = flag; b.textContent = label;
+  b.onclick = () => ws.send(JSON.stringify({toggle: flag})); btn.appendChild(b);
+}
+const p = document.createElement('button'); p.id = 'paused'; p.textContent = 'Duraklat';
+p.onclick = () => ws.send(JSON.stringify({pause: true})); btn.appendChild(p);
+ws.onmessage = (e) => {
+  const f = JSON.parse(e.data);
+  if (f.error) { console.warn(f.error); return; }
+  for (const k in f.presets) document.getElementById(k).className = f.presets[k] ? 'on' : '';
+  p.className = f.paused ? 'on' : '';
+  document.getElementById('out').textContent = JSON.stringify(f, null, 1);
+};
+ws.onclose = () => document.getElementById('out').textContent += '\\n— bağlantı kapandı';
+</script>
+"""
+
+
+# --- WebSocket çerçeveleri ----------------------------------------------------
+def ws_accept(key: str) -> str:
+    return base64.b64encode(hashlib.sha1(key.encode() + WS_GUID).digest()).decode()
+
+
+def ws_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    # Sunucu çerçeveleri maskesiz, tek parça (FIN)
+    n = len(payload)
+    if n < 126:
+        head = struct.pack('!BB', 0x80 | opcode, n)
+    elif n < 1 << 16:
+        head = struct.pack('!BBH', 0x80 | opcode, 126, n)
+    else:
+        head = struct.pack('!BBQ', 0x80 | opcode, 127, n)
+    return head + payload
+
+
+async def ws_read(reader: asyncio.StreamReader):
+    # (opcode, yük); istemci çerçeveleri maskeli olmak zorunda
+    b0, b1 = await reader.readexactly(2)
+    opcode, n = b0 & 0x0F, b1 & 0x7F
+    if not b0 & 0x80 or not b1 & 0x80:
+        raise ValueError("parçalı ya da maskesiz çerçeve")
+    if n == 126:
+        n, = struct.unpack('!H', await reader.readexactly(2))
+    elif n == 127:
+        n, = struct.unpack('!Q', await reader.readexactly(8))
+    if n > MAX_MESSAGE:
+        raise ValueError("çerçeve çok büyük")
+    mask = await reader.readexactly(4)
+    data = await reader.readexactly(n)
+    return opcode, bytes(b ^ mask[i & 3] for i, b in enumerate(data))
+
+
+# --- Kare ---------------------------------------------------------------------
+def build_frame(sim: fl.Simulation, tick_rate: float) -> Dict:
+    occ = sim.ring_occupancy.tolist()
+    return {
+        'tick': sim.ticks,
+        'time': sim.time,
+        'tick_rate': tick_rate,
+        'paused': sim.globals_state['paused'],
+        'presets': {f: sim.globals_state[f] for f in fl.PRESET_SHORT},
+        'stats': sim.panel_stats(),
+        'real_intensity': float(sim.real_intensity),
+        'sources': [{'label': s.label, 'type': fl.TYPE_NAMES[s.type], 'occupancy': occ[i]}
+                    for i, s in enumerate(sim.sources)],
+        'phases_ms': sim.profiler.averages_ms(),
+    }
+
+
+def prometheus(frame: Dict) -> str:
+    def esc(v):
+        return str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    out = [f"fakelights_tick {frame['tick']}",
+           f"fakelights_time_seconds {frame['time']}",
+           f"fakelights_tick_rate {frame['tick_rate']}",
+           f"fakelights_paused {int(frame['paused'])}",
+           f"fakelights_real_intensity {frame['real_intensity']}"]
+    out += [f'fakelights_preset{{flag="{k}"}} {int(v)}' for k, v in frame['presets'].items()]
+    out += [f'fakelights_stat{{name="{k}"}} {v}' for k, v in frame['stats'].items()]
+    out += [f'fakelights_ring_occupancy{{source="{esc(s["label"])}",index="{i}",type="{esc(s["type"])}"}} '
+            f'{s["occupancy"]}' for i, s in enumerate(frame['sources'])]
+    out += [f'fakelights_phase_ms{{phase="{esc(k)}"}} {v}' for k, v in frame['phases_ms'].items()]
+    return '\n'.join(out) + '\n'
+
+
+# --- Sunucu -------------------------------------------------------------------
+class LiveServer:
+    def __init__(self, sim: fl.Simulation, host: str = '127.0.0.1', port: int = 8765,
+                 rate: float = 5.0, submit=None):
+        self.sim = sim
+        self.host = host
+        self.port = port
+        self.interval = 1.0 / rate
+        # submit(fn, *args) komutu sim iş parçacığına iletir (ör. SimRunner.submit);
+        # verilmezse komutlar burada bekler ve tick() uygular
+        self._submit = submit
+        self._commands: "queue.SimpleQueue" = queue.SimpleQueue()
+        self.frame: Optional[Dict] = None
+        self.dropped = 0              # yavaş istemciler yüzünden atılan kare sayısı
+        self._clients: Set[asyncio.Queue] = set()
+        self._handlers: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+        self._last = 0.0
+        self._last_tick = (sim.ticks, time.perf_counter())
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+        if isinstance(sim, fl.Ensemble):
+            raise ValueError("LiveServer tek dünyalı Simulation ister")
+        # faz süreleri karede; pinned: Viewer'ın P tuşu yalnızca kaplamayı kapatır
+        sim.profiler.enabled = sim.profiler.pinned = True
+
+    # --- sim iş parçacığı tarafı ---
+    def tick(self):
+        # Her tikten sonra (SimRunner.on_tick ya da başsız döngü); hiç beklemez
+        while True:
+            try:
+                fn, args = self._commands.get_nowait()
+            except queue.Empty:
+                break
+            self._apply(fn, *args)
+        if time.perf_counter() - self._last >= self.interval:
+            self.publish()
+
+    def publish(self):
+        now = time.perf_counter()
+        t0, w0 = self._last_tick
+        rate = (self.sim.ticks - t0) / (now - w0) if now > w0 else 0.0
+        self._last, self._last_tick = now, (self.sim.ticks, now)
+        frame = build_frame(self.sim, rate)
+        payload = ws_frame(json.dumps(frame, ensure_ascii=False).encode())
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._broadcast, frame, payload)
+            except RuntimeError:
+                pass                  # döngü kapandı
+
+    def _apply(self, fn, *args):
+        fn(*args)
+        self.publish()                # duraklatılmışken de istemciler yeni durumu görsün
+
+    def command(self, msg: Dict):
+        # Döngü iş parçacığında doğrulanır; ValueError istemciye hata olarak döner
+        if 'toggle' in msg:
+            flag = msg['toggle']
+            if flag not in fl.PRESET_SHORT:
+                raise ValueError(f"bilinmeyen preset: {flag}")
+            fn, args = self.sim.toggle_preset, (flag,)
+        elif 'presets' in msg:
+            flags = msg['presets']
+            if not isinstance(flags, list) or set(flags) - set(fl.PRESET_SHORT):
+                raise ValueError(f"geçersiz preset listesi: {flags}")
+            fn, args = self.sim.set_presets, (flags,)
+        elif 'pause' in msg:
+            fn, args = self.sim.toggle_pause, ()
+        else:
+            raise ValueError("komut yok (toggle / presets / pause)")
+        if self._submit is not None:
+            self._submit(self._apply, fn, *args)
+        else:
+            self._commands.put((fn, args))
+
+    # --- asyncio döngüsü tarafı ---
+    def _broadcast(self, frame: Dict, payload: bytes):
+        self.frame = frame
+        for q in self._clients:
+            if q.full():
+                q.get_nowait()        # eski kare atılır: istemci en yenisini alır
+                self.dropped += 1
+            q.put_nowait(payload)
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        try:
+            server = await asyncio.start_server(self._handle, self.host, self.port, limit=MAX_HEADER)
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+            return
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        async with server:
+            await self._stopping.wait()
+            # açık WebSocket'ler kapanmadan sunucu kapanmaz; abort: okumayan istemcinin
+            # dolu tamponu boşalmayı beklemez
+            for w in list(self._handlers):
+                w.transport.abort()
+            await asyncio.gather(*self._handlers.values(), return_exceptions=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._handlers[writer] = asyncio.current_task()
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+            lines = head.decode('latin-1').split('\r\n')
+            method, path, _ = lines[0].split(' ', 2)
+            headers = {k.strip().lower(): v.strip() for k, _, v in
+                       (ln.partition(':') for ln in lines[1:] if ln)}
+            path = path.split('?', 1)[0]
+            if method != 'GET':
+                self._respond(writer, 405, 'text/plain', b'yalnizca GET\n')
+            elif path == '/ws' and headers.get('upgrade', '').lower() == 'websocket':
+                await self._websocket(reader, writer, headers)
+            elif path == '/':
+                page = PAGE % {'title': fl.TITLE, 'presets': json.dumps(fl.PRESET_SHORT, ensure_ascii=False)}
+                self._respond(writer, 200, 'text/html; charset=utf-8', page.encode())
+            elif path in ('/state', '/metrics'):
+                if self.frame is None:
+                    self._respond(writer, 503, 'text/plain', b'henuz kare yok\n')
+                elif path == '/state':
+                    self._respond(writer, 200, 'application/json',
+                                  json.dumps(self.frame, ensure_ascii=False).encode())
+                else:
+                    self._respond(writer, 200, 'text/plain; version=0.0.4; charset=utf-8',
+                                  prometheus(self.frame).encode())
+            else:
+                self._respond(writer, 404, 'text/plain', b'yok\n')
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass
+        finally:
+            self._handlers.pop(writer, None)
+            writer.close()
+
+    @staticmethod
+    def _respond(writer: asyncio.StreamWriter, status: int, ctype: str, body: bytes):
+        reason = {200: 'OK', 404: 'Not Found', 405: 'Method Not Allowed', 503: 'Service Unavailable'}[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: {ctype}\r\n"
+                     f"Content-Length: {len(body)}\r\nCache-Control: no-store\r\n"
+                     f"Connection: close\r\n\r\n".encode() + body)
+
+    async def _websocket(self, reader, writer, headers):
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {ws_accept(headers.get('sec-websocket-key', ''))}\r\n\r\n").encode())
+        q: asyncio.Queue = asyncio.Queue(maxsize=1)
+        lock = asyncio.Lock()         # gönderici ve hata/pong yanıtları aynı soketi paylaşır
+
+        async def send(data: bytes):
+            async with lock:
+                writer.write(data)
+                await writer.drain()
+
+        async def sender():
+            try:
+                while True:
+                    await send(await q.get())
+            except ConnectionError:
+                pass                  # okuyucu da EOF görüp çıkar
+
+        if self.frame is not None:
+            q.put_nowait(ws_frame(json.dumps(self.frame, ensure_ascii=False).encode()))
+        self._clients.add(q)
+        task = asyncio.create_task(sender())
+        try:
+            while True:
+                opcode, data = await ws_read(reader)
+                if opcode == 0x8:
+                    await send(ws_frame(data[:2], 0x8))
+                    break
+                if opcode == 0x9:
+                    await send(ws_frame(data, 0xA))
+                elif opcode == 0x1:
+                    try:
+                        msg = json.loads(data)
+                        if not isinstance(msg, dict):
+                            raise ValueError("JSON nesnesi bekleniyor")
+                        self.command(msg)
+                    except ValueError as e:
+                        await send(ws_frame(json.dumps({'error': str(e)}, ensure_ascii=False).encode()))
+        finally:
+            self._clients.discard(q)
+            task.cancel()
+
+    # --- yaşam döngüsü ---
+    def start(self):
+        self._thread = threading.Thread(target=asyncio.run, args=(self._main(),),
+                                        name="live-server", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        self.publish()
+        return self
+
+    def stop(self):
+        self.sim.profiler.pinned = False
+        if self._loop is not None and self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Canlı metrik sunucusu (HTTP + WebSocket)")
+    ap.add_argument('--agents', type=int, default=fl.AGENT_COUNT)
+    ap.add_argument('--seed', type=int, default=None)
+    ap.add_argument('--vectorized', action='store_true')
+    ap.add_argument('--presets', default='', help="'+' ile birleşik preset bayrakları")
+    ap.add_argument('--ticks', type=int, default=None, help="başsız koşu uzunluğu (varsayılan: Ctrl+C'ye dek)")
+    ap.add_argument('--view', action='store_true', help="pencereyi aç (sim SimRunner'da, gerçek zamanlı)")
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=8765)
+    ap.add_argument('--rate', type=float, default=5.0, help="kare itme sıklığı (Hz)")
+    args = ap.parse_args(argv)
+
+    sim = fl.Simulation(args.agents, seed=args.seed, vectorized=args.vectorized)
+    sim.set_presets([f for f in args.presets.split('+') if f])
+    if args.view:
+        viewer = fl.Viewer(sim)
+        server = LiveServer(sim, args.host, args.port, args.rate, submit=viewer.runner.submit)
+        viewer.runner.on_tick = server.tick
+    else:
+        server = LiveServer(sim, args.host, args.port, args.rate)
+    with server:
+        print(f"http://{args.host}:{server.port}/", file=sys.stderr)
+        try:
+            if args.view:
+                viewer.run()
+            else:
+                # olabildiğince hızlı; duraklatılınca yalnızca komut/kare döngüsü
+                dt = 1.0 / fl.FPS
+                while args.ticks is None or sim.ticks < args.ticks:
+                    if sim.globals_state['paused']:
+                        time.sleep(dt)
+                    else:
+                        sim.step(dt)
+                    server.tick()
+        except KeyboardInterrupt:
+            pass
+    print(f"{sim.ticks} tik, {server.dropped} eski kare atıldı", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
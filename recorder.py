@@ -0,0 +1,182 @@
+# Işık Bahçesi — akışlı metrik kaydedici
+# -----------------------------------------------------------------------------
+# Her örnekte (sample_every tikte bir) panel ortalamaları, real_intensity, kaynak
+# başına ring doluluğu ve iç/baz ışık histogramları tek vektörel geçişte alınır,
+# önceden ayrılmış parça tamponlarına yazılır. Dolan parça arka plan yazıcı
+# iş parçacığına verilir ve `chunk_00000.npz` ... olarak (sütun başına bir dizi)
+# diske yazılır; bellek kullanımı parça boyu × kuyruk uzunluğu ile sınırlı.
+# Kuyruk doluysa (disk simülasyona yetişemiyorsa) simülasyon beklemez: parça
+# atılır, dropped_chunks artar ve o parçanın numarası diskte boş kalır.
+# -----------------------------------------------------------------------------
+# Örnek:
+#   rec = MetricsRecorder("kayit/", sim, sample_every=10)
+#   for _ in range(n): sim.step(dt); rec.sample()
+#   rec.close()
+#   data = load_recording("kayit/")      # sütun → birleştirilmiş dizi
+#
+#   python recorder.py --agents 20000 --vectorized --ticks 216000 --every 60 --out kayit/
+# -----------------------------------------------------------------------------
+
+import argparse
+import glob
+import json
+import os
+import queue
+import sys
+import threading
+from typing import Dict, Optional
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+
+import fakelights as fl
+
+SCALARS = ('tick', 'time', 'avg_inner', 'loneliness', 'avg_health', 'avg_ties',
+           'avg_des', 'avg_hed', 'real_intensity')
+HIST_EDGES = np.linspace(0.0, 100.0, 21)
+
+
+def light_arrays(sim: fl.Simulation):
+    # İç ve baz ışık dizileri (nesne modunda panel ortalamalarıyla aynı geçişten)
+    c = sim.agent_columns()
+    return c['inner_light'], c['base_light']
+
+
+class MetricsRecorder:
+    def __init__(self, out_dir: str, sim: fl.Simulation, sample_every: int = 1,
+                 chunk_rows: int = 4096, max_pending: int = 4, edges: np.ndarray = HIST_EDGES):
+        if isinstance(sim, fl.Ensemble):
+            raise ValueError("MetricsRecorder tek dünyalı Simulation ister (Ensemble metrikleri dünya başına liste)")
+        self.out_dir = out_dir
+        self.sim = sim
+        self.sample_every = max(1, sample_every)
+        self.chunk_rows = chunk_rows
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.n_sources = len(sim.sources)
+        self.rows = 0
+        self.chunks = 0
+        self.dropped_chunks = 0
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max_pending)
+        self._error: Optional[BaseException] = None
+        os.makedirs(out_dir, exist_ok=True)
+        self._new_buffer()
+        with open(os.path.join(out_dir, 'meta.json'), 'w') as fh:
+            json.dump({
+                'scalars': list(SCALARS),
+                'sources': [s.label for s in sim.sources],
+                'source_types': [fl.TYPE_NAMES[s.type] for s in sim.sources],
+                'hist_edges': self.edges.tolist(),
+                'sample_every': self.sample_every,
+                'agents': sim.agent_count,
+            }, fh, ensure_ascii=False, indent=1)
+        self._writer = threading.Thread(target=self._write_loop, name="metrics-writer", daemon=True)
+        self._writer.start()
+
+    def _new_buffer(self):
+        n, bins = self.chunk_rows, len(self.edges) - 1
+        self._buf = {k: np.zeros(n) for k in SCALARS}
+        self._buf['ring_occupancy'] = np.zeros((n, self.n_sources), dtype=np.int64)
+        self._buf['hist_inner'] = np.zeros((n, bins), dtype=np.int64)
+        self._buf['hist_base'] = np.zeros((n, bins), dtype=np.int64)
+        self._fill = 0
+
+    # --- Örnekleme (simülasyon iş parçacığı) ---------------------------------
+    def sample(self, force: bool = False):
+        sim = self.sim
+        if not force and sim.ticks % self.sample_every:
+            return
+        if self._error is not None:
+            raise RuntimeError("metrik yazıcı hata verdi") from self._error
+        i, b = self._fill, self._buf
+        stats = sim.metrics()
+        b['tick'][i] = sim.ticks
+        b['time'][i] = sim.time
+        for k in SCALARS[2:]:
+            b[k][i] = stats[k]
+        b['ring_occupancy'][i] = sim.ring_occupancy
+        # aralık dışı değerler uç kovalara (inner_light tik sonunda 0'ın biraz altına inebilir);
+        # kova toplamı her zaman ajan sayısı
+        lo, hi = self.edges[0], self.edges[-1]
+        inner, base = light_arrays(sim)
+        b['hist_inner'][i] = np.histogram(np.clip(inner, lo, hi), self.edges)[0]
+        b['hist_base'][i] = np.histogram(np.clip(base, lo, hi), self.edges)[0]
+        self._fill += 1
+        self.rows += 1
+        if self._fill == self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._fill:
+            return
+        data = {k: v[:self._fill] for k, v in self._buf.items()}
+        # kuyruk doluysa beklemeden parçayı at: simülasyon tiki ve bellek sınırı önceliklidir
+        try:
+            self._queue.put_nowait((self.chunks, data))
+        except queue.Full:
+            self.dropped_chunks += 1
+        self.chunks += 1
+        self._new_buffer()
+
+    def close(self):
+        self.flush()
+        self._queue.put(None)
+        self._writer.join()
+        if self._error is not None:
+            raise RuntimeError("metrik yazıcı hata verdi") from self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Yazıcı iş parçacığı -------------------------------------------------
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            idx, data = item
+            try:
+                path = os.path.join(self.out_dir, f"chunk_{idx:05d}.npz")
+                tmp = path + ".tmp"
+                with open(tmp, 'wb') as fh:
+                    np.savez(fh, **data)
+                os.replace(tmp, path)
+            except BaseException as e:  # ana iş parçacığı bir sonraki sample()'da yükseltir
+                self._error = e
+
+
+def load_recording(out_dir: str) -> Dict[str, np.ndarray]:
+    parts = sorted(glob.glob(os.path.join(out_dir, "chunk_*.npz")))
+    if not parts:
+        return {}
+    loaded = [np.load(p) for p in parts]
+    return {k: np.concatenate([d[k] for d in loaded]) for k in loaded[0].files}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Başsız koşu + metrik zaman serisi kaydı")
+    ap.add_argument('--agents', type=int, default=fl.AGENT_COUNT)
+    ap.add_argument('--seed', type=int, default=None)
+    ap.add_argument('--vectorized', action='store_true')
+    ap.add_argument('--ticks', type=int, default=60*fl.FPS)
+    ap.add_argument('--every', type=int, default=1, help="örnekleme aralığı (tik)")
+    ap.add_argument('--chunk-rows', type=int, default=4096)
+    ap.add_argument('--presets', default='', help="'+' ile birleşik preset bayrakları")
+    ap.add_argument('--out', required=True)
+    args = ap.parse_args(argv)
+
+    sim = fl.Simulation(args.agents, seed=args.seed, vectorized=args.vectorized)
+    sim.set_presets([f for f in args.presets.split('+') if f])
+    dt = 1.0 / fl.FPS
+    with MetricsRecorder(args.out, sim, args.every, args.chunk_rows) as rec:
+        for _ in range(args.ticks):
+            sim.step(dt)
+            rec.sample()
+    print(f"{rec.rows} örnek, {rec.chunks} parça ({rec.dropped_chunks} atıldı) → {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
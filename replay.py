@@ -0,0 +1,459 @@
+# Işık Bahçesi — kontrol noktaları, tekrar kaydı ve zaman çizelgesinde gezinme
+# -----------------------------------------------------------------------------
+# Kayıt dizini:
+#   meta.json            simülasyon sınıfı + kurucu argümanları, dt, aralık
+#   ckpt_000000600.bin   checkpoint_every tikte bir tam durum (ikili)
+#   ticks.bin            tik başına bir satır (TICK_DTYPE): zaman çizelgesi
+#   events.bin           preset/duraklatma çağrıları (EVENT_DTYPE), kendi tikleriyle
+# Kontrol noktası dosyası: 16 baytlık başlık (sihirli sayı + JSON boyu), JSON
+# (sim meta + dizi tablosu), ardından 64 bayta hizalı ham diziler. Hepsi mmap
+# üzerinden yazılır; yükleme sıfır kopya (diziler dosyaya bakan görünümler,
+# yalnızca restore_state canlı durum dizilerine bir kez kopyalar).
+# Bir tike gitme: önceki en yakın kontrol noktası + başsız ileri sarma; kayıtlı
+# çağrılar kendi tiklerinde yeniden uygulanır (adımlar deterministik).
+# -----------------------------------------------------------------------------
+# Örnek:
+#   rec = ReplayWriter("tekrar/", sim, checkpoint_every=600)
+#   for _ in range(n): sim.step(dt); rec.record()
+#   rec.close()
+#   rp = Replay("tekrar/"); rp.seek(123_456); rp.sim.metrics()
+#
+#   python replay.py record --agents 20000 --vectorized --ticks 216000 --out tekrar/
+#   python replay.py record --view --out tekrar/     # pencereli oturumu kaydet
+#   python replay.py seek tekrar/ --tick 100000     # başsız: o tikteki metrikler
+#   python replay.py view tekrar/                   # kayıttan oynat, çizelgede gez
+# -----------------------------------------------------------------------------
+
+import argparse
+import bisect
+import glob
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+
+import fakelights as fl
+
+MAGIC = b"FLCKPT01"
+ALIGN = 64
+CHECKPOINT_EVERY = 600        # tik (60 FPS'te 10 sn): en kötü ileri sarma bu kadar tik
+
+TICK_DTYPE = np.dtype([('tick', '<i8'), ('time', '<f8'), ('real_intensity', '<f8'),
+                       ('avg_inner', '<f8'), ('avg_health', '<f8'), ('avg_ties', '<f8'),
+                       ('avg_des', '<f8'), ('avg_hed', '<f8')])
+# op: CALLS indeksi; flags: preset bit maskesi (PRESETS sırası); world: -1 = tümü
+EVENT_DTYPE = np.dtype([('tick', '<i8'), ('op', 'u1'), ('flags', 'u1'), ('world', '<i2')])
+CALLS = ('toggle_preset', 'set_presets', 'toggle_pause')
+PRESETS = list(fl.PRESET_SHORT)
+SIM_CLASSES = {'Simulation': fl.Simulation, 'Ensemble': fl.Ensemble}
+
+
+def _aligned(n: int) -> int:
+    return -(-n // ALIGN) * ALIGN
+
+
+def checkpoint_path(out_dir: str, tick: int) -> str:
+    return os.path.join(out_dir, f"ckpt_{tick:09d}.bin")
+
+
+# --- Kontrol noktası dosyası ----------------------------------------------------
+def write_checkpoint(path: str, arrays: Dict[str, np.ndarray], meta: Dict):
+    arrays = {name: a if a.flags.c_contiguous else a.copy() for name, a in arrays.items()}
+    table, off = {}, 0
+    for name, a in arrays.items():
+        table[name] = {'dtype': a.dtype.str, 'shape': list(a.shape), 'offset': off}
+        off += _aligned(a.nbytes)
+    header = json.dumps({'meta': meta, 'arrays': table}, ensure_ascii=False).encode()
+    base = _aligned(16 + len(header))
+    tmp = path + ".tmp"
+    with open(tmp, 'w+b') as fh:
+        fh.truncate(base + off)
+        with mmap.mmap(fh.fileno(), base + off) as mm:
+            mm[:16] = MAGIC + struct.pack('<Q', len(header))
+            mm[16:16 + len(header)] = header
+            for name, a in arrays.items():
+                if a.nbytes:
+                    start = base + table[name]['offset']
+                    mm[start:start + a.nbytes] = a.reshape(-1).view(np.uint8)
+            mm.flush()
+    os.replace(tmp, path)
+
+
+class Checkpoint:
+    # Salt okunur mmap; arrays dosyaya bakan görünümler (kopya yok)
+    def __init__(self, path: str):
+        with open(path, 'rb') as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:8] != MAGIC:
+            raise ValueError(f"kontrol noktası değil: {path}")
+        n = struct.unpack('<Q', self._mm[8:16])[0]
+        head = json.loads(self._mm[16:16 + n])
+        base = _aligned(16 + n)
+        self.meta = head['meta']
+        self.arrays = {}
+        for name, spec in head['arrays'].items():
+            dtype, shape = np.dtype(spec['dtype']), tuple(spec['shape'])
+            count = int(np.prod(shape))
+            if not count:
+                self.arrays[name] = np.zeros(shape, dtype)
+                continue
+            a = np.frombuffer(self._mm, dtype, count, base + spec['offset'])
+            self.arrays[name] = a.reshape(shape)
+
+    def close(self):
+        # görünümler bırakılmadan mmap kapanmaz
+        self.arrays = {}
+        self._mm.close()
+
+
+# --- Sabit boy kayıt günlüğü ----------------------------------------------------
+class MappedLog:
+    # Yalnızca sona ekleme; dosya kapasite kadar büyütülüp mmap'lenir (dolunca iki
+    # katı), kapanışta yazılan satır sayısına kırpılır.
+    def __init__(self, path: str, dtype: np.dtype, capacity: int = 4096):
+        self.dtype = np.dtype(dtype)
+        self.n = 0
+        self._fh = open(path, 'w+b')
+        self._map(capacity)
+
+    def _map(self, capacity: int):
+        self.capacity = capacity
+        self._fh.truncate(capacity * self.dtype.itemsize)
+        self._mm = mmap.mmap(self._fh.fileno(), capacity * self.dtype.itemsize)
+        self._rows = np.frombuffer(self._mm, self.dtype)
+
+    def _unmap(self):
+        self._rows = None
+        self._mm.flush()
+        self._mm.close()
+
+    def append(self, row: tuple):
+        if self.n == self.capacity:
+            self._unmap()
+            self._map(self.capacity * 2)
+        self._rows[self.n] = row
+        self.n += 1
+
+    def close(self):
+        self._unmap()
+        self._fh.truncate(self.n * self.dtype.itemsize)
+        self._fh.close()
+
+
+def read_log(path: str, dtype: np.dtype) -> np.ndarray:
+    # Sıfır kopya okuma (boş dosya mmap'lenemez)
+    if not os.path.exists(path) or not os.path.getsize(path):
+        return np.zeros(0, dtype)
+    return np.memmap(path, dtype, mode='r')
+
+
+# --- Kayıt --------------------------------------------------------------------------
+def encode_call(tick: int, name: str, args: tuple) -> tuple:
+    if name == 'toggle_preset':
+        return (tick, CALLS.index(name), 1 << PRESETS.index(args[0]), -1)
+    if name == 'set_presets':
+        mask = sum(1 << PRESETS.index(f) for f in args[0])
+        world = args[1] if len(args) > 1 and args[1] is not None else -1
+        return (tick, CALLS.index(name), mask, world)
+    return (tick, CALLS.index(name), 0, -1)
+
+
+def decode_call(row) -> Tuple[str, tuple]:
+    name = CALLS[int(row['op'])]
+    flags = [f for i, f in enumerate(PRESETS) if int(row['flags']) >> i & 1]
+    if name == 'toggle_preset':
+        return name, (flags[0],)
+    if name == 'set_presets':
+        return name, (flags,) if row['world'] < 0 else (flags, int(row['world']))
+    return name, ()
+
+
+class ReplayWriter:
+    def __init__(self, out_dir: str, sim: fl.Simulation, checkpoint_every: int = CHECKPOINT_EVERY,
+                 dt: float = 1.0/fl.FPS):
+        self.out_dir = out_dir
+        self.sim = sim
+        self.every = max(1, checkpoint_every)
+        self.checkpoints = 0
+        os.makedirs(out_dir, exist_ok=True)
+        for old in glob.glob(os.path.join(out_dir, "ckpt_*.bin")):
+            os.remove(old)
+        self._meta = {
+            'class': type(sim).__name__,
+            'config': sim.config,
+            'dt': dt,
+            'checkpoint_every': self.every,
+            'start_tick': sim.ticks,
+        }
+        self._write_meta()
+        self.ticks = MappedLog(os.path.join(out_dir, 'ticks.bin'), TICK_DTYPE)
+        self.events = MappedLog(os.path.join(out_dir, 'events.bin'), EVENT_DTYPE, capacity=64)
+        sim.call_log = []
+        self.checkpoint()
+
+    def _write_meta(self):
+        with open(os.path.join(self.out_dir, 'meta.json'), 'w') as fh:
+            json.dump(self._meta, fh, ensure_ascii=False, indent=1)
+
+    def checkpoint(self):
+        arrays, meta = self.sim.checkpoint_state()
+        write_checkpoint(checkpoint_path(self.out_dir, self.sim.ticks), arrays, meta)
+        self.checkpoints += 1
+
+    def _drain_calls(self):
+        calls, self.sim.call_log = self.sim.call_log, []
+        for tick, name, args in calls:
+            self.events.append(encode_call(tick, name, args))
+
+    def record(self):
+        # Her sim.step'ten sonra, simülasyonla aynı iş parçacığında
+        sim = self.sim
+        self._drain_calls()
+        st = sim.panel_stats()
+        self.ticks.append((sim.ticks, sim.time, float(np.mean(sim.real_intensity)), st['avg_inner'],
+                           st['avg_health'], st['avg_ties'], st['avg_des'], st['avg_hed']))
+        if sim.ticks % self.every == 0:
+            self.checkpoint()
+
+    def close(self):
+        self._drain_calls()
+        self.sim.call_log = None
+        self.ticks.close()
+        self.events.close()
+        self._meta['end_tick'] = self.sim.ticks
+        self._write_meta()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- Oynatma ------------------------------------------------------------------------
+class Replay:
+    def __init__(self, out_dir: str, profiler: Optional[fl.PhaseProfiler] = None):
+        self.out_dir = out_dir
+        with open(os.path.join(out_dir, 'meta.json')) as fh:
+            self.meta = json.load(fh)
+        config = dict(self.meta['config'])
+        if config.get('world_size') is not None:
+            config['world_size'] = tuple(config['world_size'])
+        self.sim = SIM_CLASSES[self.meta['class']](**config, profiler=profiler)
+        self.dt = self.meta['dt']
+        self.ticks = read_log(os.path.join(out_dir, 'ticks.bin'), TICK_DTYPE)
+        self.events = read_log(os.path.join(out_dir, 'events.bin'), EVENT_DTYPE)
+        names = glob.glob(os.path.join(out_dir, "ckpt_*.bin"))
+        self.checkpoint_ticks = sorted(int(os.path.basename(p)[5:14]) for p in names)
+        if not self.checkpoint_ticks:
+            raise ValueError(f"kontrol noktası yok: {out_dir}")
+        self.start = self.checkpoint_ticks[0]
+        self.end = max(self.checkpoint_ticks[-1], int(self.ticks['tick'][-1]) if len(self.ticks) else 0)
+        self._restore(self.start)
+
+    def _restore(self, tick: int):
+        ck = Checkpoint(checkpoint_path(self.out_dir, tick))
+        try:
+            self.sim.restore_state(ck.arrays, ck.meta)
+        finally:
+            ck.close()
+
+    def step(self):
+        # Bir tik: önce o tikte kaydedilmiş çağrılar, sonra adım
+        sim = self.sim
+        lo = np.searchsorted(self.events['tick'], sim.ticks, 'left')
+        hi = np.searchsorted(self.events['tick'], sim.ticks, 'right')
+        for row in self.events[lo:hi]:
+            name, args = decode_call(row)
+            getattr(sim, name)(*args)
+        sim.step(self.dt)
+
+    def seek(self, tick: int):
+        # Mevcut durumdan ileri sarmak kontrol noktasından kısaysa geri yükleme yok
+        tick = int(fl.clamp(int(tick), self.start, self.end))
+        c = self.checkpoint_ticks[bisect.bisect_right(self.checkpoint_ticks, tick) - 1]
+        if not c <= self.sim.ticks <= tick:
+            self._restore(c)
+        while self.sim.ticks < tick:
+            self.step()
+
+
+# --- Oynatma penceresi ----------------------------------------------------------
+# Simülasyonu SimRunner yerine bu iş parçacığı Replay ile sürer; presetler
+# kayıttan gelir (tuşları kapalı). Zaman çizelgesi: Gerçek Işık eğrisi,
+# kontrol noktaları (gri) ve preset çağrıları (amber).
+TIMELINE_H = 34
+SCRUB_KEYS = {pygame.K_COMMA: -1, pygame.K_PERIOD: +1,                  # ±1 tik
+              pygame.K_LEFTBRACKET: -10*fl.FPS, pygame.K_RIGHTBRACKET: +10*fl.FPS}
+
+
+class ReplayViewer(fl.Viewer):
+    def __init__(self, replay: Replay, speed: float = 1.0):
+        super().__init__(replay.sim, speed)
+        self.replay = replay
+        self.playing = True
+        self._acc = 0.0
+        self._seek_to: Optional[int] = None
+        self._drag = False
+        p = self.play
+        self.timeline = pygame.Rect(p.x + 10, p.bottom - TIMELINE_H - 8, p.w - 20, TIMELINE_H)
+        self._strip = self._build_strip()
+
+    def _tick_at(self, x: float) -> int:
+        rp, tl = self.replay, self.timeline
+        return int(round(rp.start + fl.clamp((x - tl.x) / tl.w, 0.0, 1.0) * (rp.end - rp.start)))
+
+    def _x_at(self, tick: int) -> int:
+        rp, tl = self.replay, self.timeline
+        return tl.x + int((tick - rp.start) / max(1, rp.end - rp.start) * (tl.w - 1))
+
+    def _build_strip(self) -> pygame.Surface:
+        rp, tl = self.replay, self.timeline
+        strip = pygame.Surface(tl.size, pygame.SRCALPHA)
+        strip.fill((*fl.PANEL_BG, 215))
+        if len(rp.ticks):
+            # sütun başına Gerçek Işık ortalaması
+            col = ((rp.ticks['tick'] - rp.start) / max(1, rp.end - rp.start) * (tl.w - 1)).astype(np.int64)
+            sums = np.bincount(col, weights=rp.ticks['real_intensity'], minlength=tl.w)
+            counts = np.bincount(col, minlength=tl.w)
+            hit = np.flatnonzero(counts)
+            ys = tl.h - 4 - (sums[hit] / counts[hit] * (tl.h - 8)).astype(np.int64)
+            for x, y in zip(hit.tolist(), ys.tolist()):
+                pygame.draw.line(strip, fl.AMBER + (150,), (x, tl.h - 4), (x, y))
+        for t in rp.checkpoint_ticks:
+            x = self._x_at(t) - tl.x
+            pygame.draw.line(strip, fl.GRAY, (x, 0), (x, 4))
+        for t in np.unique(rp.events['tick']).tolist():
+            x = self._x_at(t) - tl.x
+            pygame.draw.line(strip, fl.GOLD, (x, 0), (x, tl.h - 1))
+        pygame.draw.rect(strip, fl.PANEL_LINE, strip.get_rect(), 1)
+        return strip
+
+    def handle_event(self, event) -> bool:
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_SPACE:
+                self.playing = not self.playing
+                return True
+            if event.key in fl.PRESET_FLAGS:
+                return True   # kayıt salt okunur
+            if event.key in SCRUB_KEYS:
+                self.playing = False
+                base = self.sim.ticks if self._seek_to is None else self._seek_to
+                self._seek_to = base + SCRUB_KEYS[event.key]
+                return True
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.timeline.collidepoint(event.pos):
+            self._drag = True
+            self._seek_to = self._tick_at(event.pos[0])
+            return True
+        if event.type == pygame.MOUSEMOTION and self._drag:
+            self._seek_to = self._tick_at(event.pos[0])
+            return True
+        if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            self._drag = False
+        return super().handle_event(event)
+
+    def advance(self, frame_dt: float):
+        rp = self.replay
+        if self._seek_to is not None:
+            # sürüklerken kare başına en fazla bir arama (son konum)
+            rp.seek(self._seek_to)
+            self._seek_to = None
+            self._acc = 0.0
+            return
+        if not self.playing:
+            return
+        self._acc = min(self._acc + frame_dt * self.runner.speed, fl.MAX_BACKLOG * self.runner.speed)
+        while self._acc >= rp.dt:
+            if self.sim.ticks >= rp.end:
+                self.playing = False
+                break
+            rp.step()
+            self._acc -= rp.dt
+
+    def draw_overlay(self, screen: pygame.Surface, snap: fl.Snapshot):
+        rp, tl = self.replay, self.timeline
+        screen.blit(self._strip, tl)
+        x = self._x_at(snap.tick)
+        pygame.draw.line(screen, fl.WHITE, (x, tl.y - 3), (x, tl.bottom + 2), 2)
+        state = "Oynuyor" if self.playing else "Durdu"
+        txt = (f"{state}  {snap.tick / fl.FPS:7.1f} sn / {rp.end / fl.FPS:.1f} sn"
+               f"   Boşluk: oynat  , . : ±1 tik  [ ]: ±10 sn")
+        screen.blit(self.font_small.render(txt, True, fl.GRAY), (tl.x, tl.y - 20))
+
+    def run(self):
+        prof = self.sim.profiler
+        try:
+            while True:
+                frame_dt = self.clock.tick(fl.FPS) / 1000.0
+                t0 = time.perf_counter()
+                if not self.handle_events():
+                    break
+                self.update_camera(frame_dt)
+                self.advance(frame_dt)
+                self.draw()
+                prof.frame(t0, time.perf_counter())
+        finally:
+            pygame.quit()
+
+
+# --- Komut satırı -----------------------------------------------------------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Kontrol noktalı tekrar kaydı ve oynatma")
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    rec = sub.add_parser('record', help="koşuyu kaydet (başsız ya da --view ile pencereli)")
+    rec.add_argument('--agents', type=int, default=fl.AGENT_COUNT)
+    rec.add_argument('--seed', type=int, default=None)
+    rec.add_argument('--vectorized', action='store_true')
+    rec.add_argument('--ticks', type=int, default=60*fl.FPS, help="başsız kayıt uzunluğu")
+    rec.add_argument('--every', type=int, default=CHECKPOINT_EVERY, help="kontrol noktası aralığı (tik)")
+    rec.add_argument('--presets', default='', help="'+' ile birleşik preset bayrakları")
+    rec.add_argument('--view', action='store_true', help="pencereyi aç, oturum kapanana dek kaydet")
+    rec.add_argument('--out', required=True)
+    sk = sub.add_parser('seek', help="başsız: verilen tike git, metrikleri yaz")
+    sk.add_argument('dir')
+    sk.add_argument('--tick', type=int, required=True)
+    vw = sub.add_parser('view', help="kayıttan oynat")
+    vw.add_argument('dir')
+    vw.add_argument('--tick', type=int, default=None)
+    args = ap.parse_args(argv)
+
+    if args.cmd == 'record':
+        sim = fl.Simulation(args.agents, seed=args.seed, vectorized=args.vectorized)
+        sim.set_presets([f for f in args.presets.split('+') if f])
+        writer = ReplayWriter(args.out, sim, args.every)
+        try:
+            if args.view:
+                viewer = fl.Viewer(sim)
+                viewer.runner.on_tick = writer.record
+                viewer.run()
+            else:
+                dt = 1.0 / fl.FPS
+                for _ in range(args.ticks):
+                    sim.step(dt)
+                    writer.record()
+        finally:
+            writer.close()
+        print(f"{sim.ticks} tik, {writer.checkpoints} kontrol noktası → {args.out}", file=sys.stderr)
+    elif args.cmd == 'seek':
+        t0 = time.perf_counter()
+        rp = Replay(args.dir)
+        rp.seek(args.tick)
+        print(json.dumps(rp.sim.metrics(), ensure_ascii=False, indent=1))
+        print(f"tik {rp.sim.ticks}: {time.perf_counter() - t0:.2f} sn", file=sys.stderr)
+    else:
+        rp = Replay(args.dir)
+        if args.tick is not None:
+            rp.seek(args.tick)
+        ReplayViewer(rp).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# Işık Bahçesi — parametre taraması (başsız, çok çekirdek)
+# -----------------------------------------------------------------------------
+# Preset kombinasyonları × ajan sayıları × tohumlar ızgarasını ProcessPoolExecutor
+# ile tüm çekirdeklere dağıtır. Her hücre için son ve zaman-ortalamalı metrikler
+# (draw_panel'deki ortalamalar + real_intensity) tek tabloya (CSV) yazılır.
+# Satırlar işçiler bitirdikçe eklenir; yarıda kalan tarama aynı --out ile
+# yeniden çalıştırılınca biten hücreler atlanır.
+# --ensemble K: aynı (ajan, tik) hücreleri K'lık gruplar halinde tek Ensemble'da
+# koşar (dünya başına preset/tohum); satırlar tek tek koşuyla birebir aynıdır.
+# -----------------------------------------------------------------------------
+# Örnek:
+#   python sweep.py --all-combos --agents 200 2000 --seeds 0 1 2 --ticks 3600 --out sweep.csv
+#   python sweep.py --presets none ramazan ramazan+destek_grubu --vectorized
+#   python sweep.py --all-combos --seeds $(seq 0 31) --ensemble 64
+# -----------------------------------------------------------------------------
+
+import argparse
+import csv
+import itertools
+import os
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+
+import fakelights as fl
+
+PRESETS = list(fl.PRESET_SHORT)
+METRICS = ('avg_inner', 'loneliness', 'avg_health', 'avg_des', 'avg_hed', 'real_intensity')
+KEY_FIELDS = ('presets', 'agents', 'seed', 'ticks', 'vectorized')
+FIELDS = list(KEY_FIELDS) + [f"final_{m}" for m in METRICS] + [f"mean_{m}" for m in METRICS]
+
+Cell = Tuple[str, int, int, int, bool]
+
+# --- Izgara ------------------------------------------------------------------
+def combo_name(flags: Iterable[str]) -> str:
+    flags = [f for f in PRESETS if f in set(flags)]
+    return '+'.join(flags) if flags else 'none'
+
+def parse_combo(name: str) -> List[str]:
+    if name in ('', 'none'):
+        return []
+    flags = name.split('+')
+    unknown = set(flags) - set(PRESETS)
+    if unknown:
+        raise ValueError(f"bilinmeyen preset: {', '.join(sorted(unknown))}")
+    return flags
+
+def all_combos() -> List[str]:
+    return [combo_name(c) for r in range(len(PRESETS)+1) for c in itertools.combinations(PRESETS, r)]
+
+def build_grid(combos: Iterable[str], agents: Iterable[int], seeds: Iterable[int],
+               ticks: Iterable[int], vectorized: bool = False) -> List[Cell]:
+    return [(combo_name(parse_combo(c)), a, s, t, vectorized)
+            for c, a, s, t in itertools.product(combos, agents, seeds, ticks)]
+
+# --- İşçi --------------------------------------------------------------------
+def run_cell(cell: Cell, sample_every: int = 1) -> Dict[str, object]:
+    presets, agents, seed, ticks, vectorized = cell
+    sim = fl.Simulation(agents, seed=seed, vectorized=vectorized)
+    sim.set_presets(parse_combo(presets))
+    dt = 1.0 / fl.FPS
+    sums = dict.fromkeys(METRICS, 0.0)
+    samples = 0
+    for t in range(ticks):
+        sim.step(dt)
+        if (t+1) % sample_every == 0:
+            m = sim.metrics()
+            for k in METRICS: sums[k] += m[k]
+            samples += 1
+    final = sim.metrics()
+    row: Dict[str, object] = dict(zip(KEY_FIELDS, cell))
+    for k in METRICS:
+        row[f"final_{k}"] = final[k]
+        row[f"mean_{k}"] = sums[k] / samples if samples else final[k]
+    return row
+
+def run_ensemble(cells: List[Cell], sample_every: int = 1) -> List[Dict[str, object]]:
+    # Aynı (ajan, tik) hücreleri tek Ensemble'da: dünya k = hücre k
+    _, agents, _, ticks, _ = cells[0]
+    ens = fl.Ensemble(len(cells), agents, seeds=[c[2] for c in cells])
+    for k, c in enumerate(cells):
+        ens.set_presets(parse_combo(c[0]), world=k)
+    dt = 1.0 / fl.FPS
+    sums = {k: np.zeros(len(cells)) for k in METRICS}
+    samples = 0
+    for t in range(ticks):
+        ens.step(dt)
+        if (t+1) % sample_every == 0:
+            m = ens.world_metrics()
+            for k in METRICS: sums[k] += m[k]
+            samples += 1
+    final = ens.world_metrics()
+    rows = []
+    for i, cell in enumerate(cells):
+        row: Dict[str, object] = dict(zip(KEY_FIELDS, cell))
+        for k in METRICS:
+            row[f"final_{k}"] = float(final[k][i])
+            row[f"mean_{k}"] = float(sums[k][i] / samples if samples else final[k][i])
+        rows.append(row)
+    return rows
+
+def ensemble_groups(cells: List[Cell], size: int) -> List[List[Cell]]:
+    # Ensemble yalnızca dizi modunda ve aynı ajan/tik sayısında
+    by_shape: Dict[Tuple[int, int], List[Cell]] = defaultdict(list)
+    for c in cells:
+        by_shape[(c[1], c[3])].append(c)
+    return [g[i:i+size] for g in by_shape.values() for i in range(0, len(g), size)]
+
+# --- Sürdürme / akış ---------------------------------------------------------
+def cell_key(row: Dict[str, object]) -> Cell:
+    return (str(row['presets']), int(row['agents']), int(row['seed']), int(row['ticks']),
+            str(row['vectorized']) in ('True', 'true', '1'))
+
+def finished_cells(path: str) -> set:
+    # Yarım yazılmış/bozuk satırlar (eksik alan, sayı olmayan anahtar) atlanır: hücre yeniden koşar
+    if not path or not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path, newline='') as fh:
+        for r in csv.DictReader(fh):
+            if any(r.get(f) in (None, '') for f in FIELDS):
+                continue
+            try:
+                done.add(cell_key(r))
+            except (ValueError, TypeError):
+                continue
+    return done
+
+def run_sweep(cells: List[Cell], out: Optional[str] = None, workers: Optional[int] = None,
+              sample_every: int = 1, ensemble: int = 0) -> Iterator[Dict[str, object]]:
+    # Bitenleri atla, kalanları havuza dağıt, her satırı bitince yaz ve döndür
+    done = finished_cells(out)
+    todo = [c for c in cells if c not in done]
+    fh = writer = None
+    if out:
+        new = not os.path.exists(out) or os.path.getsize(out) == 0
+        if not new:
+            # kesilmiş son satır ilk yeni satırla birleşmesin
+            with open(out, 'rb') as tail:
+                tail.seek(-1, os.SEEK_END)
+                cut = tail.read(1) not in (b'\r', b'\n')
+        fh = open(out, 'a', newline='')
+        writer = csv.DictWriter(fh, fieldnames=FIELDS)
+        if new: writer.writeheader(); fh.flush()
+        elif cut: fh.write('\r\n'); fh.flush()
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as ex:
+            if ensemble > 0:
+                futs = [ex.submit(run_ensemble, g, sample_every) for g in ensemble_groups(todo, ensemble)]
+            else:
+                futs = [ex.submit(run_cell, c, sample_every) for c in todo]
+            for fut in as_completed(futs):
+                rows = fut.result()
+                for row in rows if ensemble > 0 else [rows]:
+                    if writer:
+                        writer.writerow(row); fh.flush()
+                    yield row
+    finally:
+        if fh: fh.close()
+
+# --- CLI ---------------------------------------------------------------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Işık Bahçesi preset/tohum taraması")
+    ap.add_argument('--presets', nargs='*', default=['none'],
+                    help="kombinasyonlar, '+' ile birleşik (örn. ramazan+destek_grubu) ya da none")
+    ap.add_argument('--all-combos', action='store_true', help="5 presetin tüm 32 kombinasyonu")
+    ap.add_argument('--agents', type=int, nargs='+', default=[fl.AGENT_COUNT])
+    ap.add_argument('--seeds', type=int, nargs='+', default=[0])
+    ap.add_argument('--ticks', type=int, nargs='+', default=[60*fl.FPS])
+    ap.add_argument('--vectorized', action='store_true', help="NumPy popülasyonu")
+    ap.add_argument('--ensemble', type=int, default=0, metavar='K',
+                    help="hücreleri K dünyalık Ensemble'larda koş (dizi modu demektir)")
+    ap.add_argument('--sample-every', type=int, default=1, help="ortalama için örnekleme aralığı (tik)")
+    ap.add_argument('--workers', type=int, default=None)
+    ap.add_argument('--out', default='sweep.csv', help="sonuç CSV; varsa kaldığı yerden sürer")
+    args = ap.parse_args(argv)
+
+    combos = all_combos() if args.all_combos else args.presets
+    try:
+        cells = build_grid(combos, args.agents, args.seeds, args.ticks, args.vectorized or args.ensemble > 0)
+    except ValueError as e:
+        ap.error(str(e))
+    print(f"{len(cells)} hücre, {len(finished_cells(args.out))} tamamlanmış → {args.out}", file=sys.stderr)
+    for row in run_sweep(cells, args.out, args.workers, args.sample_every, args.ensemble):
+        print(f"{row['presets']:>40} n={row['agents']:<6} seed={row['seed']:<4} "
+              f"iç={row['final_avg_inner']:6.2f} yalnızlık={row['final_loneliness']:.3f} "
+              f"gerçek={row['final_real_intensity']:.3f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+# Testler depo kökündeki tek dosyalı modülleri (fakelights, replay) içe aktarır.
+import os
+import sys
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,50 @@
+# Işık Bahçesi — calibrate.py: basamaklar, eleme ve kontrol noktasından devam
+import numpy as np
+import pytest
+
+import calibrate
+import fakelights as fl
+
+CFG = dict(agents=20, seeds=[0], vectorized=True, presets=[], metrics=["loneliness", "avg_inner"], every=10)
+
+
+def test_rungs():
+    assert calibrate.rungs(30, 270, 3) == [30, 90, 270]
+    assert calibrate.rungs(30, 100, 3) == [30, 90, 100]
+    assert calibrate.rungs(100, 100, 3) == [100]
+
+
+def test_successive_halving_promotes_lowest_loss():
+    defaults = calibrate.select_params(["fade_rate", "drop_rate", "SOSYAL.spike"])
+    cands = calibrate.sample_candidates(defaults, 9, 3.0, np.random.default_rng(0))
+    assert cands[0] == defaults
+    targets = dict(calibrate.parse_target(t) for t in ("loneliness=0.3", "avg_inner=0:50,4:40"))
+    history = calibrate.calibrate(cands, CFG, targets, 30, 270, eta=3, workers=1)
+    by_rung = [[h for h in history if h["rung"] == r] for r in range(3)]
+    assert [len(rows) for rows in by_rung] == [9, 3, 1]
+    assert [h["ticks"] for h in history] == [30]*9 + [90]*3 + [270]
+    for r, rows in enumerate(by_rung):
+        losses = [h["loss"] for h in rows]
+        assert losses == sorted(losses)
+        kept = [h["candidate"] for h in rows if h["kept"]]
+        assert kept == [h["candidate"] for h in rows[:max(1, len(rows) // 3)]]
+        if r + 1 < len(by_rung):
+            assert sorted(h["candidate"] for h in by_rung[r + 1]) == sorted(kept)
+
+
+def test_rung_continues_from_checkpoint():
+    coeffs = calibrate.sample_candidates(calibrate.select_params(["fade_rate"]), 2, 2.0,
+                                         np.random.default_rng(1))[1]
+    _, t_full, v_full, _ = calibrate.evaluate(0, coeffs, CFG, 90)
+    _, t_a, v_a, state = calibrate.evaluate(0, coeffs, CFG, 30)
+    _, t_b, v_b, _ = calibrate.evaluate(0, coeffs, CFG, 90, state)
+    assert np.array_equal(np.concatenate([t_a, t_b]), t_full)
+    assert np.array_equal(np.vstack([v_a, v_b]), v_full)
+
+
+def test_bad_target_and_pattern_rejected():
+    with pytest.raises(ValueError):
+        calibrate.parse_target("yok=1")
+    with pytest.raises(ValueError):
+        calibrate.select_params(["hic_yok_*"])
+    assert fl.RuleEngine().with_coefficients({"fade_rate": 0.5}).fade_rate == 0.5
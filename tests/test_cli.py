@@ -0,0 +1,35 @@
+# Işık Bahçesi — fakelights.py komut satırı (ayrı süreçte)
+import json
+import os
+import subprocess
+import sys
+
+import fakelights as fl
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fakelights.py")
+
+
+def run_cli(*args):
+    # pygame karşılama satırı gizlenmemiş ortamda: betik kendisi gizlemeli
+    env = {k: v for k, v in os.environ.items() if k != "PYGAME_HIDE_SUPPORT_PROMPT"}
+    return subprocess.run([sys.executable, SCRIPT, *args], capture_output=True, text=True,
+                          env=env, timeout=120)
+
+
+def test_headless_stdout_is_json():
+    proc = run_cli("--headless", "--seconds", "0.5", "--agents", "30", "--seed", "1",
+                   "--presets", "ramazan", "--vectorized")
+    assert proc.returncode == 0, proc.stderr
+    out = json.loads(proc.stdout)
+    sim = fl.Simulation(30, seed=1, vectorized=True)
+    sim.set_presets(["ramazan"])
+    sim.run(30)
+    assert out == dict(sim.metrics(), ticks=30, time=sim.time)
+    assert "tik/sn" in proc.stderr
+
+
+def test_unknown_preset_is_a_usage_error():
+    proc = run_cli("--headless", "--seconds", "0.1", "--presets", "yok_boyle")
+    assert proc.returncode == 2
+    assert proc.stdout == ""
+    assert "yok_boyle" in proc.stderr
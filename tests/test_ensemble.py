@@ -0,0 +1,66 @@
+# Işık Bahçesi — Ensemble: dünya k = tek başına Simulation
+import numpy as np
+import pytest
+
+import fakelights as fl
+
+
+@pytest.mark.parametrize("density", [False, True])
+def test_world_matches_single_simulation(density):
+    combos = [[], ["ramazan", "filtre_acik"], ["destek_grubu", "bildirim_firtinasi"]]
+    seeds = [3, 4, 5]
+    n = 80
+    ens = fl.Ensemble(3, n, seeds=seeds, neighborhood_density=density)
+    for k, combo in enumerate(combos):
+        ens.set_presets(combo, world=k)
+    ens.run(200)
+    em = ens.metrics()
+    for k, seed in enumerate(seeds):
+        sim = fl.Simulation(n, seed=seed, vectorized=True, neighborhood_density=density)
+        sim.set_presets(combos[k])
+        sim.run(200)
+        assert sim.metrics() == em[k]
+        assert np.array_equal(sim.pop.pos, ens.pop.pos[k*n:(k+1)*n])
+        assert np.array_equal(sim.ring_occupancy, ens.ring_occupancy[k])
+
+
+def test_presets_are_per_world():
+    ens = fl.Ensemble(2, 30, seed=1)
+    ens.set_presets(["ramazan"], world=1)
+    assert not ens.globals_states[0]["ramazan"]
+    assert ens.globals_states[1]["ramazan"]
+    ens.toggle_preset("filtre_acik")
+    assert all(gs["filtre_acik"] for gs in ens.globals_states)
+
+
+def test_large_world_matches_single_simulation():
+    # kaynak haritası her iki tarafta da map_seed'den
+    kw = dict(world_size=(2000, 1500), sources_per_type=6, map_seed=3)
+    n = 60
+    ens = fl.Ensemble(2, n, seeds=[8, 9], **kw)
+    ens.run(120)
+    em = ens.metrics()
+    for k, seed in enumerate((8, 9)):
+        sim = fl.Simulation(n, seed=seed, vectorized=True, **kw)
+        assert [(s.type, s.pos) for s in sim.sources] == [(s.type, s.pos) for s in ens.sources]
+        sim.run(120)
+        assert sim.metrics() == em[k]
+        assert np.array_equal(sim.pop.pos, ens.pop.pos[k*n:(k+1)*n])
+
+
+def test_notifications_and_tail_match_simulation():
+    ens = fl.Ensemble(2, 30, seeds=[1, 2])
+    ens.toggle_preset("ramazan")
+    assert all(gs["ramazan"] for gs in ens.globals_states)
+    assert ens.notifications[-1][0].startswith("Aktif: ")
+    ens.set_presets(["filtre_acik"], world=1)
+    ens.toggle_preset("ramazan")
+    assert "1/2" in ens.notifications[-1][0]
+    sim = fl.Simulation(30, seed=1, vectorized=True)
+    sim.toggle_preset("ramazan")
+    sim.toggle_preset("ramazan")
+    ens.run(200)
+    sim.run(200)
+    assert ens.notifications == [] and sim.notifications == []
+    assert ens.ticks == sim.ticks and ens.time == sim.time
+    assert ens.real_intensity[0] == sim.real_intensity
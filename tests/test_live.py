@@ -0,0 +1,88 @@
+# Işık Bahçesi — live.py: komut doğrulama ve çerçeveler (sunucu çoğunlukla başlatılmadan)
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+import fakelights as fl
+import live
+
+
+@pytest.mark.parametrize("msg", [
+    {"toggle": "yok_boyle"},
+    {"toggle": None},
+    {"presets": "ramazan"},
+    {"presets": ["ramazan", "yok_boyle"]},
+    {"hiz": 2},
+    {},
+])
+def test_invalid_commands_rejected(msg):
+    sim = fl.Simulation(20, seed=1)
+    server = live.LiveServer(sim, port=0)
+    with pytest.raises(ValueError):
+        server.command(msg)
+    server.tick()
+    assert not any(sim.globals_state[f] for f in fl.PRESET_SHORT)
+    assert not sim.globals_state["paused"]
+
+
+def test_commands_wait_for_sim_thread():
+    sim = fl.Simulation(20, seed=1)
+    server = live.LiveServer(sim, port=0)
+    server.command({"toggle": "ramazan"})
+    server.command({"presets": ["filtre_acik", "destek_grubu"]})
+    server.command({"pause": True})
+    # kuyrukta: sim durumu ancak tick() ile (sim iş parçacığında) değişir
+    assert not sim.globals_state["ramazan"] and not sim.globals_state["paused"]
+    server.tick()
+    assert sim.globals_state["paused"]
+    assert {f for f in fl.PRESET_SHORT if sim.globals_state[f]} == {"filtre_acik", "destek_grubu"}
+
+
+def test_commands_forwarded_to_submit():
+    sim = fl.Simulation(20, seed=1)
+    jobs = []
+    server = live.LiveServer(sim, port=0, submit=lambda fn, *args: jobs.append((fn, args)))
+    server.command({"toggle": "ramazan"})
+    assert len(jobs) == 1 and not sim.globals_state["ramazan"]
+    fn, args = jobs[0]
+    fn(*args)
+    assert sim.globals_state["ramazan"]
+
+
+def test_prometheus_lines_parse():
+    sim = fl.Simulation(20, seed=1)
+    sim.run(5)
+    text = live.prometheus(live.build_frame(sim, 60.0))
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            float(value)
+            assert name.startswith("fakelights_")
+
+
+def test_server_pins_profiler_and_rejects_ensemble():
+    sim = fl.Simulation(20, seed=1)
+    server = live.LiveServer(sim, port=0)
+    assert sim.profiler.enabled and sim.profiler.pinned
+    server.stop()
+    assert not sim.profiler.pinned
+    with pytest.raises(ValueError):
+        live.LiveServer(fl.Ensemble(2, 20, seed=0), port=0)
+
+
+def test_metrics_endpoint_content_type():
+    sim = fl.Simulation(20, seed=1)
+    with live.LiveServer(sim, port=0) as server:
+        url = f"http://{server.host}:{server.port}/metrics"
+        for _ in range(100):          # ilk kare döngüye iletilene dek 503
+            try:
+                with urllib.request.urlopen(url, timeout=5) as resp:
+                    ctype, body = resp.headers["Content-Type"], resp.read().decode()
+                break
+            except urllib.error.HTTPError as e:
+                assert e.code == 503
+                time.sleep(0.02)
+    assert ctype == "text/plain; version=0.0.4; charset=utf-8"
+    assert "fakelights_" in body
@@ -0,0 +1,79 @@
+# Işık Bahçesi — dizi tabanlı Population
+# -----------------------------------------------------------------------------
+# Dizi modu nesne modunun kurallarını izlemeli: rastgele akışlar farklı olduğundan
+# tohum ortalamaları yakın, aynı tohum aynı gidişat.
+# -----------------------------------------------------------------------------
+
+import numpy as np
+
+import fakelights as fl
+
+
+def test_same_seed_same_run():
+    runs = []
+    for _ in range(2):
+        sim = fl.Simulation(100, seed=11, vectorized=True)
+        sim.toggle_preset("bildirim_firtinasi")
+        sim.run(150)
+        runs.append((sim.positions().copy(), sim.panel_stats(), list(sim.notifications)))
+    assert np.array_equal(runs[0][0], runs[1][0])
+    assert runs[0][1:] == runs[1][1:]
+
+
+def test_matches_object_mode_statistically():
+    tol = {"avg_inner": 2.0, "loneliness": 0.03, "avg_ties": 0.03, "avg_health": 0.01,
+           "avg_des": 0.01, "avg_hed": 0.01}
+    obj, vec = [], []
+    for seed in (1, 2, 3, 4):
+        a = fl.Simulation(200, seed=seed)
+        a.run(300)
+        obj.append(a.panel_stats())
+        b = fl.Simulation(200, seed=seed, vectorized=True)
+        b.run(300)
+        vec.append(b.panel_stats())
+    for key, t in tol.items():
+        mo = np.mean([m[key] for m in obj])
+        mv = np.mean([m[key] for m in vec])
+        assert abs(mo - mv) <= t, (key, mo, mv)
+
+
+# Population.step'in doğrudan taşıdığı ajan alanları
+POP_FIELDS = ("inner_light", "base_light", "willpower", "health", "social_ties", "desens",
+              "hedonic", "pending_crash", "theta", "omega", "orbit_jitter", "stay_time",
+              "curiosity", "epsilon", "time_since_real")
+
+
+def test_kernels_bit_identical_to_agents(monkeypatch):
+    # Nesne durumunu diziye kopyala, hedef seçimini nesne tarafında yapıp diziye
+    # aktar; dt=1/64 ikinin kuvveti olduğundan zamanlayıcı çarkının vadeleri
+    # geri sayım sayaçlarıyla aynı tikte dolar.
+    so = fl.Simulation(120, seed=3)
+    sv = fl.Simulation(120, seed=3, vectorized=True)
+    agents, pop = so.agents, sv.pop
+    for name in POP_FIELDS:
+        getattr(pop, name)[:] = [getattr(a, name) for a in agents]
+    pop.pos[:] = [(a.pos.x, a.pos.y) for a in agents]
+    pop.cravings[:] = [a.cravings for a in agents]
+    pop.affinity[:] = so.rules.affinity
+    monkeypatch.setattr(pop, "retarget", lambda g, now: None)
+    retarget = fl.Agent.retarget
+    for _ in range(200):
+        for a in agents:
+            retarget(a, so.sources, so.globals_state, so.rules)
+        for i, a in enumerate(agents):
+            pop.target[i] = a.target_type
+            pop.theta[i] = a.theta
+            pop.omega[i] = a.omega
+            pop.stay_time[i] = a.stay_time
+            pop.curiosity[i] = a.curiosity
+        with monkeypatch.context() as m:
+            m.setattr(fl.Agent, "retarget", lambda *a, **k: None)
+            so.step(1/64)
+        sv.step(1/64)
+    assert np.array_equal(pop.inner_light, [a.inner_light for a in agents])
+    assert np.array_equal(pop.base_light, [a.base_light for a in agents])
+    assert np.array_equal(pop.pos, [(a.pos.x, a.pos.y) for a in agents])
+    assert np.array_equal(pop.last_stimulus, [a.last_stimulus for a in agents])
+    cols = pop.colors()
+    assert all(tuple(cols[i]) == a.color() for i, a in enumerate(agents))
+    assert so.real_intensity == sv.real_intensity
@@ -0,0 +1,83 @@
+# Işık Bahçesi — recorder.py: parçalı kayıt ve geri yükleme
+import glob
+import json
+import os
+import threading
+
+import numpy as np
+import pytest
+
+import fakelights as fl
+import recorder
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_chunks_round_trip_through_load_recording(tmp_path, vectorized):
+    out = str(tmp_path)
+    sim = fl.Simulation(40, seed=2, vectorized=vectorized)
+    want = []
+    with recorder.MetricsRecorder(out, sim, sample_every=3, chunk_rows=4) as rec:
+        for _ in range(31):
+            sim.step(1/60)
+            rec.sample()
+            if sim.ticks % 3 == 0:
+                want.append((sim.ticks, sim.metrics(), sim.ring_occupancy.copy()))
+    # 10 örnek, 4'lük parçalar: son parça close() ile yarım yazılır
+    assert rec.rows == 10 and rec.chunks == 3
+    assert len(glob.glob(os.path.join(out, "chunk_*.npz"))) == 3
+    data = recorder.load_recording(out)
+    assert data["tick"].tolist() == [t for t, _, _ in want]
+    for k in recorder.SCALARS[2:]:
+        assert data[k].tolist() == [m[k] for _, m, _ in want]
+    assert np.array_equal(data["ring_occupancy"], [r for _, _, r in want])
+    bins = len(recorder.HIST_EDGES) - 1
+    assert data["hist_inner"].shape == data["hist_base"].shape == (10, bins)
+    with open(os.path.join(out, "meta.json")) as fh:
+        meta = json.load(fh)
+    assert meta["sources"] == [s.label for s in sim.sources]
+    assert meta["agents"] == 40 and meta["sample_every"] == 3
+
+
+def test_empty_recording_loads_as_empty(tmp_path):
+    assert recorder.load_recording(str(tmp_path)) == {}
+
+
+def test_histograms_count_every_agent(tmp_path):
+    sim = fl.Simulation(50, seed=4, vectorized=True)
+    sim.pop.inner_light[:5] = -0.5         # tik sonu 0'ın altı ve 100'ün üstü uç kovalara
+    sim.pop.base_light[:3] = 120.0
+    with recorder.MetricsRecorder(str(tmp_path), sim) as rec:
+        rec.sample(force=True)
+    data = recorder.load_recording(str(tmp_path))
+    assert data["hist_inner"].sum(axis=1).tolist() == [50]
+    assert data["hist_base"].sum(axis=1).tolist() == [50]
+    assert data["hist_inner"][0, 0] >= 5 and data["hist_base"][0, -1] >= 3
+
+
+def test_rejects_ensemble(tmp_path):
+    with pytest.raises(ValueError):
+        recorder.MetricsRecorder(str(tmp_path), fl.Ensemble(2, 20, seed=0))
+
+
+def test_full_queue_drops_chunks_without_blocking(tmp_path, monkeypatch):
+    # yazıcı ilk parçada takılı: kuyruk (1) dolunca sonraki parçalar atılır, sample() beklemez
+    release = threading.Event()
+    savez = np.savez
+
+    def stalled(fh, **data):
+        release.wait(10)
+        savez(fh, **data)
+
+    monkeypatch.setattr(np, "savez", stalled)
+    sim = fl.Simulation(20, seed=1, vectorized=True)
+    rec = recorder.MetricsRecorder(str(tmp_path), sim, chunk_rows=1, max_pending=1)
+    for _ in range(6):
+        sim.step(1/60)
+        rec.sample()
+    assert rec.chunks == 6 and rec.dropped_chunks >= 4
+    release.set()
+    rec.close()
+    files = glob.glob(os.path.join(str(tmp_path), "chunk_*.npz"))
+    assert len(files) == rec.chunks - rec.dropped_chunks
+    data = recorder.load_recording(str(tmp_path))
+    assert data["tick"][0] == 1 and len(data["tick"]) == len(files)
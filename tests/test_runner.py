@@ -0,0 +1,54 @@
+# Işık Bahçesi — SimRunner: sabit adımlı iş parçacığı ve anlık görüntüler
+import time
+
+import numpy as np
+import pytest
+
+import fakelights as fl
+
+
+def wait_for(runner, tick, timeout=10.0):
+    end = time.perf_counter() + timeout
+    while time.perf_counter() < end:
+        snap = runner.read()
+        if snap.tick >= tick:
+            return snap
+        time.sleep(0.005)
+    raise AssertionError(f"{timeout} sn içinde {tick}. tike ulaşılmadı")
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_snapshot_matches_headless_run(vectorized):
+    runner = fl.SimRunner(fl.Simulation(60, seed=2, vectorized=vectorized), speed=50.0)
+    runner.start()
+    try:
+        snap = wait_for(runner, 30)
+    finally:
+        runner.stop()
+    # read() konumları son iki tik arasında enterpole eder
+    ref = fl.Simulation(60, seed=2, vectorized=vectorized)
+    ref.run(snap.tick - 1)
+    prev = ref.positions().copy()
+    ref.run(1)
+    cur = ref.positions()
+    assert (np.abs(snap.pos - cur) <= np.abs(cur - prev) + 1e-9).all()
+    assert snap.stats == ref.panel_stats()
+
+
+def test_submitted_commands_run_on_sim_thread():
+    sim = fl.Simulation(30, seed=2)
+    runner = fl.SimRunner(sim, speed=50.0)
+    runner.start()
+    try:
+        runner.submit(sim.toggle_preset, "ramazan")
+        snap = wait_for(runner, runner.read().tick + 5)
+    finally:
+        runner.stop()
+    assert sim.globals_state["ramazan"]
+    assert any("Ramazan" in note for note, _ in snap.notifications)
+    assert not runner.running
+
+
+def test_rejects_ensemble():
+    with pytest.raises(ValueError):
+        fl.SimRunner(fl.Ensemble(2, 20, seed=0))
@@ -0,0 +1,70 @@
+# Işık Bahçesi — başsız Simulation çekirdeği
+# -----------------------------------------------------------------------------
+# Nesne modu, ayırma öncesi betikle aynı gidişatı izlemeli: değerler ayırma
+# (user-001) commit'inde, taşınmış ilk betik çekirdeğiyle ölçüldü.
+# -----------------------------------------------------------------------------
+
+import pytest
+
+import fakelights as fl
+
+
+# Simulation(120, seed=7).run(240): (sum inner_light, sum pos.x+pos.y, sum health).
+# destek_grubu user-007'de bilerek değişti, burada yok.
+BASELINE = {
+    (): (6061.057477506375, 67531.86992531033, 118.25999999999999),
+    ("ramazan", "filtre_acik"): (6295.021619372809, 81474.87433675813, 118.33999999999999),
+}
+
+
+def agent_sums(sim):
+    agents = sim.agents
+    return (sum(a.inner_light for a in agents), sum(a.pos.x + a.pos.y for a in agents),
+            sum(a.health for a in agents))
+
+
+@pytest.mark.parametrize("presets", list(BASELINE))
+def test_object_mode_matches_baseline(presets):
+    sim = fl.Simulation(120, seed=7)
+    for name in presets:
+        sim.toggle_preset(name)
+    sim.run(240)
+    assert agent_sums(sim) == pytest.approx(BASELINE[presets], rel=1e-12)
+    assert sim.real_intensity == 1.0
+
+
+def test_same_seed_same_run():
+    runs = []
+    for _ in range(2):
+        sim = fl.Simulation(100, seed=11)
+        sim.toggle_preset("bildirim_firtinasi")
+        sim.run(150)
+        runs.append(([(a.pos.x, a.pos.y, a.inner_light) for a in sim.agents], list(sim.notifications)))
+    assert runs[0] == runs[1]
+
+
+def test_large_world_layout_and_bounds():
+    W, H = 3000, 2000
+    sources = fl.build_world_sources(W, H, 8, seed=4)
+    assert sorted(s.type for s in sources) == sorted(fl.ALL_TYPES*8)
+    assert all(90 <= s.pos.x <= W-90 and 90 <= s.pos.y <= H-90 for s in sources)
+    # harita kendi tohumundan; global random akışına dokunmaz
+    assert [s.pos for s in fl.build_world_sources(W, H, 8, seed=4)] == [s.pos for s in sources]
+    sim = fl.Simulation(100, seed=1, vectorized=True, world_size=(W, H), sources_per_type=8)
+    assert len(sim.sources) == 40 and sim.ring_occupancy.shape == (40,)
+    sim.run(200)
+    pos = sim.positions()
+    assert (pos >= 0).all() and (pos[:, 0] <= W).all() and (pos[:, 1] <= H).all()
+    # nesne modu da SourceIndex adaylarıyla çok kaynaklı dünyada koşar
+    obj = fl.Simulation(20, seed=1, world_size=(W, H), sources_per_type=8)
+    obj.run(60)
+    assert all(0 <= a.pos.x <= W and 0 <= a.pos.y <= H for a in obj.agents)
+
+
+def test_type_constants_follow_rule_table():
+    names = [r.name for r in fl.SOURCE_RULES]
+    assert [names[t] for t in (fl.SOCIAL, fl.SUBSTANCE, fl.PORN, fl.CONSUME, fl.REAL)] == \
+        ["SOSYAL", "MADDE", "PORNO", "TUKETIM", "GERCEK"]
+    sources = fl.build_sources()
+    assert [s.type for s in sources] == list(range(len(fl.SOURCE_RULES)))
+    assert [s.label for s in sources] == [r.label for r in fl.SOURCE_RULES]
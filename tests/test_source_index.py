@@ -0,0 +1,47 @@
+# Işık Bahçesi — SourceIndex adaylarının tam k-en-yakın ile karşılaştırılması
+import numpy as np
+import pytest
+
+import fakelights as fl
+
+W, H = 4000, 3000
+
+
+@pytest.mark.parametrize("per_type", [20, 60, 200])
+def test_candidates_recall_exact_k_nearest(per_type):
+    index = fl.SourceIndex(fl.build_world_sources(W, H, per_type, seed=1), (W, H))
+    assert not index.full
+    pts = np.random.default_rng(0).uniform([0, 0], [W, H], size=(300, 2))
+    cand = index.candidates(pts)
+    hits = total = 0
+    for t in fl.ALL_TYPES:
+        members = np.flatnonzero(index.type == t)
+        d = np.hypot(index.pos[members, 0][None] - pts[:, 0, None],
+                     index.pos[members, 1][None] - pts[:, 1, None])
+        exact = members[np.argsort(d, axis=1)[:, :index.k]]
+        for row, nn in zip(cand, exact):
+            found = np.isin(nn, row)
+            assert found[0], "tipin en yakın kaynağı aday değil"
+            hits += int(found.sum())
+            total += len(nn)
+    assert hits / total >= 0.99
+
+
+def test_candidates_are_valid_and_typed():
+    index = fl.SourceIndex(fl.build_world_sources(W, H, 60, seed=2), (W, H))
+    pts = np.random.default_rng(1).uniform([0, 0], [W, H], size=(50, 2))
+    cand = index.candidates(pts)
+    # her tipten tam k aday, indeksler geçerli
+    assert cand.shape == (50, len(fl.ALL_TYPES)*index.k)
+    assert ((cand >= 0) & (cand < index.n)).all()
+    for row in index.type[cand]:
+        assert np.array_equal(np.bincount(row, minlength=len(fl.ALL_TYPES)),
+                              [index.k]*len(fl.ALL_TYPES))
+
+
+def test_small_world_scores_every_source():
+    sources = fl.build_sources()
+    index = fl.SourceIndex(sources, (fl.WIDTH-300, fl.HEIGHT))
+    assert index.full
+    assert index.candidates(np.zeros((3, 2))).tolist() == [list(range(len(sources)))]*3
+    assert index.candidates_at(10.0, 10.0) == list(range(len(sources)))
@@ -0,0 +1,38 @@
+# Işık Bahçesi — SpatialGrid sorguları kaba kuvvetle karşılaştırılır
+import numpy as np
+import pytest
+
+import fakelights as fl
+
+
+@pytest.fixture
+def grid_and_points():
+    rng = np.random.default_rng(0)
+    # kenarların dışına taşan noktalar da uç hücrelere düşmeli
+    pos = rng.uniform([-20, -20], [920, 720], size=(600, 2))
+    grid = fl.SpatialGrid(900, 700, cell=40)
+    grid.rebuild(pos)
+    queries = rng.uniform([-50, -50], [950, 750], size=(200, 2))
+    return grid, pos, queries
+
+
+def test_query_radius_matches_brute_force(grid_and_points):
+    grid, pos, queries = grid_and_points
+    for (x, y), r in zip(queries, np.linspace(0.0, 130.0, len(queries))):
+        want = np.flatnonzero(np.hypot(pos[:, 0]-x, pos[:, 1]-y) <= r)
+        assert np.array_equal(np.sort(grid.query_radius(x, y, r)), want)
+
+
+def test_nearest_matches_brute_force(grid_and_points):
+    grid, pos, queries = grid_and_points
+    for (x, y), r in zip(queries, np.linspace(1.0, 90.0, len(queries))):
+        d = np.hypot(pos[:, 0]-x, pos[:, 1]-y)
+        want = int(np.argmin(d)) if d.min() < r else None
+        assert grid.nearest(x, y, r) == want
+
+
+def test_neighbor_counts_exclude_self(grid_and_points):
+    grid, pos, _ = grid_and_points
+    cell = np.clip((pos // grid.cell).astype(int), 0, [grid.nx-1, grid.ny-1])
+    near = (np.abs(cell[:, None, :] - cell[None, :, :]) <= 1).all(axis=2)
+    assert np.array_equal(grid.neighbor_counts(), near.sum(axis=1) - 1)
@@ -0,0 +1,67 @@
+# Işık Bahçesi — sweep.py: ızgara ve CSV'den sürdürme
+import csv
+
+import pytest
+
+import sweep
+
+
+def read_rows(path):
+    with open(path, newline='') as fh:
+        return list(csv.DictReader(fh))
+
+
+def test_resume_skips_finished_cells(tmp_path):
+    out = str(tmp_path / "sweep.csv")
+    cells = sweep.build_grid(["none", "ramazan+filtre_acik"], [20], [0, 1], [10])
+    assert len(cells) == 4
+    first = list(sweep.run_sweep(cells[:2], out, workers=1))
+    assert {sweep.cell_key(r) for r in first} == set(cells[:2])
+    # yeniden başlatılan tarama yalnızca eksik hücreleri koşar, başlığı tekrarlamaz
+    second = list(sweep.run_sweep(cells, out, workers=1))
+    assert {sweep.cell_key(r) for r in second} == set(cells[2:])
+    rows = read_rows(out)
+    assert len(rows) == 4
+    assert sweep.finished_cells(out) == set(cells)
+    assert list(sweep.run_sweep(cells, out, workers=1)) == []
+
+
+def test_rows_match_direct_run(tmp_path):
+    out = str(tmp_path / "sweep.csv")
+    cell = sweep.build_grid(["destek_grubu"], [20], [3], [15])[0]
+    row, = sweep.run_sweep([cell], out, workers=1)
+    assert row == sweep.run_cell(cell)
+    saved, = read_rows(out)
+    assert float(saved["final_avg_inner"]) == pytest.approx(row["final_avg_inner"])
+
+
+def test_unknown_preset_rejected():
+    with pytest.raises(ValueError):
+        sweep.build_grid(["ramazan+yok_boyle"], [20], [0], [10])
+
+
+def test_truncated_row_is_rerun(tmp_path):
+    out = str(tmp_path / "sweep.csv")
+    cells = sweep.build_grid(["none", "ramazan"], [20], [0], [10])
+    list(sweep.run_sweep(cells, out, workers=1))
+    # son satır yazılırken kesilmiş gibi: anahtar alanları var, metrikler eksik
+    with open(out, newline='') as fh:
+        text = fh.read()
+    last = text.rstrip('\r\n').rsplit('\r\n', 1)[1]
+    with open(out, 'w', newline='') as fh:
+        fh.write(text[:len(text) - len(last) - 2] + last[:len(last) // 2])
+    with open(out, 'a', newline='') as fh:
+        fh.write("\r\nnone,2")
+    assert len(sweep.finished_cells(out)) == 1
+    rerun = list(sweep.run_sweep(cells, out, workers=1))
+    assert len(rerun) == 1
+    assert sweep.finished_cells(out) == set(cells)
+    assert sum(sweep.cell_key(r) == sweep.cell_key(rerun[0])
+               for r in read_rows(out) if r["mean_real_intensity"]) == 1
+
+
+def test_cli_unknown_preset_is_a_usage_error(capsys):
+    with pytest.raises(SystemExit) as exc:
+        sweep.main(["--presets", "ramazan+yok_boyle", "--out", ""])
+    assert exc.value.code == 2
+    assert "yok_boyle" in capsys.readouterr().err
@@ -0,0 +1,62 @@
+# Işık Bahçesi — TimerWheel: vade sırası ve yeniden planlama
+import numpy as np
+
+import fakelights as fl
+
+SLOT = 1/64
+
+
+def drain(wheel, at, ticks):
+    # Tik tik ilerle; her indeksin hangi tikte döndüğünü kaydet. Population gibi
+    # dönen indeksin vadesini ileri taşı (burada çok uzağa): kuyrukta kalan eski
+    # kayıtlar vade dizisine bakılarak atılır.
+    fired = {}
+    for k in range(1, ticks + 1):
+        for i in wheel.pop(k*SLOT, at).tolist():
+            assert i not in fired, f"{i} iki kez döndü"
+            fired[i] = k
+            at[i] = 1e9
+    return fired
+
+
+def test_pops_each_index_once_at_its_deadline():
+    rng = np.random.default_rng(1)
+    at = rng.uniform(0.0, 2.0, size=300)
+    wheel = fl.TimerWheel(SLOT)
+    wheel.schedule(np.arange(300), at)
+    fired = drain(wheel, at.copy(), 140)
+    assert sorted(fired) == list(range(300))
+    for i, k in fired.items():
+        # vadesi dolduğu ilk tik: (k-1)*slot < at <= k*slot
+        assert (k - 1)*SLOT < at[i] <= k*SLOT
+
+
+def test_same_slot_not_yet_due_waits():
+    wheel = fl.TimerWheel(SLOT)
+    at = np.array([0.5*SLOT, 0.75*SLOT])
+    wheel.schedule(np.arange(2), at)
+    assert wheel.pop(0.6*SLOT, at).tolist() == [0]
+    assert wheel.pop(0.7*SLOT, at).tolist() == []
+    assert wheel.pop(0.8*SLOT, at).tolist() == [1]
+
+
+def test_rescheduled_entries_fire_at_new_deadline_only():
+    wheel = fl.TimerWheel(SLOT)
+    at = np.array([10*SLOT, 10*SLOT, 30*SLOT])
+    wheel.schedule(np.arange(3), at)
+    # 0 ertelenir, 2 öne alınır: eski kayıtları vade dizisine bakılarak atılmalı
+    at[0] = 40*SLOT
+    at[2] = 5*SLOT
+    wheel.schedule(np.array([0, 2]), at[[0, 2]])
+    assert drain(wheel, at, 50) == {2: 5, 1: 10, 0: 40}
+
+
+def test_past_deadline_fires_on_next_pop_and_clear_resets():
+    wheel = fl.TimerWheel(SLOT)
+    at = np.zeros(3)
+    wheel.pop(20*SLOT, at)
+    at[:] = [3*SLOT, 0.0, 25*SLOT]
+    wheel.schedule(np.arange(3), at)
+    assert sorted(wheel.pop(21*SLOT, at).tolist()) == [0, 1]
+    wheel.clear()
+    assert wheel.pop(30*SLOT, at).tolist() == []
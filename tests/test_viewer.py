@@ -0,0 +1,32 @@
+# Işık Bahçesi — Viewer katmanları (ekran dışı yüzey)
+import pygame
+
+import fakelights as fl
+
+
+def test_pan_rebuilds_world_layer_only(monkeypatch):
+    built = []
+    draw_static = fl.draw_panel_static
+    monkeypatch.setattr(fl, "draw_panel_static", lambda *a: (built.append(1), draw_static(*a)))
+    sim = fl.Simulation(60, seed=1, vectorized=True, world_size=(2000, 1600))
+    viewer = fl.Viewer(sim, surface=pygame.Surface((fl.WIDTH, fl.HEIGHT)))
+    viewer.draw()
+    world = viewer._bg
+    viewer.camera.pan(120, 40)
+    viewer.draw()
+    assert viewer._bg is not world and len(built) == 1
+    sim.toggle_preset("ramazan")
+    viewer.draw()
+    assert len(built) == 2
+
+
+def test_click_selects_without_touching_agents():
+    sim = fl.Simulation(40, seed=2)
+    viewer = fl.Viewer(sim, surface=pygame.Surface((fl.WIDTH, fl.HEIGHT)))
+    viewer.draw()
+    x, y = viewer.camera.point(*viewer.snapshot.pos[7])
+    viewer.handle_event(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=(int(x), int(y))))
+    assert viewer.selected == viewer.runner.selected == 7
+    viewer.draw()
+    assert viewer.snapshot.agent.id == 7
+    assert not hasattr(sim.agents[7], "selected")